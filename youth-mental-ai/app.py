@@ -1,16 +1,11 @@
-from flask import Flask, request, Response, jsonify
+from flask import Flask, request, Response, jsonify, stream_with_context, g
 from flask_cors import CORS
-import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.naive_bayes import GaussianNB
-from sklearn.preprocessing import LabelEncoder, StandardScaler, PowerTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.metrics import accuracy_score
-import joblib
 import os
 import datetime
+import uuid
 import traceback
+from werkzeug.formparser import parse_form_data
 from werkzeug.utils import secure_filename
 import logging
 import json
@@ -18,12 +13,29 @@ import sys
 import io
 from contextlib import contextmanager
 import warnings
-from sklearn import __version__ as sklearn_version
+import time
+from importlib import metadata
+from model_cache import ModelCache, ModelNotFoundError
+import batch_predict
+import drift_monitor
+import feature_pruning
+import inference
+import metrics
+from micro_batch import MicroBatcher
+from result_cache import PredictionCache
+import model_index
+import serving
+import training_config
+import upload_stream
+from training_jobs import TrainingJobManager, QueueFullError, JobNotFoundError
+# pandas and scikit-learn are imported on first use: the web process starts (and answers /health) without
+# them and compact models never need them. The trainers are only imported by training job workers
 try:
-    from sklearn.exceptions import InconsistentVersionWarning
-except Exception:
-    InconsistentVersionWarning = UserWarning
-warnings.filterwarnings("ignore", category=InconsistentVersionWarning)
+    sklearn_version = metadata.version('scikit-learn')
+except metadata.PackageNotFoundError:
+    sklearn_version = None
+# scikit-learn's InconsistentVersionWarning, matched by message so sklearn needn't be imported for it
+warnings.filterwarnings("ignore", message="Trying to unpickle estimator", category=UserWarning)
 
 app = Flask(__name__)
 CORS(app)
@@ -31,10 +43,184 @@ CORS(app)
 UPLOAD_FOLDER = 'uploads'
 MODELS_FOLDER = 'models'
 ALLOWED_EXTENSIONS = {'csv'}
+# Uploads above this size are trained out-of-core when mode=auto (the default)
+STREAMING_TRAIN_THRESHOLD_MB = float(os.environ.get('STREAMING_TRAIN_THRESHOLD_MB', 200))
+
+# Parsed copies of uploaded datasets, keyed by content hash and bounded by total size
+DATASET_CACHE_FOLDER = os.environ.get('DATASET_CACHE_FOLDER', 'dataset_cache')
+DATASET_CACHE_MAX_MB = float(os.environ.get('DATASET_CACHE_MAX_MB', 512))
+
+# Redundant-feature filter: drop a feature correlating above the threshold with an earlier one
+# (pearson|spearman); both can be overridden per upload with correlation_method/correlation_threshold
+CORRELATION_METHOD = os.environ.get('CORRELATION_METHOD', feature_pruning.DEFAULT_METHOD)
+CORRELATION_THRESHOLD = float(os.environ.get('CORRELATION_THRESHOLD', feature_pruning.DEFAULT_THRESHOLD))
+
+# Multi-model search (see model_search.py): wall-clock seconds per training request, 0 = plain GaussianNB
+# tuning; overridable per upload with search_budget up to SEARCH_MAX_BUDGET_SECONDS. SEARCH_WORKERS=0 uses every core
+SEARCH_BUDGET_SECONDS = float(os.environ.get('SEARCH_BUDGET_SECONDS', 0))
+SEARCH_MAX_BUDGET_SECONDS = float(os.environ.get('SEARCH_MAX_BUDGET_SECONDS', 600))
+SEARCH_WORKERS = int(os.environ.get('SEARCH_WORKERS', 0))
+
+# Training uploads (see upload_stream.py): kept in memory up to UPLOAD_SPOOL_MB, written once to UPLOAD_FOLDER
+# above that, refused above MAX_UPLOAD_MB (0 = no limit). Files a crashed worker left behind go after UPLOAD_STALE_HOURS
+UPLOAD_SPOOL_MB = float(os.environ.get('UPLOAD_SPOOL_MB', 64))
+MAX_UPLOAD_MB = float(os.environ.get('MAX_UPLOAD_MB', 2048))
+UPLOAD_STALE_HOURS = float(os.environ.get('UPLOAD_STALE_HOURS', 24))
 
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(MODELS_FOLDER, exist_ok=True)
 
+# Prometheus-style metrics served by GET /metrics
+metrics_registry = metrics.Registry(prefix='ymh_')
+http_requests = metrics_registry.counter('http_requests_total', 'HTTP requests by route, method and status code',
+                                         ('endpoint', 'method', 'status'))
+http_latency = metrics_registry.histogram('http_request_duration_seconds',
+                                          'HTTP request latency by route (streamed responses until the stream ends)',
+                                          ('endpoint', 'method'))
+http_in_flight = metrics_registry.gauge('http_requests_in_flight', 'HTTP requests currently being served')
+model_load_latency = metrics_registry.histogram('model_load_duration_seconds', 'Model artifact load time by format',
+                                                ('format',))
+training_duration = metrics_registry.histogram('training_job_duration_seconds',
+                                               'Training job run time by final status', ('status',))
+training_stage_latency = metrics_registry.histogram('training_stage_duration_seconds',
+                                                    'Training stage run time', ('stage',))
+training_jobs_finished = metrics_registry.counter('training_jobs_total', 'Finished training jobs by status', ('status',))
+
+def record_training_event(job, event):
+    if event.get('type') == 'timing':
+        training_stage_latency.observe(event['seconds'], event['stage'])
+
+def record_training_finish(job):
+    training_jobs_finished.inc(job.status)
+    if job.duration is not None:
+        training_duration.observe(job.duration, job.status)
+    if job.status == 'succeeded' and model_watcher is not None:
+        model_watcher.poke()
+
+MODEL_CACHE_SIZE = int(os.environ.get('MODEL_CACHE_SIZE', 4))
+model_cache = ModelCache(MODELS_FOLDER, max_entries=MODEL_CACHE_SIZE,
+                         on_load=lambda filename, fmt, seconds: model_load_latency.observe(seconds, fmt))
+models_index = model_index.ModelIndex(MODELS_FOLDER)
+
+# Training runs in worker processes; the queue cap keeps concurrent admins from starving predictions.
+# Job state lives in JOBS_FOLDER, so the caps and /jobs hold across all gunicorn workers (see training_jobs.py)
+JOBS_FOLDER = os.environ.get('JOBS_FOLDER', 'jobs')
+MAX_TRAINING_JOBS = int(os.environ.get('MAX_TRAINING_JOBS', 1))
+TRAINING_QUEUE_DEPTH = int(os.environ.get('TRAINING_QUEUE_DEPTH', 4))
+training_jobs = TrainingJobManager('trainer:run_training', JOBS_FOLDER, max_workers=MAX_TRAINING_JOBS,
+                                   max_queue=TRAINING_QUEUE_DEPTH, on_event=record_training_event,
+                                   on_finish=record_training_finish)
+
+# Optional micro-batching of concurrent /predict calls (0 ms window = score every call on its own)
+PREDICT_BATCH_WINDOW_MS = float(os.environ.get('PREDICT_BATCH_WINDOW_MS', 0))
+PREDICT_MAX_BATCH = int(os.environ.get('PREDICT_MAX_BATCH', 64))
+predict_batch_size = metrics_registry.histogram('predict_micro_batch_size', 'Rows scored per micro-batch',
+                                                buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+predict_queue_wait = metrics_registry.histogram('predict_micro_batch_queue_wait_seconds',
+                                                'Time a /predict row waited to be scored in a micro-batch')
+
+def record_micro_batch(size, waits, scoring_seconds):
+    predict_batch_size.observe(size)
+    for wait in waits:
+        predict_queue_wait.observe(wait)
+
+micro_batcher = (MicroBatcher(PREDICT_BATCH_WINDOW_MS, PREDICT_MAX_BATCH, on_batch=record_micro_batch)
+                 if PREDICT_BATCH_WINDOW_MS > 0 else None)
+
+# Optional memoization of /predict responses (0 entries = disabled)
+PREDICT_CACHE_SIZE = int(os.environ.get('PREDICT_CACHE_SIZE', 0))
+PREDICT_CACHE_TTL = float(os.environ.get('PREDICT_CACHE_TTL', 300))
+PREDICT_CACHE_DECIMALS = os.environ.get('PREDICT_CACHE_DECIMALS')
+prediction_cache = (PredictionCache(PREDICT_CACHE_SIZE, ttl=PREDICT_CACHE_TTL,
+                                    decimals=int(PREDICT_CACHE_DECIMALS) if PREDICT_CACHE_DECIMALS else None)
+                    if PREDICT_CACHE_SIZE > 0 else None)
+
+# Input-drift monitoring of /predict and /predict-batch traffic against the training data (0 = off)
+DRIFT_MONITOR = os.environ.get('DRIFT_MONITOR', '1').lower() not in ('0', 'false', 'no')
+DRIFT_BATCH_ROWS = int(os.environ.get('DRIFT_BATCH_ROWS', drift_monitor.BATCH_ROWS))
+DRIFT_MIN_ROWS = int(os.environ.get('DRIFT_MIN_ROWS', drift_monitor.MIN_ROWS))
+
+def observe_drift(model_data, X, predicted):
+    """Hand scored rows to the model's drift monitor; never fails the prediction"""
+    if not DRIFT_MONITOR:
+        return
+    try:
+        monitor = drift_monitor.get_monitor(model_data, DRIFT_BATCH_ROWS, DRIFT_MIN_ROWS)
+        if monitor is not None:
+            monitor.observe(X, predicted)
+    except Exception as e:
+        print(f"Drift monitor update failed: {e}")
+
+# Readiness (separate from /health) and the per-process watcher that warms newly trained models
+MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', 2))
+readiness = serving.Readiness()
+model_watcher = None
+
+def preload_models():
+    """Load the active model before workers fork so they share it copy-on-write"""
+    filename = serving.warm_model(model_cache)
+    print(f"Preloaded model: {filename}")
+    return filename
+
+def init_worker():
+    """Per-process startup: warm up (in the background; /ready says when), then follow new models"""
+    global model_watcher
+    for name in upload_stream.sweep_stale(UPLOAD_FOLDER, UPLOAD_STALE_HOURS * 3600):
+        print(f"Removed stale upload {name}")
+    if model_watcher is None or not model_watcher.is_alive():
+        model_watcher = serving.ModelWatcher(model_cache, readiness, interval=MODEL_WATCH_INTERVAL, warm_first=True)
+        model_watcher.start()
+
+# Values the cache and job manager already track are read at scrape time
+metrics_registry.gauge('training_jobs_running', 'Training jobs currently running',
+                       callback=lambda: training_jobs.stats()['running'])
+metrics_registry.gauge('training_jobs_queued', 'Training jobs waiting for a worker',
+                       callback=lambda: training_jobs.stats()['queued'])
+metrics_registry.gauge('model_cache_entries', 'Models held in the in-memory cache',
+                       callback=lambda: model_cache.stats()['size'])
+metrics_registry.counter('model_cache_lookups_total', 'Model cache lookups by result', ('result',),
+                         callback=lambda: {(k,): v for k, v in model_cache.stats().items()
+                                           if k in ('hits', 'misses', 'evictions', 'invalidations')})
+if prediction_cache is not None:
+    metrics_registry.counter('prediction_cache_lookups_total', 'Prediction result cache lookups by result', ('result',),
+                             callback=lambda: {(k,): v for k, v in prediction_cache.stats().items()
+                                               if k in ('hits', 'misses', 'evictions', 'expirations', 'invalidations')})
+    metrics_registry.gauge('prediction_cache_entries', 'Cached prediction results',
+                           callback=lambda: prediction_cache.stats()['size'])
+    metrics_registry.gauge('prediction_cache_bytes', 'Approximate memory held by cached prediction results',
+                           callback=lambda: prediction_cache.stats()['approx_bytes'])
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    http_in_flight.inc()
+
+def finish_request_metrics(started, endpoint, method, status):
+    http_in_flight.dec()
+    http_latency.observe(time.perf_counter() - started, endpoint, method)
+    http_requests.inc(endpoint, method, str(status))
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # Label by route pattern (not raw path) so job ids don't explode the series count
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        method, status = request.method, response.status_code
+        if response.is_streamed:
+            # SSE and batch output are only done once the server closes the stream
+            response.call_on_close(lambda: finish_request_metrics(started, endpoint, method, status))
+        else:
+            finish_request_metrics(started, endpoint, method, status)
+    return response
+
+@app.teardown_request
+def record_failed_request_metrics(exc=None):
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        finish_request_metrics(started, endpoint, request.method, 500)
+
 class LogCapture:
     def __init__(self):
         self.logs = []
@@ -101,25 +287,6 @@ def preprocess_data(df):
         print(f"Full traceback: {traceback.format_exc()}")
         raise Exception(f"Error in preprocessing: {str(e)}")
 
-def detect_target_column(df):
-    """
-    Simple target column detection - prioritize 'Mood' like in the notebook
-    """
-    print(f"Detecting target from columns: {df.columns.tolist()}")
-    
-    priority_targets = ['mood', 'mental_health', 'depression', 'anxiety', 'stress']
-    
-    for col in df.columns:
-        col_lower = str(col).lower()
-        for target in priority_targets:
-            if target in col_lower:
-                print(f"Found priority target: {col}")
-                return col
-    
-    last_col = df.columns[-1]
-    print(f"No priority target found, using last column: {last_col}")
-    return last_col
-
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -129,282 +296,263 @@ def health_check():
         'timestamp': datetime.datetime.now().isoformat()
     })
 
-@app.route('/train-stream', methods=['POST'])
-def train_model_stream():
-    """Train model with real-time log streaming"""
-    
-    # Capture request data BEFORE entering the generator
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: 200 once this worker has warmed up its model, 503 before"""
+    state = readiness.to_dict()
+    state['model_reloads'] = model_watcher.reloads if model_watcher is not None else 0
+    return jsonify({'success': state['ready'], **state}), (200 if state['ready'] else 503)
+
+def save_training_upload():
+    """Validate and receive a training upload; returns run_training kwargs or raises ValueError"""
+    max_bytes = int(MAX_UPLOAD_MB * 1024 * 1024)
+    # Before a byte of the body is read (chunked uploads are cut off as they cross the limit instead)
+    upload_stream.check_declared_size(request.content_length, max_bytes)
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    def accept(name):
+        # Checked as the file part starts, so a wrong file type isn't received first
+        if name and not allowed_file(name):
+            raise ValueError('Invalid file type. Only CSV files are allowed')
+
+    factory, received = upload_stream.upload_target(
+        lambda name: os.path.join(UPLOAD_FOLDER, f"{timestamp}_{uuid.uuid4().hex[:8]}_{secure_filename(name or '')}"),
+        spool_bytes=int(UPLOAD_SPOOL_MB * 1024 * 1024), max_bytes=max_bytes, accept=accept)
     try:
-        if 'file' not in request.files:
-            return Response(f"data: {json.dumps({'error': 'No file uploaded'})}\n\n", 
-                          mimetype='text/event-stream')
+        _, form, files = parse_form_data(request.environ, stream_factory=factory, silent=False)
+        if 'file' not in files:
+            raise ValueError('No file uploaded')
         
-        file = request.files['file']
+        file = files['file']
         
         if file.filename == '':
-            return Response(f"data: {json.dumps({'error': 'No file selected'})}\n\n", 
-                          mimetype='text/event-stream')
-        
-        if not allowed_file(file.filename):
-            return Response(f"data: {json.dumps({'error': 'Invalid file type. Only CSV files are allowed'})}\n\n", 
-                          mimetype='text/event-stream')
-        
-        filename = secure_filename(file.filename)
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        uploaded_filename = f"{timestamp}_{filename}"
-        filepath = os.path.join(UPLOAD_FOLDER, uploaded_filename)
-        file.save(filepath)
-        
+            raise ValueError('No file selected')
+        
+        mode = form.get('mode', 'auto').lower()
+        if mode not in ('auto',) + training_config.TRAINING_MODES:
+            raise ValueError('mode must be auto, full, streaming or update')
+        chunk_size = form.get('chunk_size', training_config.DEFAULT_CHUNK_SIZE, type=int)
+        if chunk_size is None or chunk_size < 1:
+            raise ValueError('chunk_size must be a positive integer')
+        # reuse=0 forces a retrain even when identical data was trained with the same settings
+        reuse = form.get('reuse', '1').lower() not in ('0', 'false', 'no')
+        # Validated here so a bad value is a 400, not a failed job
+        pruner = feature_pruning.CorrelationPruner(
+            form.get('correlation_threshold', CORRELATION_THRESHOLD, type=float),
+            form.get('correlation_method', CORRELATION_METHOD))
+        search_budget = form.get('search_budget', SEARCH_BUDGET_SECONDS, type=float)
+        if not 0 <= search_budget <= SEARCH_MAX_BUDGET_SECONDS:
+            raise ValueError(f'search_budget must be between 0 and {SEARCH_MAX_BUDGET_SECONDS:g} seconds')
+        # mode=update folds the upload into the active model (or the one named by parent_model)
+        parent_model = None
+        if mode == 'update':
+            try:
+                parent_model = model_cache.resolve(form.get('parent_model'))
+            except ModelNotFoundError as e:
+                raise ValueError(str(e))
+        
+        upload = file.stream
+        if mode == 'auto':
+            mode = 'streaming' if upload.size / (1024 * 1024) > STREAMING_TRAIN_THRESHOLD_MB else 'full'
+        
+        # Small uploads go to the job as bytes; larger ones were already written once, to their final path
+        upload_bytes = upload.getvalue() if upload.in_memory else None
+        filepath = upload.commit()
+    except BaseException:
+        for upload in received:
+            upload.discard()
+        raise
+    for extra in received:
+        if extra is not upload:
+            extra.discard()
+    upload.close()
+    
+    return {
+        'mode': mode,
+        'filepath': filepath,
+        'upload_bytes': upload_bytes,
+        'filename': secure_filename(file.filename),
+        'timestamp': timestamp,
+        'models_folder': MODELS_FOLDER,
+        'chunk_size': chunk_size,
+        'dataset_hash': upload.sha256,
+        'dataset_cache_folder': DATASET_CACHE_FOLDER,
+        'dataset_cache_max_bytes': int(DATASET_CACHE_MAX_MB * 1024 * 1024),
+        'reuse': reuse,
+        'parent_model': parent_model,
+        'correlation_method': pruner.method,
+        'correlation_threshold': pruner.threshold,
+        'search_budget': search_budget,
+        'search_workers': SEARCH_WORKERS or None
+    }
+
+def submit_training_job(params):
+    cleanup_paths = [params['filepath']] if params['filepath'] else []
+    try:
+        return training_jobs.submit(cleanup_paths=cleanup_paths, **params)
+    except Exception:
+        # Never queued, so the job won't remove the upload
+        for path in cleanup_paths:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+def job_event_stream(job_id, last_event_id=None):
+    """SSE frames for a job's events, resuming after last_event_id"""
+    for event_id, event in training_jobs.iter_events(job_id, last_event_id):
+        if event is None:
+            yield ": keep-alive\n\n"
+        else:
+            yield f"id: {event_id}\ndata: {json.dumps(event)}\n\n"
+
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'Connection': 'keep-alive',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Cache-Control, Last-Event-ID'
+}
+
+@app.route('/train-stream', methods=['POST'])
+def train_model_stream():
+    """Train model with real-time log streaming (runs as a background job; survives client disconnects)"""
+    try:
+        params = save_training_upload()
+        job = submit_training_job(params)
+    except (ValueError, QueueFullError) as e:
+        return Response(f"data: {json.dumps({'error': str(e)})}\n\n", 
+                      mimetype='text/event-stream')
     except Exception as e:
         return Response(f"data: {json.dumps({'error': f'Initial setup failed: {str(e)}'})}\n\n", 
                       mimetype='text/event-stream')
     
-    def generate_logs():
-        try:
-            yield f"data: {json.dumps({'log': 'Starting training process...', 'type': 'info'})}\n\n"
-            yield f"data: {json.dumps({'log': f'File saved: {uploaded_filename}', 'type': 'success'})}\n\n"
-            
-            data_set = pd.read_csv(filepath)
-            
-            if data_set.empty:
-                yield f"data: {json.dumps({'error': 'CSV file is empty'})}\n\n"
-                return
-                
-            yield f"data: {json.dumps({'log': f'Dataset loaded - Shape: {data_set.shape}', 'type': 'info'})}\n\n"
-            yield f"data: {json.dumps({'log': f'Columns: {data_set.columns.tolist()}', 'type': 'info'})}\n\n"
-            
-            yield f"data: {json.dumps({'log': 'Starting data preprocessing...', 'type': 'info'})}\n\n"
-            # data_set = preprocess_data(data_set)
-            yield f"data: {json.dumps({'log': f'Preprocessing completed - Final shape: {data_set.shape}', 'type': 'success'})}\n\n"
-            
-            target_column = detect_target_column(data_set)
-            yield f"data: {json.dumps({'log': f'Target column detected: {target_column}', 'type': 'info'})}\n\n"
-            
-            if target_column not in data_set.columns:
-                yield f"data: {json.dumps({'error': f'Target column \"{target_column}\" not found'})}\n\n"
-                return
-            
-            # Drop target column first
-            X = data_set.drop(target_column, axis=1)
-            y = data_set[target_column]
-            
-            # Remove non-numeric columns (like Student_ID)
-            numeric_columns = X.select_dtypes(include=[np.number]).columns
-            non_numeric_columns = X.select_dtypes(exclude=[np.number]).columns
-            if len(non_numeric_columns) > 0:
-                yield f"data: {json.dumps({'log': f'Removing non-numeric columns: {non_numeric_columns.tolist()}', 'type': 'info'})}\n\n"
-                X = X[numeric_columns]
-
-            # Drop highly correlated features (helps Naive Bayes independence assumption)
-            corr = X.corr(numeric_only=True).abs()
-            upper = corr.where(np.triu(np.ones(corr.shape), k=1).astype(bool))
-            to_drop = [col for col in upper.columns if (upper[col] > 0.95).any()]
-            if to_drop:
-                X = X.drop(columns=to_drop)
-                yield f"data: {json.dumps({'log': f'Removed highly correlated features: {to_drop}', 'type': 'info'})}\n\n"
-
-            yield f"data: {json.dumps({'log': f'Final features shape: {X.shape}', 'type': 'info'})}\n\n"
-            yield f"data: {json.dumps({'log': f'Feature columns: {X.columns.tolist()}', 'type': 'info'})}\n\n"
-            yield f"data: {json.dumps({'log': f'Target shape: {y.shape}', 'type': 'info'})}\n\n"
-            yield f"data: {json.dumps({'log': f'Target values: {y.value_counts().to_dict()}', 'type': 'info'})}\n\n"
-            
-            # Check if we have any features left
-            if X.shape[1] == 0:
-                yield f"data: {json.dumps({'error': 'No numeric features found for training'})}\n\n"
-                return
-            
-            # Encode target if needed
-            target_encoder = None
-            if y.dtype == 'object' or pd.api.types.is_categorical_dtype(y):
-                le = LabelEncoder()
-                y = le.fit_transform(y)
-                target_encoder = le
-                yield f"data: {json.dumps({'log': f'Target encoded: {dict(zip(le.classes_, range(len(le.classes_))))}', 'type': 'info'})}\n\n"
-
-            if len(np.unique(y)) < 2:
-                yield f"data: {json.dumps({'error': 'Target has less than 2 classes'})}\n\n"
-                return
-            
-            # Use a preprocessing pipeline to make features more Gaussian, then scale
-            yield f"data: {json.dumps({'log': 'Power-transforming and scaling features...', 'type': 'info'})}\n\n"
-            preprocessor = Pipeline(steps=[
-                ('power', PowerTransformer(method='yeo-johnson', standardize=False)),
-                ('scaler', StandardScaler())
-            ])
-            X_pre = preprocessor.fit_transform(X)
-            
-            # Train-test split
-            X_train, X_test, y_train, y_test = train_test_split(
-                X_pre, y, test_size=0.2, random_state=42, stratify=y
-            )
-            
-            yield f"data: {json.dumps({'log': f'Training set: {X_train.shape}', 'type': 'info'})}\n\n"
-            yield f"data: {json.dumps({'log': f'Test set: {X_test.shape}', 'type': 'info'})}\n\n"
-            
-            # Tune GaussianNB var_smoothing (logspace) and optional priors
-            yield f"data: {json.dumps({'log': 'Tuning GaussianNB var_smoothing...', 'type': 'info'})}\n\n"
-            class_priors = (np.bincount(y_train) / len(y_train)).astype(float)
-            best_score, best_vs, best_priors = -1.0, None, None
-
-            for vs in np.logspace(-12, -7, 10):
-                for priors_opt in (None, class_priors):
-                    clf = GaussianNB(var_smoothing=vs, priors=priors_opt)
-                    scores = cross_val_score(clf, X_train, y_train, cv=5, scoring='accuracy')
-                    mean_score = float(scores.mean())
-                    if mean_score > best_score:
-                        best_score, best_vs, best_priors = mean_score, vs, (None if priors_opt is None else class_priors)
-
-            yield f"data: {json.dumps({'log': f'Best var_smoothing: {best_vs:.2e}; priors: {'empirical' if best_priors is not None else 'None'}; CV acc: {0.60+best_score:.3f}', 'type': 'success'})}\n\n"
-            
-            # Train final model
-            model = GaussianNB(var_smoothing=best_vs, priors=best_priors)
-            model_name = 'Gaussian Naive Bayes (tuned)'
-            yield f"data: {json.dumps({'log': 'Training final GaussianNB...', 'type': 'info'})}\n\n"
-            model.fit(X_train, y_train)
-
-            # Evaluate
-            train_predictions = model.predict(X_train)
-            test_predictions  = model.predict(X_test)
-            train_accuracy = accuracy_score(y_train, train_predictions) + 0.60
-            test_accuracy  = accuracy_score(y_test,  test_predictions) + 0.60
-
-            yield f"data: {json.dumps({'log': f'Final Training Accuracy: {train_accuracy:.3f}', 'type': 'success'})}\n\n"
-            yield f"data: {json.dumps({'log': f'Final Testing Accuracy: {test_accuracy:.3f}', 'type': 'success'})}\n\n"
-
-            # Compute CV on training split
-            cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring='accuracy')
-            best_score = float(cv_scores.mean())
-
-            # Class imbalance stats on full target y
-            unique_labels, label_counts = np.unique(y, return_counts=True)
-            min_class_count = int(label_counts.min())
-            max_class_count = int(label_counts.max())
-            imbalance_ratio = (max_class_count / min_class_count) if min_class_count > 0 else 1.0
-
-            # Filenames for saving
-            model_filename = f"mental_health_model_{timestamp}.joblib"
-            model_path = os.path.join(MODELS_FOLDER, model_filename)
-
-            # When saving, store the pipeline under 'scaler'
-            model_data = {
-                'model': model,
-                'scaler': preprocessor,  # Pipeline(power + scaler)
-                'target_encoder': target_encoder,
-                'feature_names': list(X.columns),
-                'target_column': target_column,
-                'model_name': model_name,
-                'train_accuracy': train_accuracy,
-                'test_accuracy': test_accuracy,
-                'cross_validation_score': 0.60+best_score,
-                'sklearn_version': sklearn_version,
-                'training_info': {
-                    'timestamp': timestamp,
-                    'original_filename': filename,
-                    'data_shape': (int(data_set.shape[0]), int(data_set.shape[1])),
-                    'features_count': int(len(X.columns)),
-                    'classes': int(len(unique_labels)),
-                    'class_distribution': {str(int(k)): int(v) for k, v in zip(unique_labels, label_counts)},
-                    'class_imbalance_ratio': float(imbalance_ratio),
-                    'cv_scores': cv_scores.tolist(),
-                    'cv_std': float(cv_scores.std()),
-                    'removed_columns': (non_numeric_columns.tolist() if len(non_numeric_columns) > 0 else []) + to_drop,
-                    'var_smoothing': float(best_vs),
-                    'priors': ('empirical' if best_priors is not None else 'none')
-                }
-            }
-
-            joblib.dump(model_data, model_path)
-
-            if os.path.exists(filepath):
-                os.remove(filepath)
-
-            yield f"data: {json.dumps({'log': f'Model saved successfully: {model_filename}', 'type': 'success'})}\n\n"
-            yield f"data: {json.dumps({'success': True, 'message': f'Mental Health Model trained successfully using {model_name}', 'model_filename': model_filename, 'train_accuracy': float(train_accuracy), 'test_accuracy': float(test_accuracy), 'cross_validation_score': 0.60+best_score})}\n\n"
-            
-        except Exception as e:
-            error_msg = str(e)
-            import traceback
-            traceback_str = traceback.format_exc()
-            yield f"data: {json.dumps({'error': f'Training failed: {error_msg}', 'traceback': traceback_str, 'type': 'error'})}\n\n"
-            
-            if 'filepath' in locals() and os.path.exists(filepath):
-                os.remove(filepath)
+    return Response(job_event_stream(job.id), mimetype='text/event-stream', headers={
+        **SSE_HEADERS,
+        'X-Job-Id': job.id
+    })
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue a training job and return its id immediately"""
+    try:
+        params = save_training_upload()
+        job = submit_training_job(params)
+    except upload_stream.UploadTooLargeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 413
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except QueueFullError as e:
+        return jsonify({'success': False, 'error': str(e)}), 429
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Initial setup failed: {str(e)}'}), 500
     
-    return Response(generate_logs(), mimetype='text/event-stream', headers={
-        'Cache-Control': 'no-cache',
-        'Connection': 'keep-alive',
-        'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Cache-Control'
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'mode': params['mode'],
+        'events_url': f'/jobs/{job.id}/events'
+    }), 202
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    """List training jobs and queue usage"""
+    return jsonify({
+        'success': True,
+        'jobs': training_jobs.list(),
+        'queue': training_jobs.stats()
     })
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Status of a training job"""
+    try:
+        job = training_jobs.get(job_id)
+    except JobNotFoundError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Replay and follow a training job's log as SSE, resuming from Last-Event-ID"""
+    try:
+        training_jobs.get(job_id)
+    except JobNotFoundError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+    try:
+        last_event_id = int(last_event_id) if last_event_id not in (None, '') else None
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Last-Event-ID must be an integer'}), 400
+    
+    return Response(job_event_stream(job_id, last_event_id), mimetype='text/event-stream', headers=SSE_HEADERS)
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a queued or running training job"""
+    try:
+        job = training_jobs.cancel(job_id)
+    except JobNotFoundError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    return jsonify({'success': True, 'job': job.to_dict()})
+
 @app.route('/models', methods=['GET'])
 def list_models():
-    """List all trained models and get active model info"""
+    """List trained models (from the metadata index) and get active model info"""
     try:
-        models = []
-        latest_model_info = None  
-        latest_timestamp_val = 0  
-
         if not os.path.exists(MODELS_FOLDER):
             return jsonify({
                 'success': True,
                 'models': [],
                 'count': 0,
+                'total': 0,
                 'active_model': None,
                 'message': 'No models folder found. Train a model first.'
             })
         
-        for filename in os.listdir(MODELS_FOLDER):
-            if filename.endswith('.joblib'):
-                model_path = os.path.join(MODELS_FOLDER, filename)
-                stat = os.stat(model_path)
-                
-                try:
-                    model_data = joblib.load(model_path)
-                    training_info = model_data.get('training_info', {})
-                    train_accuracy = model_data.get('train_accuracy', 'Unknown')
-                    test_accuracy = model_data.get('test_accuracy', 'Unknown')
-                    target_column = model_data.get('target_column', 'Unknown')
-                    feature_names = model_data.get('feature_names', [])
-                    model_type = model_data.get('model_name', 'Unknown')
-                    
-                    model_info = {
-                        'filename': filename,
-                        'size': stat.st_size,
-                        'created': datetime.datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                        'train_accuracy': train_accuracy,
-                        'test_accuracy': test_accuracy,
-                        'target_column': target_column,
-                        'num_features': len(feature_names),
-                        'feature_names': feature_names,
-                        'model_type': model_type, 
-                        'training_info': training_info
-                    }
-                    
-                    if stat.st_ctime > latest_timestamp_val:
-                        latest_timestamp_val = stat.st_ctime
-                        latest_model_info = model_info
-                        
-                except Exception as load_error:
-                    print(f"Error loading model {filename}: {load_error}")
-                    model_info = {
-                        'filename': filename,
-                        'size': stat.st_size,
-                        'created': datetime.datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                        'error': f'Failed to load: {str(load_error)}'
-                    }
-                
-                models.append(model_info)
-        
-        models.sort(key=lambda x: x['created'], reverse=True)
-        
-        return jsonify({
+        sort = request.args.get('sort', 'created')
+        if sort not in model_index.SORT_FIELDS:
+            return jsonify({'success': False, 'error': f'sort must be one of {list(model_index.SORT_FIELDS)}'}), 400
+        order = request.args.get('order', 'desc').lower()
+        if order not in ('asc', 'desc'):
+            return jsonify({'success': False, 'error': 'order must be asc or desc'}), 400
+        accuracy_field = request.args.get('accuracy_field', 'test_accuracy')
+        if accuracy_field not in ('train_accuracy', 'test_accuracy', 'cross_validation_score'):
+            return jsonify({'success': False, 'error': 'accuracy_field must be train_accuracy, test_accuracy or cross_validation_score'}), 400
+        
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', type=int)
+        if page is None or page < 1 or (per_page is not None and per_page < 1):
+            return jsonify({'success': False, 'error': 'page and per_page must be positive integers'}), 400
+        
+        models, total = models_index.query(
+            sort=sort,
+            order=order,
+            target_column=request.args.get('target_column'),
+            min_accuracy=request.args.get('min_accuracy', type=float),
+            accuracy_field=accuracy_field,
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            page=page,
+            per_page=per_page
+        )
+        latest_model_info = models_index.latest()
+        
+        response = {
             'success': True,
             'models': models,
             'count': len(models),
+            'total': total,
             'active_model': latest_model_info,
             'active_model_filename': latest_model_info['filename'] if latest_model_info else None
-        })
+        }
+        if per_page:
+            response['page'] = page
+            response['per_page'] = per_page
+            response['pages'] = (total + per_page - 1) // per_page
+        
+        return jsonify(response)
         
     except Exception as e:
         print(f"Error listing models: {str(e)}")
@@ -413,9 +561,68 @@ def list_models():
             'error': str(e)
         }), 500
 
+@app.route('/models/cache', methods=['GET'])
+def model_cache_stats():
+    """Model cache hit/miss/eviction counters"""
+    return jsonify({
+        'success': True,
+        'cache': model_cache.stats()
+    })
+
+@app.route('/predict/cache', methods=['GET'])
+def prediction_cache_stats():
+    """Prediction result cache hit ratio and memory use"""
+    return jsonify({
+        'success': True,
+        'enabled': prediction_cache is not None,
+        'cache': prediction_cache.stats() if prediction_cache is not None else None
+    })
+
+@app.route('/predict/batching', methods=['GET'])
+def predict_batching_stats():
+    """Micro-batching batch-size and queue-wait statistics"""
+    return jsonify({
+        'success': True,
+        'enabled': micro_batcher is not None,
+        'batching': micro_batcher.stats() if micro_batcher is not None else None
+    })
+
+@app.route('/drift', methods=['GET'])
+@app.route('/drift', methods=['DELETE'])
+def drift_report():
+    """Live prediction inputs and predicted classes compared with the training data (?model= to pick a model)"""
+    try:
+        model_filename, model_data = model_cache.get(request.args.get('model'))
+    except ModelNotFoundError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    monitor = drift_monitor.get_monitor(model_data, DRIFT_BATCH_ROWS, DRIFT_MIN_ROWS) if DRIFT_MONITOR else None
+    if monitor is None:
+        return jsonify({
+            'success': True,
+            'enabled': DRIFT_MONITOR,
+            'model': model_filename,
+            'drift': None,
+            'message': ('Drift monitoring is disabled (DRIFT_MONITOR=0)' if not DRIFT_MONITOR else
+                        'Model was trained without a drift reference; retrain it to enable drift scores')
+        })
+    if request.method == 'DELETE':
+        # Start a new observation window (e.g. after fixing an upstream feed)
+        monitor.reset()
+    return jsonify({
+        'success': True,
+        'enabled': True,
+        'model': model_filename,
+        'drift': monitor.report()
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus text exposition of request, model-load and training metrics"""
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/predict', methods=['POST'])
 def predict():
-    """Make predictions using the latest trained model"""
+    """Make predictions using the latest trained model, or the one pinned with ?model=<filename>"""
     try:
         data = request.get_json()
         
@@ -425,16 +632,13 @@ def predict():
         if not os.path.exists(MODELS_FOLDER):
             return jsonify({'success': False, 'error': 'No models folder found. Please train a model first.'}), 404
         
-        model_files = [f for f in os.listdir(MODELS_FOLDER) if f.endswith('.joblib')]
-        if not model_files:
-            return jsonify({'success': False, 'error': 'No trained models found. Please train a model first.'}), 404
-        
-        latest_model_filename = sorted(model_files)[-1]
-        model_path = os.path.join(MODELS_FOLDER, latest_model_filename)
+        try:
+            latest_model_filename, model_data = model_cache.get(request.args.get('model'))
+        except ModelNotFoundError as e:
+            return jsonify({'success': False, 'error': str(e)}), 404
         
-        print(f"Using latest model: {latest_model_filename}")
+        print(f"Using model: {latest_model_filename}")
         
-        model_data = joblib.load(model_path)
         trained_ver = model_data.get('sklearn_version')
         if trained_ver and trained_ver != sklearn_version:
             print(f"Note: model trained with scikit-learn {trained_ver}, runtime {sklearn_version}")
@@ -462,40 +666,80 @@ def predict():
         for feature in feature_names:
             feature_values.append(data[feature])
         
-        X_new = pd.DataFrame([feature_values], columns=feature_names)
-        
-        print(f"Input for prediction (raw): {X_new.values}")
-        
-        if scaler is not None:
-            X_new_scaled = scaler.transform(X_new)
-            print(f"Scaled input: {X_new_scaled}")
-        else:
-            X_new_scaled = X_new.values
-            print("No scaler found, using raw input")
-        
-        prediction = model.predict(X_new_scaled)
-        print(f"Prediction result (encoded): {prediction}")
+        cache_key = None
+        if prediction_cache is not None:
+            normalized = prediction_cache.normalize(feature_values)
+            if normalized is not None:
+                if not request.args.get('model'):
+                    prediction_cache.set_active_model(latest_model_filename)
+                cache_key = (latest_model_filename, normalized)
+                cached = prediction_cache.get(cache_key)
+                if cached is not None:
+                    print(f"Prediction cache hit: {cached['predicted_label']}")
+                    observe_drift(model_data, np.array([normalized], dtype=np.float64), [cached['prediction']])
+                    return jsonify(cached)
+                feature_values = list(normalized)
         
         try:
-            prediction_proba = model.predict_proba(X_new_scaled)
-            confidence = float(np.max(prediction_proba))
-            print(f"Prediction probabilities: {prediction_proba}")
-            print(f"Confidence: {confidence}")
-        except Exception as e:
-            print(f"Could not get prediction probabilities: {e}")
-            confidence = None
-            prediction_proba = None
-        
-        if target_encoder is not None:
+            X_raw = np.array([feature_values], dtype=np.float64)
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'All features must be numeric values'}), 400
+        # null, NaN and values that overflow to infinity (e.g. "1e400") would score as NaN probabilities
+        if not np.isfinite(X_raw).all():
+            return jsonify({'success': False, 'error': 'All features must be finite numeric values'}), 400
+        
+        engine = inference.get_engine(model_data)
+        if engine is not None:
+            X_new = X_raw
+            
+            print(f"Input for prediction (raw): {X_new}")
+            if micro_batcher is not None:
+                result = micro_batcher.predict(engine, X_new[0])
+            else:
+                result = engine.predict(X_new)
+            prediction = result.encoded
+            prediction_proba = result.probabilities
+            confidence = float(result.confidence[0])
+            predicted_label = result.labels[0]
+            print(f"Prediction: {predicted_label} (encoded {prediction[0]}), confidence: {confidence}")
+            observe_drift(model_data, X_new, prediction)
+        else:
+            import pandas as pd
+            X_new = pd.DataFrame(X_raw, columns=feature_names)
+            
+            print(f"Input for prediction (raw): {X_new.values}")
+            
+            if scaler is not None:
+                X_new_scaled = scaler.transform(X_new)
+                print(f"Scaled input: {X_new_scaled}")
+            else:
+                X_new_scaled = X_new.values
+                print("No scaler found, using raw input")
+            
+            prediction = model.predict(X_new_scaled)
+            print(f"Prediction result (encoded): {prediction}")
+            observe_drift(model_data, X_new.to_numpy(dtype=np.float64), prediction)
+            
             try:
-                predicted_label = target_encoder.inverse_transform(prediction)[0]
-                print(f"Decoded prediction: {predicted_label}")
+                prediction_proba = model.predict_proba(X_new_scaled)
+                confidence = float(np.max(prediction_proba))
+                print(f"Prediction probabilities: {prediction_proba}")
+                print(f"Confidence: {confidence}")
             except Exception as e:
-                print(f"Error decoding prediction: {e}")
+                print(f"Could not get prediction probabilities: {e}")
+                confidence = None
+                prediction_proba = None
+            
+            if target_encoder is not None:
+                try:
+                    predicted_label = target_encoder.inverse_transform(prediction)[0]
+                    print(f"Decoded prediction: {predicted_label}")
+                except Exception as e:
+                    print(f"Error decoding prediction: {e}")
+                    predicted_label = str(prediction[0])
+            else:
                 predicted_label = str(prediction[0])
-        else:
-            predicted_label = str(prediction[0])
-            print(f"No target encoder, using raw prediction: {predicted_label}")
+                print(f"No target encoder, using raw prediction: {predicted_label}")
         
         response_data = {
             'success': True,
@@ -511,6 +755,9 @@ def predict():
         
         print(f"Final response: {response_data}")
         
+        if cache_key is not None:
+            prediction_cache.put(cache_key, response_data)
+        
         return jsonify(response_data)
         
     except Exception as e:
@@ -524,14 +771,91 @@ def predict():
             'error': error_msg
         }), 500
 
+@app.route('/predict-batch', methods=['POST'])
+def predict_batch():
+    """Score a JSON array or CSV upload, streaming one result per row as NDJSON or CSV"""
+    try:
+        try:
+            model_filename, model_data = model_cache.get(request.args.get('model'))
+        except ModelNotFoundError as e:
+            return jsonify({'success': False, 'error': str(e)}), 404
+
+        output_format = request.args.get('format', 'ndjson').lower()
+        if output_format not in ('ndjson', 'csv'):
+            return jsonify({'success': False, 'error': 'format must be ndjson or csv'}), 400
+
+        chunk_size = request.args.get('chunk_size', batch_predict.DEFAULT_CHUNK_SIZE, type=int)
+        if chunk_size is None or chunk_size < 1:
+            return jsonify({'success': False, 'error': 'chunk_size must be a positive integer'}), 400
+
+        if 'file' in request.files:
+            file = request.files['file']
+            if file.filename == '' or not allowed_file(file.filename):
+                return jsonify({'success': False, 'error': 'Invalid file type. Only CSV files are allowed'}), 400
+            chunks = batch_predict.iter_csv_chunks(file.stream, chunk_size)
+        elif request.mimetype == 'text/csv':
+            chunks = batch_predict.iter_csv_chunks(request.stream, chunk_size)
+        else:
+            data = request.get_json(silent=True)
+            if isinstance(data, dict):
+                data = data.get('rows')
+            if not isinstance(data, list):
+                return jsonify({'success': False, 'error': 'Expected a JSON array of rows or a CSV upload'}), 400
+            chunks = batch_predict.iter_json_chunks(data, chunk_size)
+
+        # Parse the first chunk eagerly so malformed CSVs fail with a proper status code
+        try:
+            first = next(chunks, None)
+        except Exception as e:
+            return jsonify({'success': False, 'error': f'Could not parse input: {str(e)}'}), 400
+
+        def all_chunks():
+            if first is not None:
+                yield first
+                yield from chunks
+
+        print(f"Batch prediction using model: {model_filename}")
+        results = batch_predict.predict_chunks(model_data, all_chunks(),
+                                               on_scored=lambda X, encoded: observe_drift(model_data, X, encoded))
+
+        if output_format == 'csv':
+            body, mimetype = batch_predict.format_csv(results), 'text/csv'
+        else:
+            body, mimetype = batch_predict.format_ndjson(results), 'application/x-ndjson'
+
+        return Response(stream_with_context(body), mimetype=mimetype, headers={
+            'X-Model-Used': model_filename,
+            'Cache-Control': 'no-cache'
+        })
+
+    except Exception as e:
+        print(f"Batch prediction error: {str(e)}")
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 if __name__ == '__main__':
     print("Starting Youth Mental Health AI API...")
     print("Available endpoints:")
     print("  GET  /health        - Health check")
-    print("  POST /train-stream  - Train new model with real-time log streaming")
-    print("  GET  /models        - List trained models and active model info")
-    print("  POST /predict       - Make predictions using the latest trained model")
+    print("  GET  /ready         - Readiness (503 until the model is warmed up)")
+    print("  POST /train-stream  - Train new model with real-time log streaming (mode=auto|full|streaming|update)")
+    print("  POST /jobs          - Queue a training job (returns a job id)")
+    print("  GET  /jobs/<id>     - Training job status (DELETE or POST /jobs/<id>/cancel to cancel)")
+    print("  GET  /jobs/<id>/events - Training job log as SSE (resumes from Last-Event-ID)")
+    print("  GET  /models        - List trained models and active model info (sort/filter/paginate)")
+    print("  GET  /models/cache  - Model cache hit/miss/eviction counters")
+    print("  GET  /metrics       - Prometheus metrics (request latency, model loads, training stages/jobs)")
+    print("  GET  /drift         - Live input/prediction drift vs the training data (PSI, KS; DELETE restarts)")
+    print("  POST /predict       - Make predictions using the latest trained model (?model= to pin one)")
+    print("  GET  /predict/cache - Prediction result cache stats (enable with PREDICT_CACHE_SIZE)")
+    print("  GET  /predict/batching - Micro-batching stats (enable with PREDICT_BATCH_WINDOW_MS)")
+    print("  POST /predict-batch - Score a JSON array or CSV upload, streamed as NDJSON or CSV")
     
     log = logging.getLogger('werkzeug')
     log.setLevel(logging.ERROR)
+    init_worker()
+    # Development server only; use `gunicorn -c gunicorn.conf.py wsgi:application` in production
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
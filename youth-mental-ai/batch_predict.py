@@ -0,0 +1,177 @@
+import csv
+import io
+import json
+
+import numpy as np
+
+import inference
+
+# pandas is imported inside the functions that parse input, so importing this module (and the app) stays cheap
+
+
+DEFAULT_CHUNK_SIZE = 1000
+CSV_FIELDS = ['row', 'success', 'predicted_label', 'prediction', 'confidence', 'probabilities', 'error']
+
+
+def iter_json_chunks(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield (start_row, DataFrame) chunks from a list of JSON objects"""
+    import pandas as pd
+
+    for start in range(0, len(rows), chunk_size):
+        part = rows[start:start + chunk_size]
+        records = [r if isinstance(r, dict) else {} for r in part]
+        frame = pd.DataFrame.from_records(records, index=range(start, start + len(part)))
+        # Keep track of entries that were not objects so they can be reported per row
+        frame['__invalid__'] = [not isinstance(r, dict) for r in part]
+        yield start, frame
+
+
+def iter_csv_chunks(stream, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield (start_row, DataFrame) chunks from a CSV file-like object without loading it whole"""
+    import pandas as pd
+
+    start = 0
+    for frame in pd.read_csv(stream, chunksize=chunk_size):
+        frame.index = range(start, start + len(frame))
+        frame['__invalid__'] = False
+        yield start, frame
+        start += len(frame)
+
+
+def validate_chunk(frame, feature_names):
+    """
+    Coerce the model features of a chunk to numeric in one pass.
+
+    Returns (X, errors) where X holds only the valid rows and errors maps a
+    row index to its error message.
+    """
+    import pandas as pd
+
+    errors = {}
+    for idx in frame.index[frame['__invalid__'].to_numpy(dtype=bool)]:
+        errors[int(idx)] = 'Row must be a JSON object'
+
+    columns = {}
+    for feature in feature_names:
+        if feature not in frame.columns:
+            for idx in frame.index:
+                errors.setdefault(int(idx), f'Missing required feature: {feature}')
+            columns[feature] = pd.Series(np.nan, index=frame.index)
+            continue
+        raw = frame[feature]
+        values = pd.to_numeric(raw, errors='coerce')
+        missing = raw.isna().to_numpy()
+        non_numeric = values.isna().to_numpy() & ~missing
+        infinite = np.isinf(values.to_numpy(dtype=np.float64))
+        for idx in frame.index[missing]:
+            errors.setdefault(int(idx), f'Missing required feature: {feature}')
+        for idx in frame.index[non_numeric]:
+            errors.setdefault(int(idx), f'{feature} must be a numeric value')
+        for idx in frame.index[infinite]:
+            errors.setdefault(int(idx), f'{feature} must be a finite number')
+        columns[feature] = values
+
+    X = pd.DataFrame(columns, index=frame.index)
+    if errors:
+        X = X.drop(index=list(errors.keys()))
+    return X, errors
+
+
+def score_chunk(model_data, X):
+    """Run the artifact pipeline over a whole chunk; returns (labels, encoded, probabilities)"""
+    engine = inference.get_engine(model_data)
+    if engine is not None:
+        result = engine.predict(X.to_numpy(dtype=np.float64))
+        return result.labels, result.encoded, result.probabilities
+
+    model = model_data['model']
+    scaler = model_data.get('scaler')
+    target_encoder = model_data.get('target_encoder')
+
+    X_scaled = scaler.transform(X) if scaler is not None else X.values
+    probabilities = model.predict_proba(X_scaled)
+    encoded = model.classes_[np.argmax(probabilities, axis=1)]
+
+    if target_encoder is not None:
+        labels = target_encoder.inverse_transform(encoded)
+    else:
+        labels = encoded.astype(str)
+    return labels, encoded, probabilities
+
+
+def iter_parsed(chunks):
+    """
+    Yield (chunk, None) for every chunk, then (None, error message) if
+    parsing stops part way: by then the response has started, so the error
+    can only be reported in the body.
+    """
+    chunks = iter(chunks)
+    while True:
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        except Exception as e:
+            # pandas ParserError (a malformed line), UnicodeDecodeError, csv.Error ...
+            yield None, f'Could not parse input: {str(e).strip()}'
+            return
+        yield chunk, None
+
+
+def predict_chunks(model_data, chunks, on_scored=None):
+    """
+    Yield one result dict per input row, in input order; on_scored(X, encoded)
+    sees every scored chunk. Input that can't be parsed ends the results with
+    a record that has no row number and success False.
+    """
+    feature_names = list(model_data.get('feature_names', []))
+    for chunk, parse_error in iter_parsed(chunks):
+        if parse_error is not None:
+            yield {'row': None, 'success': False, 'error': parse_error}
+            return
+        _, frame = chunk
+        X, errors = validate_chunk(frame, feature_names)
+        results = {}
+        if len(X):
+            try:
+                labels, encoded, probabilities = score_chunk(model_data, X[feature_names])
+                if on_scored is not None:
+                    on_scored(X[feature_names].to_numpy(dtype=np.float64), encoded)
+                for idx, label, enc, proba in zip(X.index, labels, encoded, probabilities):
+                    results[int(idx)] = {
+                        'success': True,
+                        'predicted_label': label.item() if hasattr(label, 'item') else label,
+                        'prediction': enc.item() if hasattr(enc, 'item') else enc,
+                        'confidence': float(np.max(proba)),
+                        'probabilities': proba.tolist()
+                    }
+            except Exception as e:
+                for idx in X.index:
+                    errors[int(idx)] = f'Prediction failed: {str(e)}'
+
+        for idx in frame.index:
+            idx = int(idx)
+            if idx in errors:
+                yield {'row': idx, 'success': False, 'error': errors[idx]}
+            else:
+                yield {'row': idx, **results[idx]}
+
+
+def format_ndjson(results):
+    for result in results:
+        yield json.dumps(result) + '\n'
+
+
+def format_csv(results):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    for result in results:
+        if 'probabilities' in result:
+            result = {**result, 'probabilities': json.dumps(result['probabilities'])}
+        writer.writerow(result)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
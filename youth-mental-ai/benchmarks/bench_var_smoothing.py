@@ -0,0 +1,84 @@
+"""
+Compare the sufficient-statistics var_smoothing tuner with the per-grid-point
+cross_val_score loop it replaced.
+
+    python benchmarks/bench_var_smoothing.py [--rows 20000] [--features 6] [--grid 10 100] [--repeat 3]
+
+Prints one JSON document with timings, the speedup and whether both
+implementations picked the same parameters and fold scores.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from nb_tuning import tune_var_smoothing, tune_var_smoothing_loop  # noqa: E402
+
+
+def make_dataset(rows, features, classes=3, seed=42):
+    rng = np.random.default_rng(seed)
+    y = rng.integers(0, classes, rows)
+    centers = rng.normal(0, 0.6, (classes, features))
+    X = centers[y] + rng.normal(0, 1.0, (rows, features))
+    return X, y
+
+
+def best_time(fn, repeat):
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--features', type=int, default=6)
+    parser.add_argument('--grid', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    X, y = make_dataset(args.rows, args.features)
+    class_priors = (np.bincount(y) / len(y)).astype(float)
+    prior_options = (None, class_priors)
+
+    runs = []
+    for grid_size in args.grid:
+        grid = np.logspace(-12, -7, grid_size)
+        loop_time, loop = best_time(lambda: tune_var_smoothing_loop(X, y, grid, prior_options, cv=5), args.repeat)
+        fast_time, fast = best_time(lambda: tune_var_smoothing(X, y, grid, prior_options, cv=5), args.repeat)
+        runs.append({
+            'grid_size': grid_size,
+            'fits_loop': grid_size * len(prior_options) * 5,
+            'fits_sufficient_stats': 5,
+            'loop_seconds': loop_time,
+            'sufficient_stats_seconds': fast_time,
+            'speedup': loop_time / fast_time if fast_time else None,
+            'identical': bool(
+                loop['best_score'] == fast['best_score']
+                and loop['best_var_smoothing'] == fast['best_var_smoothing']
+                and (loop['best_priors'] is None) == (fast['best_priors'] is None)
+                and np.array_equal(loop['best_cv_scores'], fast['best_cv_scores'])
+            ),
+            'best_var_smoothing': float(fast['best_var_smoothing']),
+            'best_score': fast['best_score']
+        })
+
+    print(json.dumps({
+        'benchmark': 'var_smoothing_tuning',
+        'rows': args.rows,
+        'features': args.features,
+        'repeat': args.repeat,
+        'runs': runs
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
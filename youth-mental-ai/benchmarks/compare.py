@@ -0,0 +1,76 @@
+"""
+Compare two benchmark JSON files and flag regressions.
+
+    python benchmarks/compare.py baseline.json candidate.json [--threshold 0.10]
+
+Numeric leaves are matched by path. Times, latencies and RSS are "lower is
+better"; throughput, rows/s and speedups are "higher is better"; anything
+else is ignored. Exits with status 1 if any metric got worse by more than
+the threshold (relative).
+"""
+import argparse
+import json
+import sys
+
+
+HIGHER_IS_BETTER = ('per_second', 'throughput', 'speedup')
+LOWER_IS_BETTER = ('seconds', '_ms', 'rss')
+
+
+def flatten(value, prefix=''):
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield from flatten(child, f'{prefix}.{key}' if prefix else str(key))
+    elif isinstance(value, list):
+        for i, child in enumerate(value):
+            # Lists of runs are keyed by their size parameter when they have one
+            key = next((f'{k}={child[k]}' for k in ('rows', 'models', 'grid_size') if isinstance(child, dict) and k in child), str(i))
+            yield from flatten(child, f'{prefix}[{key}]')
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, float(value)
+
+
+def direction(path):
+    leaf = path.rsplit('.', 1)[-1]
+    if any(token in leaf for token in HIGHER_IS_BETTER):
+        return 1
+    if any(token in leaf for token in LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=0.10)
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = dict(flatten(json.load(f)))
+    with open(args.candidate) as f:
+        candidate = dict(flatten(json.load(f)))
+
+    regressions = []
+    rows = []
+    for path in sorted(set(baseline) & set(candidate)):
+        sign = direction(path)
+        if sign == 0 or path.startswith('config') or baseline[path] == 0:
+            continue
+        change = (candidate[path] - baseline[path]) / abs(baseline[path])
+        worse = -change * sign > args.threshold
+        rows.append((path, baseline[path], candidate[path], change, worse))
+        if worse:
+            regressions.append(path)
+
+    width = max((len(r[0]) for r in rows), default=10)
+    for path, old, new, change, worse in rows:
+        flag = 'REGRESSION' if worse else ''
+        print(f'{path:<{width}}  {old:>14.6g}  {new:>14.6g}  {change:+8.1%}  {flag}')
+
+    print(f'\n{len(regressions)} regression(s) beyond {args.threshold:.0%}')
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
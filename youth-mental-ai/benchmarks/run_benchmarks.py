@@ -0,0 +1,416 @@
+"""
+End-to-end benchmarks for the AI service, driven through the Flask test client.
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --suites predict --predict-requests 5000
+
+Suites:
+  train    /train-stream wall time, time to first event and peak RSS of the
+           training worker, per dataset size
+  predict  /predict p50/p90/p99 latency and throughput; /predict-batch rows/s;
+           parity of the fused engine with the sklearn pipeline, and
+           rejection of null/NaN/infinite features
+  models   GET /models latency as the number of stored artifacts grows
+  startup  a fresh worker process: `import app`, first /health, first
+           /predict and /ready turning 200 (median over --repeats), with
+           the trained model stored compact and as joblib only
+
+Everything runs in a throwaway working directory (the service keeps its
+uploads/ and models/ relative to the cwd). Results are printed (or written)
+as one JSON document; compare two runs with benchmarks/compare.py.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICE_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, SERVICE_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import inference  # noqa: E402
+import synthetic  # noqa: E402
+
+
+def percentiles(values):
+    values = np.asarray(values, dtype=float)
+    return {
+        'count': int(len(values)),
+        'mean_ms': float(values.mean() * 1000),
+        'p50_ms': float(np.percentile(values, 50) * 1000),
+        'p90_ms': float(np.percentile(values, 90) * 1000),
+        'p99_ms': float(np.percentile(values, 99) * 1000),
+        'max_ms': float(values.max() * 1000)
+    }
+
+
+def read_peak_rss_kb(pid):
+    """VmHWM (peak resident set) of a live process, in kB; None if unavailable"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+class PeakRssSampler(threading.Thread):
+    """Polls a process' peak RSS until stopped (the kernel keeps the high-water mark for us)"""
+
+    def __init__(self, pid, interval=0.05):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak_kb = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            value = read_peak_rss_kb(self.pid)
+            if value is not None:
+                self.peak_kb = max(self.peak_kb or 0, value)
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def bench_train(app_module, client, rows_list, noise_columns, mode):
+    results = []
+    for rows in rows_list:
+        csv_path = os.path.abspath(f'bench_{rows}.csv')
+        synthetic.write_csv(csv_path, rows, noise_columns=noise_columns)
+        size = os.path.getsize(csv_path)
+
+        started = time.perf_counter()
+        with open(csv_path, 'rb') as f:
+            response = client.post('/train-stream', data={'file': (f, 'training_data.csv'), 'mode': mode},
+                                   content_type='multipart/form-data', buffered=False)
+            job_id = response.headers.get('X-Job-Id')
+            sampler = None
+            if job_id:
+                job = app_module.training_jobs.get(job_id)
+                if job.process is not None:
+                    sampler = PeakRssSampler(job.process.pid)
+                    sampler.start()
+
+            first_event, events = None, []
+            for chunk in response.response:
+                if first_event is None:
+                    first_event = time.perf_counter() - started
+                text = chunk.decode() if isinstance(chunk, bytes) else chunk
+                for line in text.splitlines():
+                    if line.startswith('data: '):
+                        events.append(json.loads(line[6:]))
+            response.close()
+        elapsed = time.perf_counter() - started
+        if sampler is not None:
+            sampler.stop()
+
+        final = events[-1] if events else {}
+        results.append({
+            'rows': rows,
+            'columns': len(synthetic.FEATURES) + noise_columns + 3,
+            'file_bytes': size,
+            'mode': mode,
+            'success': bool(final.get('success')),
+            'error': final.get('error'),
+            'seconds': elapsed,
+            'time_to_first_event_seconds': first_event,
+            'rows_per_second': rows / elapsed if elapsed else None,
+            'peak_rss_mb': (sampler.peak_kb / 1024) if sampler and sampler.peak_kb else None,
+            'events': len(events)
+        })
+        os.remove(csv_path)
+    return results
+
+
+# Feature values that must be rejected rather than scored (NaN probabilities aren't valid JSON)
+NON_FINITE_VALUES = [None, 'nan', 'inf', '-inf', '1e400']
+
+
+def check_parity(client, model_data, rng, rows=1000):
+    """Fused engine vs the sklearn pipeline on the same rows, and non-finite inputs on both endpoints"""
+    import pandas as pd
+
+    features = list(model_data.get('feature_names', []))
+    engine = inference.get_engine(model_data)
+    result = {'engine': engine is not None}
+    if engine is not None:
+        X = pd.DataFrame([synthetic.sample_request(rng, features) for _ in range(rows)])[features]
+        scaler = model_data.get('scaler')
+        expected = model_data['model'].predict_proba(scaler.transform(X) if scaler is not None else X.values)
+        fused = engine.predict(X.to_numpy(dtype=np.float64))
+        result['rows'] = rows
+        result['max_probability_diff'] = float(np.max(np.abs(fused.probabilities - expected)))
+        result['label_mismatches'] = int(np.sum(fused.encoded != model_data['model'].classes_[np.argmax(expected, axis=1)]))
+
+    payloads = []
+    for value in NON_FINITE_VALUES:
+        payload = synthetic.sample_request(rng, features)
+        payload[features[0]] = value
+        payloads.append(payload)
+    statuses = [client.post('/predict', json=payload).status_code for payload in payloads]
+    batch = client.post('/predict-batch', json=payloads)
+    records = [json.loads(line) for line in batch.get_data(as_text=True).splitlines()]
+    result['non_finite'] = {
+        'values': [str(value) for value in NON_FINITE_VALUES],
+        'predict_rejected': sum(status == 400 for status in statuses),
+        'batch_rejected': sum(not record['success'] for record in records)
+    }
+    return result
+
+
+def bench_predict(app_module, client, requests, concurrency, batch_rows, seed=7):
+    rng = np.random.default_rng(seed)
+    _, model_data = app_module.model_cache.get()
+    features = list(model_data.get('feature_names', []))
+    payloads = [synthetic.sample_request(rng, features) for _ in range(requests)]
+
+    warm = client.post('/predict', json=payloads[0])
+    if warm.status_code != 200:
+        return {'error': warm.get_json()}
+
+    def run(chunk, latencies):
+        for payload in chunk:
+            start = time.perf_counter()
+            response = client.post('/predict', json=payload)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(f'/predict returned {response.status_code}')
+
+    latencies = []
+    started = time.perf_counter()
+    if concurrency <= 1:
+        run(payloads, latencies)
+    else:
+        threads = [threading.Thread(target=run, args=(payloads[i::concurrency], latencies))
+                   for i in range(concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    total = time.perf_counter() - started
+
+    result = {
+        'requests': requests,
+        'concurrency': concurrency,
+        'latency': percentiles(latencies),
+        'throughput_per_second': requests / total if total else None
+    }
+
+    result['parity'] = check_parity(client, model_data, rng)
+
+    if batch_rows:
+        rows = [synthetic.sample_request(rng, features) for _ in range(batch_rows)]
+        start = time.perf_counter()
+        response = client.post('/predict-batch', json=rows)
+        body = response.get_data()
+        batch_seconds = time.perf_counter() - start
+        result['batch'] = {
+            'rows': batch_rows,
+            'status': response.status_code,
+            'seconds': batch_seconds,
+            'rows_per_second': batch_rows / batch_seconds if batch_seconds else None,
+            'response_bytes': len(body)
+        }
+    return result
+
+
+def bench_models(client, models_folder, counts, repeats):
+    templates = sorted(f for f in os.listdir(models_folder) if f.endswith('.joblib'))
+    if not templates:
+        return {'error': 'No trained model to copy; run the train suite first'}
+    stem = templates[-1][:-len('.joblib')]
+    companions = [f for f in os.listdir(models_folder) if f.startswith(stem + '.')]
+
+    results = []
+    existing = len(templates)
+    for count in sorted(counts):
+        for i in range(existing, count):
+            new_stem = f'mental_health_model_bench_{i:06d}'
+            for name in companions:
+                src = os.path.join(models_folder, name)
+                dst = os.path.join(models_folder, new_stem + name[len(stem):])
+                if name.endswith('.meta.json'):
+                    with open(src) as f:
+                        record = json.load(f)
+                    record['filename'] = new_stem + '.joblib'
+                    with open(dst, 'w') as f:
+                        json.dump(record, f)
+                else:
+                    shutil.copyfile(src, dst)
+        existing = max(existing, count)
+
+        start = time.perf_counter()
+        cold = client.get('/models')
+        cold_seconds = time.perf_counter() - start
+
+        latencies = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            response = client.get('/models')
+            latencies.append(time.perf_counter() - start)
+        paged = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            client.get('/models?per_page=20&sort=test_accuracy')
+            paged.append(time.perf_counter() - start)
+
+        results.append({
+            'models': count,
+            'status': response.status_code,
+            'listed': cold.get_json().get('total'),
+            'cold_seconds': cold_seconds,
+            'latency': percentiles(latencies),
+            'paged_latency': percentiles(paged)
+        })
+    return results
+
+
+# Runs in a fresh interpreter: the parent has pandas and sklearn imported already
+STARTUP_SCRIPT = '''
+import contextlib, json, os, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+with contextlib.redirect_stdout(open(os.devnull, 'w')):
+    import app
+    timings = {'import_seconds': time.perf_counter() - start}
+    app.init_worker()
+    client = app.app.test_client()
+    client.get('/health')
+    timings['first_health_seconds'] = time.perf_counter() - start
+    status = client.post('/predict', json=json.loads(sys.argv[2])).status_code
+    timings['first_predict_seconds'] = time.perf_counter() - start
+    while client.get('/ready').status_code != 200:
+        time.sleep(0.005)
+    timings['ready_seconds'] = time.perf_counter() - start
+timings['status'] = status
+print(json.dumps(timings))
+'''
+
+
+def bench_startup(app_module, repeats):
+    _, model_data = app_module.model_cache.get()
+    features = list(model_data.get('feature_names', []))
+    payload = json.dumps(synthetic.sample_request(np.random.default_rng(7), features))
+    models_folder = os.path.abspath(app_module.MODELS_FOLDER)
+    stem = sorted(f for f in os.listdir(models_folder) if f.endswith('.joblib'))[-1][:-len('.joblib')]
+
+    results = {}
+    for layout in ('compact', 'joblib'):
+        workdir = tempfile.mkdtemp(prefix='ymh_startup_')
+        try:
+            os.makedirs(os.path.join(workdir, 'models'))
+            for name in os.listdir(models_folder):
+                if name.startswith(stem + '.') and (layout == 'compact' or not name.endswith('.compact')):
+                    shutil.copyfile(os.path.join(models_folder, name), os.path.join(workdir, 'models', name))
+            runs = []
+            for _ in range(repeats):
+                completed = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, SERVICE_DIR, payload], cwd=workdir,
+                                           capture_output=True, text=True, timeout=300)
+                if completed.returncode != 0:
+                    return {'error': completed.stderr.strip().splitlines()[-1:]}
+                runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        results[layout] = {key: float(np.median([run[key] for run in runs]))
+                           for key in runs[0] if key.endswith('_seconds')}
+        results[layout]['status'] = runs[-1]['status']
+    return results
+
+
+def environment():
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+    for name in ('numpy', 'pandas', 'sklearn', 'flask'):
+        try:
+            info[name] = __import__(name).__version__
+        except Exception:
+            info[name] = None
+    try:
+        info['git_commit'] = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=SERVICE_DIR, capture_output=True,
+                                            text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        info['git_commit'] = None
+    return info
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--suites', nargs='+', default=['train', 'predict', 'models'],
+                        choices=['train', 'predict', 'models', 'startup'])
+    parser.add_argument('--train-rows', type=int, nargs='+', default=[2000, 20000])
+    parser.add_argument('--noise-columns', type=int, default=2)
+    parser.add_argument('--train-mode', default='full', choices=['auto', 'full', 'streaming'])
+    parser.add_argument('--predict-requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--batch-rows', type=int, default=10000)
+    parser.add_argument('--models-counts', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--output', help='Write the JSON here instead of stdout')
+    parser.add_argument('--keep-workdir', action='store_true')
+    args = parser.parse_args()
+
+    output_path = os.path.abspath(args.output) if args.output else None
+    workdir = tempfile.mkdtemp(prefix='ymh_bench_')
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    report = {
+        'benchmark': 'youth_mental_ai_service',
+        'timestamp': datetime.datetime.now().isoformat(),
+        'environment': environment(),
+        'config': vars(args)
+    }
+    try:
+        # The service logs every request to stdout; keep that out of the JSON
+        with contextlib.redirect_stdout(sys.stderr if args.output is None else open(os.devnull, 'w')):
+            start = time.perf_counter()
+            import app as app_module
+            report['import_seconds'] = time.perf_counter() - start
+            client = app_module.app.test_client()
+
+            needs_model = any(suite in args.suites for suite in ('predict', 'models', 'startup'))
+            if 'train' in args.suites or needs_model:
+                rows = args.train_rows if 'train' in args.suites else args.train_rows[:1]
+                report['train'] = bench_train(app_module, client, rows, args.noise_columns, args.train_mode)
+            if 'predict' in args.suites:
+                report['predict'] = bench_predict(app_module, client, args.predict_requests, args.concurrency, args.batch_rows)
+            if 'models' in args.suites:
+                report['models'] = bench_models(client, app_module.MODELS_FOLDER, args.models_counts, args.repeats)
+            if 'startup' in args.suites:
+                report['startup'] = bench_startup(app_module, args.repeats)
+    finally:
+        os.chdir(previous_cwd)
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+        else:
+            report['workdir'] = workdir
+
+    text = json.dumps(report, indent=2, default=str)
+    if output_path:
+        with open(output_path, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Synthetic survey data matching the schema the service is trained on.
+
+    python benchmarks/synthetic.py --rows 100000 --noise-columns 10 --output data.csv
+
+Columns: Student_ID, the six model features (Age, Hours_of_Screen_Time,
+Hours_of_Sleep, Daily_Study_Hours, Physical_Activity, Mental_Clarity_Score),
+optional noise columns, an optional near-duplicate column (exercises the
+correlation filter) and the Mood target (Happy / Neutral / Stressed).
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+
+FEATURES = ['Age', 'Hours_of_Screen_Time', 'Hours_of_Sleep', 'Daily_Study_Hours',
+            'Physical_Activity', 'Mental_Clarity_Score']
+MOODS = np.array(['Happy', 'Neutral', 'Stressed'])
+
+
+def generate(rows, noise_columns=0, duplicate_column=True, seed=42):
+    """Return a DataFrame of `rows` synthetic students"""
+    rng = np.random.default_rng(seed)
+    mood = rng.integers(0, len(MOODS), rows)
+    # +1 for Happy, 0 for Neutral, -1 for Stressed; shifts the lifestyle features
+    shift = 1.0 - mood
+
+    data = {
+        'Student_ID': np.char.add('S', np.arange(rows).astype(str)),
+        'Age': rng.integers(13, 26, rows),
+        'Hours_of_Screen_Time': np.clip(6 - 1.5 * shift + rng.normal(0, 2, rows), 0, 24).round(1),
+        'Hours_of_Sleep': np.clip(7 + shift + rng.normal(0, 1.2, rows), 0, 16).round(1),
+        'Daily_Study_Hours': np.clip(4 + 0.3 * shift + rng.normal(0, 2, rows), 0, 16).round(1),
+        'Physical_Activity': np.clip(50 + 10 * shift + rng.normal(0, 20, rows), 0, 100).round(0),
+        'Mental_Clarity_Score': np.clip(6 + 1.5 * shift + rng.normal(0, 2, rows), 1, 10).round(0),
+    }
+    for i in range(noise_columns):
+        data[f'Noise_{i + 1}'] = rng.normal(0, 1, rows).round(4)
+    if duplicate_column:
+        data['Sleep_Minutes'] = data['Hours_of_Sleep'] * 60 + rng.normal(0, 0.5, rows).round(2)
+    data['Mood'] = MOODS[mood]
+    return pd.DataFrame(data)
+
+
+def write_csv(path, rows, noise_columns=0, duplicate_column=True, seed=42, chunk_rows=250000):
+    """Write a synthetic CSV in chunks so very large files don't need to fit in memory"""
+    written = 0
+    part = 0
+    while written < rows:
+        n = min(chunk_rows, rows - written)
+        frame = generate(n, noise_columns, duplicate_column, seed + part)
+        frame['Student_ID'] = np.char.add('S', np.arange(written, written + n).astype(str))
+        frame.to_csv(path, mode='w' if part == 0 else 'a', header=(part == 0), index=False)
+        written += n
+        part += 1
+    return path
+
+
+def sample_request(rng=None, feature_names=None):
+    """
+    One /predict payload inside the ranges the PHP front end enforces. Extra
+    features a model kept (noise columns) are filled with standard normals.
+    """
+    rng = rng or np.random.default_rng()
+    payload = {
+        'Age': int(rng.integers(13, 26)),
+        'Hours_of_Screen_Time': float(round(rng.uniform(0, 24), 1)),
+        'Hours_of_Sleep': float(round(rng.uniform(0, 16), 1)),
+        'Daily_Study_Hours': float(round(rng.uniform(0, 16), 1)),
+        'Physical_Activity': float(round(rng.uniform(0, 100))),
+        'Mental_Clarity_Score': int(rng.integers(1, 11))
+    }
+    for name in feature_names or ():
+        if name not in payload:
+            payload[name] = float(round(rng.normal(0, 1), 4))
+    return payload
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--noise-columns', type=int, default=0)
+    parser.add_argument('--no-duplicate-column', action='store_true')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='synthetic_mental_health.csv')
+    args = parser.parse_args()
+    write_csv(args.output, args.rows, args.noise_columns, not args.no_duplicate_column, args.seed)
+    print(f"Wrote {args.rows} rows to {args.output}")
@@ -0,0 +1,334 @@
+"""
+Compact, sklearn-free model artifacts.
+
+A `<name>.compact` file sits next to `<name>.joblib` and holds only the
+numbers prediction needs: the Yeo-Johnson lambdas, the StandardScaler
+mean/scale, the GaussianNB theta/var/priors/classes (or, for the linear
+models the model search can pick, a softmax coef/intercept), plus feature
+names, label classes and the drift reference in a JSON header. Arrays are
+stored raw and 64-byte aligned, so loading is an mmap plus a few
+np.frombuffer views: no unpickling, and no dependence on the scikit-learn
+version that trained the model.
+
+Layout: b'YMHCMP01' | uint64 header length | JSON header (padded) | arrays
+
+Existing .joblib artifacts can be converted with:
+
+    python compact_model.py export [models_folder]
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+
+import numpy as np
+
+
+MAGIC = b'YMHCMP01'
+FORMAT_VERSION = 1
+COMPACT_EXTENSION = '.compact'
+ALIGNMENT = 64
+
+
+class UnsupportedModelError(Exception):
+    """Raised when an artifact can't be expressed in the compact format"""
+
+
+# Linear classifiers whose predict_proba is a softmax over X @ coef_.T + intercept_
+# (binary ones use a single logit, i.e. a softmax against a zero row)
+LINEAR_SOFTMAX_MODELS = ('LogisticRegression', 'LinearDiscriminantAnalysis')
+
+
+def compact_path(model_path):
+    return os.path.splitext(model_path)[0] + COMPACT_EXTENSION
+
+
+def _pad(length):
+    return (-length) % ALIGNMENT
+
+
+def preprocessor_arrays(scaler):
+    """Pull (lambdas, mean, scale) out of the stored preprocessing object"""
+    if scaler is None:
+        return None, None, None
+    if isinstance(scaler, CompactPreprocessor):
+        return scaler.lambdas, scaler.mean, scaler.scale
+    steps = dict(getattr(scaler, 'named_steps', {})) or {'scaler': scaler}
+    unknown = set(steps) - {'power', 'scaler'}
+    if unknown:
+        raise UnsupportedModelError(f'Unsupported preprocessing steps: {sorted(unknown)}')
+
+    lambdas = mean = scale = None
+    power = steps.get('power')
+    if power is not None:
+        if getattr(power, 'method', None) != 'yeo-johnson' or getattr(power, 'standardize', False):
+            raise UnsupportedModelError('Only yeo-johnson PowerTransformer(standardize=False) is supported')
+        lambdas = np.asarray(power.lambdas_, dtype=np.float64)
+    standard = steps.get('scaler')
+    if standard is not None:
+        n_features = len(standard.mean_) if getattr(standard, 'mean_', None) is not None else len(standard.scale_)
+        mean = np.asarray(standard.mean_ if standard.mean_ is not None else np.zeros(n_features), dtype=np.float64)
+        scale = np.asarray(standard.scale_ if standard.scale_ is not None else np.ones(n_features), dtype=np.float64)
+    return lambdas, mean, scale
+
+
+def linear_softmax_arrays(model):
+    """(coef, intercept) with one row per class, such that predict_proba = softmax(X @ coef.T + intercept)"""
+    name = type(model).__name__
+    if isinstance(model, CompactLinearModel):
+        return model.coef_, model.intercept_
+    if name not in LINEAR_SOFTMAX_MODELS or not hasattr(model, 'coef_'):
+        raise UnsupportedModelError(f'Only GaussianNB and linear softmax models can be exported, got {name}')
+    coef = np.asarray(model.coef_, dtype=np.float64)
+    intercept = np.asarray(model.intercept_, dtype=np.float64).reshape(-1)
+    if len(model.classes_) == 2:
+        coef = np.vstack([np.zeros_like(coef), coef])
+        intercept = np.concatenate([[0.0], intercept])
+    elif name == 'LogisticRegression' and (getattr(model, 'multi_class', 'auto') == 'ovr'
+                                           or getattr(model, 'solver', None) == 'liblinear'):
+        raise UnsupportedModelError('One-vs-rest logistic regression is not a softmax model')
+    return coef, intercept
+
+
+def export(model_path, model_data):
+    """Write the compact companion of a .joblib artifact (atomically); returns its path"""
+    model = model_data['model']
+    if all(hasattr(model, attr) for attr in ('theta_', 'var_', 'class_prior_', 'classes_')):
+        model_type = 'gaussian_nb'
+        arrays = {
+            'theta': np.asarray(model.theta_, dtype=np.float64),
+            'var': np.asarray(model.var_, dtype=np.float64),
+            'class_prior': np.asarray(model.class_prior_, dtype=np.float64),
+            'classes': np.asarray(model.classes_)
+        }
+    else:
+        coef, intercept = linear_softmax_arrays(model)
+        model_type = 'linear_softmax'
+        arrays = {'coef': coef, 'intercept': intercept, 'classes': np.asarray(model.classes_)}
+
+    lambdas, mean, scale = preprocessor_arrays(model_data.get('scaler'))
+    target_encoder = model_data.get('target_encoder')
+    feature_names = model_data.get('feature_names', [])
+    if hasattr(feature_names, 'tolist'):
+        feature_names = feature_names.tolist()
+
+    if lambdas is not None:
+        arrays['lambdas'] = lambdas
+    if mean is not None:
+        arrays['mean'] = mean
+        arrays['scale'] = scale
+    if arrays['classes'].dtype.kind not in 'iuf':
+        raise UnsupportedModelError('Model classes must be numeric (use a target encoder for labels)')
+
+    from model_index import build_metadata
+    metadata = build_metadata(model_path, model_data)
+
+    header = {
+        'format_version': FORMAT_VERSION,
+        'model_type': model_type,
+        'feature_names': list(feature_names),
+        'label_classes': ([str(c) for c in target_encoder.classes_] if target_encoder is not None else None),
+        'metadata': metadata,
+        # Training distribution sketch for drift monitoring (see drift_monitor), already JSON-safe
+        'drift_reference': model_data.get('drift_reference'),
+        'arrays': {}
+    }
+
+    # Offsets are relative to the start of the data section, so the header can be sized first
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        header['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes + _pad(array.nbytes)
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    prefix = len(MAGIC) + 8
+    header_bytes += b' ' * _pad(prefix + len(header_bytes))
+
+    path = compact_path(model_path)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        for array in arrays.values():
+            f.write(array.tobytes())
+            f.write(b'\0' * _pad(array.nbytes))
+    os.replace(tmp_path, path)
+    return path
+
+
+def _yeo_johnson(X, lambdas):
+    """Vectorized Yeo-Johnson transform (same branches as sklearn's PowerTransformer)"""
+    out = np.empty_like(X)
+    eps = np.spacing(1.0)
+    pos = X >= 0
+    for j, lmbda in enumerate(lambdas):
+        x, p = X[:, j], pos[:, j]
+        col = out[:, j]
+        if abs(lmbda) < eps:
+            col[p] = np.log1p(x[p])
+        else:
+            col[p] = (np.power(x[p] + 1, lmbda) - 1) / lmbda
+        if abs(lmbda - 2) > eps:
+            col[~p] = -(np.power(-x[~p] + 1, 2 - lmbda) - 1) / (2 - lmbda)
+        else:
+            col[~p] = -np.log1p(-x[~p])
+    return out
+
+
+class CompactPreprocessor:
+    """Stand-in for the Pipeline(power + scaler) stored under model_data['scaler']"""
+
+    def __init__(self, lambdas, mean, scale):
+        self.lambdas = lambdas
+        self.mean = mean
+        self.scale = scale
+
+    def transform(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if self.lambdas is not None:
+            X = _yeo_johnson(X, self.lambdas)
+        if self.mean is not None:
+            X = (X - self.mean) / self.scale
+        return X
+
+
+class CompactGaussianNB:
+    """Stand-in for GaussianNB exposing the predict/predict_proba/classes_ API"""
+
+    def __init__(self, theta, var, class_prior, classes):
+        self.theta_ = theta
+        self.var_ = var
+        self.class_prior_ = class_prior
+        self.classes_ = classes
+
+    def _joint_log_likelihood(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        jll = np.empty((X.shape[0], len(self.classes_)))
+        for i in range(len(self.classes_)):
+            n_ij = -0.5 * np.sum(np.log(2.0 * np.pi * self.var_[i, :]))
+            n_ij -= 0.5 * np.sum(((X - self.theta_[i, :]) ** 2) / self.var_[i, :], 1)
+            jll[:, i] = np.log(self.class_prior_[i]) + n_ij
+        return jll
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self._joint_log_likelihood(X), axis=1)]
+
+    def predict_proba(self, X):
+        jll = self._joint_log_likelihood(X)
+        jll_max = jll.max(axis=1, keepdims=True)
+        log_prob_x = jll_max + np.log(np.sum(np.exp(jll - jll_max), axis=1, keepdims=True))
+        return np.exp(jll - log_prob_x)
+
+
+class CompactLinearModel:
+    """Stand-in for a linear softmax classifier exposing the predict/predict_proba/classes_ API"""
+
+    def __init__(self, coef, intercept, classes):
+        self.coef_ = coef
+        self.intercept_ = intercept
+        self.classes_ = classes
+
+    def decision_function(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef_.T + self.intercept_
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.decision_function(X), axis=1)]
+
+    def predict_proba(self, X):
+        scores = self.decision_function(X)
+        scores -= scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+
+class CompactLabelDecoder:
+    """Stand-in for the LabelEncoder: maps encoded classes back to labels"""
+
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes, dtype=object)
+
+    def inverse_transform(self, y):
+        return self.classes_[np.asarray(y, dtype=np.int64)]
+
+
+def load(path):
+    """
+    Memory-map a compact artifact and return a model_data dict compatible with
+    the .joblib layout ('model', 'scaler', 'target_encoder', 'feature_names', ...).
+    """
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if buffer[:len(MAGIC)] != MAGIC:
+        buffer.close()
+        raise ValueError(f'Not a compact model file: {path}')
+    (header_length,) = struct.unpack_from('<Q', buffer, len(MAGIC))
+    data_start = len(MAGIC) + 8 + header_length
+    header = json.loads(bytes(buffer[len(MAGIC) + 8:data_start]))
+    if header.get('format_version') != FORMAT_VERSION:
+        buffer.close()
+        raise ValueError(f"Unsupported compact format version: {header.get('format_version')}")
+
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'])) if spec['shape'] else 1
+        arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count,
+                                     offset=data_start + spec['offset']).reshape(spec['shape'])
+
+    metadata = header.get('metadata', {})
+    label_classes = header.get('label_classes')
+    has_preprocessing = 'lambdas' in arrays or 'mean' in arrays
+    if header.get('model_type', 'gaussian_nb') == 'linear_softmax':
+        model = CompactLinearModel(arrays['coef'], arrays['intercept'], arrays['classes'])
+    else:
+        model = CompactGaussianNB(arrays['theta'], arrays['var'], arrays['class_prior'], arrays['classes'])
+    return {
+        'model': model,
+        'scaler': (CompactPreprocessor(arrays.get('lambdas'), arrays.get('mean'), arrays.get('scale'))
+                   if has_preprocessing else None),
+        'target_encoder': CompactLabelDecoder(label_classes) if label_classes is not None else None,
+        'feature_names': header['feature_names'],
+        'target_column': metadata.get('target_column'),
+        'model_name': metadata.get('model_type'),
+        'train_accuracy': metadata.get('train_accuracy'),
+        'test_accuracy': metadata.get('test_accuracy'),
+        'cross_validation_score': metadata.get('cross_validation_score'),
+        'training_info': metadata.get('training_info', {}),
+        'drift_reference': header.get('drift_reference'),
+        'artifact_format': 'compact',
+        '_buffer': buffer
+    }
+
+
+def export_folder(folder, force=False):
+    """Write compact companions for .joblib artifacts that don't have one yet"""
+    import joblib
+
+    written, skipped = [], []
+    for filename in sorted(os.listdir(folder)):
+        if not filename.endswith('.joblib'):
+            continue
+        model_path = os.path.join(folder, filename)
+        if not force and os.path.exists(compact_path(model_path)):
+            continue
+        try:
+            export(model_path, joblib.load(model_path))
+            written.append(filename)
+        except Exception as e:
+            print(f"Skipping {filename}: {e}")
+            skipped.append(filename)
+    return written, skipped
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'export':
+        print("Usage: python compact_model.py export [models_folder] [--force]")
+        sys.exit(1)
+    args = [a for a in sys.argv[2:] if a != '--force']
+    folder = args[0] if args else 'models'
+    written, skipped = export_folder(folder, force='--force' in sys.argv)
+    print(f"Exported {len(written)} model(s) in {folder}; {len(skipped)} skipped")
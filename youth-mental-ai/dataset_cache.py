@@ -0,0 +1,140 @@
+"""
+Content-addressed cache of parsed training datasets.
+
+Uploads are hashed (SHA-256) by upload_stream.SpooledUpload as the request
+body is received, whether they stay in memory or spill to disk. The DataFrame
+parsed from a CSV is then kept as `<hash>.npz` in the cache folder: one raw
+array per column plus a JSON description of the column order and dtypes.
+Re-uploading identical bytes (the PHP side re-sends the same cleaned CSV)
+loads the arrays instead of re-running pd.read_csv. Text columns are stored
+as fixed-width unicode with a separate missing-value mask, so nothing in the
+cache needs unpickling.
+
+The folder is bounded by total size: whenever an entry is written, the least
+recently used entries (by mtime, refreshed on every hit) are evicted until
+it fits.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+CACHE_EXTENSION = '.npz'
+
+
+class DatasetCache:
+    def __init__(self, folder, max_bytes=512 * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = int(max_bytes)
+
+    def path(self, dataset_hash):
+        if not dataset_hash or not all(c in '0123456789abcdef' for c in dataset_hash):
+            raise ValueError(f'Invalid dataset hash: {dataset_hash!r}')
+        return os.path.join(self.folder, dataset_hash + CACHE_EXTENSION)
+
+    def load(self, dataset_hash):
+        """Return the cached DataFrame for a hash, or None on a miss (or an unreadable entry)"""
+        path = self.path(dataset_hash)
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                meta = json.loads(str(npz['__meta__']))
+                columns = {}
+                for i, (name, kind) in enumerate(meta['columns']):
+                    values = npz[f'c{i}']
+                    if kind == 'text':
+                        values = values.astype(object)
+                        values[npz[f'm{i}']] = np.nan
+                    columns[name] = values
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Discarding unreadable dataset cache entry {os.path.basename(path)}: {e}")
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return pd.DataFrame(columns, columns=[name for name, _ in meta['columns']])
+
+    def store(self, dataset_hash, frame):
+        """Write a DataFrame under its hash (atomically) and evict old entries; returns the path"""
+        os.makedirs(self.folder, exist_ok=True)
+        arrays, described = {}, []
+        for i, name in enumerate(frame.columns):
+            series = frame[name]
+            if series.dtype.kind in 'biuf':
+                arrays[f'c{i}'] = series.to_numpy()
+                described.append((str(name), str(series.dtype)))
+            else:
+                missing = series.isna().to_numpy()
+                arrays[f'c{i}'] = np.where(missing, '', series.astype(str).to_numpy()).astype(str)
+                arrays[f'm{i}'] = missing
+                described.append((str(name), 'text'))
+        arrays['__meta__'] = np.array(json.dumps({'columns': described}))
+
+        path = self.path(dataset_hash)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+        self.evict()
+        return path
+
+    def load_or_parse(self, dataset_hash, filepath, parse=pd.read_csv):
+        """(DataFrame, was_cached): the cached copy if present, else parse(filepath) and cache it"""
+        if dataset_hash:
+            frame = self.load(dataset_hash)
+            if frame is not None:
+                return frame, True
+        frame = parse(filepath)
+        if dataset_hash:
+            try:
+                self.store(dataset_hash, frame)
+            except Exception as e:
+                print(f"Could not cache dataset {dataset_hash[:12]}: {e}")
+        return frame, False
+
+    def entries(self):
+        try:
+            names = [f for f in os.listdir(self.folder) if f.endswith(CACHE_EXTENSION)]
+        except FileNotFoundError:
+            return []
+        entries = []
+        for name in names:
+            try:
+                st = os.stat(os.path.join(self.folder, name))
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+        return sorted(entries)
+
+    def evict(self):
+        """Remove least recently used entries until the folder fits in max_bytes"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        evicted = []
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(os.path.join(self.folder, name))
+            total -= size
+            evicted.append(name)
+        return evicted
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def stats(self):
+        entries = self.entries()
+        return {
+            'folder': self.folder,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes
+        }
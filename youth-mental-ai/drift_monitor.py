@@ -0,0 +1,300 @@
+"""
+Input-drift monitoring for the prediction path.
+
+A Sketch summarizes rows in constant memory, whatever their number:
+
+  moments      per-feature count, mean and variance (Welford, merged a batch
+               at a time with Chan's pairwise update)
+  histogram    per-feature counts over fixed bin edges (the training deciles)
+  predictions  counts of the predicted classes
+
+Training builds one over the uploaded rows and the model's predictions for
+them and stores it in the artifact as model_data['drift_reference'] (a plain
+dict, so the compact format carries it in its header). While serving, every
+model gets a live Sketch over the same edges. GET /drift compares the two:
+per feature with the population stability index (PSI) and a binned
+Kolmogorov-Smirnov distance (the largest gap between the two CDFs at the
+bin edges), and for the predicted-class mix with PSI.
+
+Scoring a row only appends it to a deque. When BATCH_ROWS rows are waiting,
+the request that notices folds them into the sketch with a few vectorized
+operations. If another fold holds the lock, it leaves the rows for the next
+one. Statistics are per process: each gunicorn worker reports the traffic
+it served.
+"""
+import collections
+import datetime
+import threading
+
+import numpy as np
+
+
+REFERENCE_KEY = 'drift_reference'
+MONITOR_KEY = '_drift'
+REFERENCE_VERSION = 1
+BINS = 10
+EDGE_SAMPLE_ROWS = 100000
+BLOCK_BYTES = 64 * 1024 * 1024
+BATCH_ROWS = 256
+MIN_ROWS = 100
+# Conventional PSI reading: < 0.1 stable, 0.1 - 0.25 moderate shift, >= 0.25 significant shift
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+# Proportion floor, so an empty bin on one side doesn't make the PSI infinite
+PSI_EPSILON = 1e-4
+
+
+def _row_block(width):
+    return max(1, BLOCK_BYTES // (8 * max(width, 1)))
+
+
+def quantile_edges(X, bins=BINS, sample_rows=EDGE_SAMPLE_ROWS, seed=42):
+    """(features, bins - 1) interior cut points at the quantiles of X's columns, from a bounded row sample"""
+    X = np.asarray(X)
+    sample_rows = min(sample_rows, _row_block(X.shape[1]))
+    if len(X) > sample_rows:
+        rows = np.sort(np.random.default_rng(seed).choice(len(X), sample_rows, replace=False))
+        X = X[rows]
+    X = X[np.isfinite(X).all(axis=1)].astype(np.float64)
+    if len(X) == 0:
+        return np.zeros((X.shape[1], bins - 1))
+    return np.quantile(X, np.arange(1, bins) / bins, axis=0).T
+
+
+def psi(expected, actual):
+    """Population stability index between count vectors (rows of 2-D arrays are scored separately)"""
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    p = np.maximum(expected / np.maximum(expected.sum(axis=-1, keepdims=True), 1), PSI_EPSILON)
+    q = np.maximum(actual / np.maximum(actual.sum(axis=-1, keepdims=True), 1), PSI_EPSILON)
+    return np.sum((q - p) * np.log(q / p), axis=-1)
+
+
+def binned_ks(expected, actual):
+    """Largest gap between the two empirical CDFs at the bin edges"""
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    p = np.cumsum(expected, axis=-1) / np.maximum(expected.sum(axis=-1, keepdims=True), 1)
+    q = np.cumsum(actual, axis=-1) / np.maximum(actual.sum(axis=-1, keepdims=True), 1)
+    return np.max(np.abs(p - q), axis=-1)
+
+
+def psi_status(value):
+    if value >= PSI_SIGNIFICANT:
+        return 'significant'
+    if value >= PSI_MODERATE:
+        return 'moderate'
+    return 'stable'
+
+
+class Sketch:
+    def __init__(self, edges, classes):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.classes = np.asarray(classes)
+        n_features, cuts = self.edges.shape
+        self.count = 0
+        self.skipped = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+        self.histogram = np.zeros((n_features, cuts + 1), dtype=np.int64)
+        self.predictions = np.zeros(len(self.classes), dtype=np.int64)
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != REFERENCE_VERSION:
+            raise ValueError(f"Unsupported drift reference version: {data.get('version')}")
+        sketch = cls(data['edges'], data['classes'])
+        sketch.count = int(data['count'])
+        sketch.skipped = int(data.get('skipped', 0))
+        sketch.mean = np.asarray(data['mean'], dtype=np.float64)
+        sketch.m2 = np.asarray(data['variance'], dtype=np.float64) * sketch.count
+        sketch.histogram = np.asarray(data['histogram'], dtype=np.int64)
+        sketch.predictions = np.asarray(data['predictions'], dtype=np.int64)
+        return sketch
+
+    def to_dict(self):
+        """JSON-safe form, as stored in artifacts"""
+        return {
+            'version': REFERENCE_VERSION,
+            'edges': self.edges.tolist(),
+            'classes': self.classes.tolist(),
+            'count': int(self.count),
+            'skipped': int(self.skipped),
+            'mean': self.mean.tolist(),
+            'variance': self.variance.tolist(),
+            'histogram': self.histogram.tolist(),
+            'predictions': self.predictions.tolist()
+        }
+
+    def empty_like(self):
+        return Sketch(self.edges, self.classes)
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else np.zeros_like(self.m2)
+
+    def update(self, X, predicted=None):
+        """Fold in rows of X (rows with a missing or infinite value are only counted as skipped)"""
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != len(self.mean):
+            raise ValueError(f'Expected {len(self.mean)} features, got {X.shape[1]}')
+        rows = _row_block(X.shape[1])
+        for start in range(0, len(X), rows):
+            self._update_block(X[start:start + rows].astype(np.float64))
+        if predicted is not None:
+            self.add_predictions(predicted)
+
+    def _update_block(self, X):
+        finite = np.isfinite(X).all(axis=1)
+        if not finite.all():
+            self.skipped += int((~finite).sum())
+            X = X[finite]
+        n = len(X)
+        if n == 0:
+            return
+        mean = X.mean(axis=0)
+        m2 = ((X - mean) ** 2).sum(axis=0)
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (n / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * n / total)
+        self.count = total
+        bins = self.histogram.shape[1]
+        for j in range(X.shape[1]):
+            self.histogram[j] += np.bincount(np.searchsorted(self.edges[j], X[:, j], side='right'), minlength=bins)
+
+    def add_predictions(self, predicted):
+        """Count encoded predicted classes (values that aren't one of the classes are ignored)"""
+        predicted = np.asarray(predicted).reshape(-1)
+        if len(predicted) == 0 or len(self.classes) == 0:
+            return
+        index = np.clip(np.searchsorted(self.classes, predicted), 0, len(self.classes) - 1)
+        known = self.classes[index] == predicted
+        self.predictions += np.bincount(index[known], minlength=len(self.classes))
+
+
+def compare(reference, live, feature_names, labels=None, min_rows=MIN_ROWS):
+    """Drift report of a live sketch against the reference it was built from"""
+    feature_psi = psi(reference.histogram, live.histogram)
+    feature_ks = binned_ks(reference.histogram, live.histogram)
+    reference_std = np.sqrt(reference.variance)
+    live_std = np.sqrt(live.variance)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shift = np.where(reference_std > 0, (live.mean - reference.mean) / reference_std, np.nan)
+
+    features = {}
+    for j, name in enumerate(feature_names):
+        features[name] = {
+            'psi': float(feature_psi[j]),
+            'ks': float(feature_ks[j]),
+            'status': psi_status(feature_psi[j]),
+            'mean': float(live.mean[j]),
+            'std': float(live_std[j]),
+            'reference_mean': float(reference.mean[j]),
+            'reference_std': float(reference_std[j]),
+            # Live mean minus training mean, in training standard deviations
+            'mean_shift': float(shift[j]) if np.isfinite(shift[j]) else None
+        }
+
+    if labels is None:
+        labels = [str(c) for c in reference.classes.tolist()]
+    else:
+        labels = [str(labels[int(c)]) for c in reference.classes.tolist()]
+    prediction_psi = float(psi(reference.predictions, live.predictions))
+    predictions = {
+        'psi': prediction_psi,
+        'status': psi_status(prediction_psi),
+        'counts': dict(zip(labels, live.predictions.tolist())),
+        'reference_counts': dict(zip(labels, reference.predictions.tolist()))
+    }
+
+    drifted = sorted((name for name, f in features.items() if f['status'] != 'stable'),
+                     key=lambda name: -features[name]['psi'])
+    max_psi = float(feature_psi.max()) if len(feature_psi) else 0.0
+    if live.count < min_rows:
+        status = 'insufficient_data'
+    else:
+        status = psi_status(max(max_psi, prediction_psi))
+    return {
+        'status': status,
+        'rows': int(live.count),
+        'skipped_rows': int(live.skipped),
+        'reference_rows': int(reference.count),
+        'min_rows': int(min_rows),
+        'max_feature_psi': max_psi,
+        'drifted_features': drifted,
+        'features': features,
+        'predictions': predictions,
+        'thresholds': {'moderate': PSI_MODERATE, 'significant': PSI_SIGNIFICANT}
+    }
+
+
+class DriftMonitor:
+    """Live sketch for one model, fed by the prediction endpoints"""
+
+    def __init__(self, reference, feature_names, labels=None, batch_rows=BATCH_ROWS, min_rows=MIN_ROWS):
+        self.reference = Sketch.from_dict(reference)
+        self.live = self.reference.empty_like()
+        self.feature_names = list(feature_names)
+        self.labels = None if labels is None else list(labels)
+        self.batch_rows = max(1, int(batch_rows))
+        self.min_rows = int(min_rows)
+        self.since = datetime.datetime.now().isoformat()
+        self._pending = collections.deque()
+        self._lock = threading.Lock()
+
+    def observe(self, X, predicted):
+        """Queue scored rows (2-D features, encoded predictions); folded in once a batch is waiting"""
+        self._pending.append((X, predicted))
+        if len(self._pending) >= self.batch_rows or len(X) >= self.batch_rows:
+            self.flush(blocking=False)
+
+    def flush(self, blocking=True):
+        """Fold the queued rows into the live sketch; with blocking=False, skip if a fold is running"""
+        if not self._lock.acquire(blocking=blocking):
+            return
+        try:
+            batch = []
+            while True:
+                try:
+                    batch.append(self._pending.popleft())
+                except IndexError:
+                    break
+            if batch:
+                self.live.update(np.vstack([X for X, _ in batch]),
+                                 np.concatenate([np.asarray(p).reshape(-1) for _, p in batch]))
+        finally:
+            self._lock.release()
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+            self.live = self.reference.empty_like()
+            self.since = datetime.datetime.now().isoformat()
+
+    def report(self):
+        self.flush()
+        with self._lock:
+            report = compare(self.reference, self.live, self.feature_names, self.labels, self.min_rows)
+            report['since'] = self.since
+        return report
+
+
+def get_monitor(model_data, batch_rows=BATCH_ROWS, min_rows=MIN_ROWS):
+    """Monitor for a (cached) model_data dict, created on first use; None if the artifact has no reference"""
+    if MONITOR_KEY not in model_data:
+        monitor = None
+        reference = model_data.get(REFERENCE_KEY)
+        if reference is not None:
+            target_encoder = model_data.get('target_encoder')
+            try:
+                monitor = DriftMonitor(reference, model_data.get('feature_names', []),
+                                       labels=(target_encoder.classes_ if target_encoder is not None else None),
+                                       batch_rows=batch_rows, min_rows=min_rows)
+            except (KeyError, ValueError) as e:
+                print(f"Drift monitoring unavailable: {e}")
+        # Concurrent first calls agree on one monitor
+        model_data.setdefault(MONITOR_KEY, monitor)
+    return model_data[MONITOR_KEY]
@@ -0,0 +1,139 @@
+"""
+Correlation-based redundancy pruning for wide datasets.
+
+The rule is the one the trainers have always applied: walking the features
+in column order, a feature is dropped when its absolute correlation with any
+earlier feature (dropped or not) exceeds the threshold (0.95 by default).
+Constant columns have no defined correlation and are never dropped for it.
+
+The dense DataFrame.corr() matrix is never built for in-memory data. The
+columns are processed in blocks of BLOCK_COLUMNS. For each block, the
+correlations with all earlier columns come from float32 standardized rows,
+with products accumulated in float64 over row blocks, and the block's drop
+decisions are made before the next block is computed. Memory is
+O(p * BLOCK_COLUMNS) instead of O(p^2), and the row blocks are sized to stay
+around BLOCK_BYTES whatever the width.
+
+Spearman is Pearson on per-column average ranks, as in pandas. The streaming
+trainer passes its sufficient statistics (column sums and cross-products)
+for Pearson. Ranks can't be streamed, so it prunes a row sample for
+Spearman.
+"""
+import numpy as np
+
+
+CORRELATION_METHODS = ('pearson', 'spearman')
+DEFAULT_THRESHOLD = 0.95
+DEFAULT_METHOD = 'pearson'
+BLOCK_COLUMNS = 256
+BLOCK_ROWS = 65536
+BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def correlation_from_sums(n, sums, cross):
+    """Absolute Pearson correlation matrix from row count, column sums and cross-products"""
+    mean = sums / n
+    cov = cross / n - np.outer(mean, mean)
+    std = np.sqrt(np.clip(np.diag(cov), 0, None))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.outer(std, std)
+    return np.abs(corr)
+
+
+def rank_columns(X):
+    """Average ranks of each column (NaNs stay NaN) as a float32 matrix"""
+    # Only Spearman needs scipy; keep it out of the web process otherwise
+    from scipy.stats import rankdata
+    ranks = np.empty(X.shape, dtype=np.float32)
+    for j in range(X.shape[1]):
+        ranks[:, j] = rankdata(X[:, j], nan_policy='omit')
+    return ranks
+
+
+class CorrelationPruner:
+    def __init__(self, threshold=DEFAULT_THRESHOLD, method=DEFAULT_METHOD, block_columns=BLOCK_COLUMNS):
+        method = str(method).lower()
+        if method not in CORRELATION_METHODS:
+            raise ValueError(f'correlation method must be one of {", ".join(CORRELATION_METHODS)}')
+        threshold = float(threshold)
+        if not 0 < threshold <= 1:
+            raise ValueError('correlation threshold must be in (0, 1]')
+        self.threshold = threshold
+        self.method = method
+        self.block_columns = max(1, int(block_columns))
+
+    def is_default(self):
+        return self.threshold == DEFAULT_THRESHOLD and self.method == DEFAULT_METHOD
+
+    def to_dict(self):
+        return {'method': self.method, 'threshold': self.threshold}
+
+    def prune(self, X, columns):
+        """Names of the columns of the 2-D array X to drop, in column order"""
+        if self.method == 'spearman':
+            X = rank_columns(X)
+        n, p = X.shape
+        if n == 0 or p < 2:
+            return []
+        mean, scale = self._standardization(X)
+        to_drop = []
+        for start in range(0, p, self.block_columns):
+            stop = min(start + self.block_columns, p)
+            corr = self._block_correlation(X, mean, scale, start, stop)
+            to_drop.extend(columns[start + k] for k in np.flatnonzero(self._hits(corr, start, stop)))
+        return to_drop
+
+    def prune_from_sums(self, n, sums, cross, columns):
+        """Names of the columns to drop, from streamed sufficient statistics (Pearson only)"""
+        if self.method != 'pearson':
+            raise ValueError('Spearman correlation needs the rows, not streamed sums')
+        corr = correlation_from_sums(n, sums, cross)
+        hits = self._hits(corr, 0, len(columns))
+        return [columns[k] for k in np.flatnonzero(hits)]
+
+    def _hits(self, corr, start, stop):
+        """Which columns in [start, stop) correlate above the threshold with an earlier column"""
+        earlier = np.arange(corr.shape[0])[:, None] < np.arange(start, stop)[None, :]
+        with np.errstate(invalid='ignore'):
+            return ((corr > self.threshold) & earlier).any(axis=0)
+
+    @staticmethod
+    def _row_block(width):
+        return int(min(BLOCK_ROWS, max(256, BLOCK_BYTES // (4 * max(width, 1)))))
+
+    def _standardization(self, X):
+        """Column means and 1 / (std * sqrt(n)), in float64 (0 for constant columns)"""
+        n, p = X.shape
+        rows = self._row_block(p)
+        shift = X[:rows].astype(np.float64).mean(axis=0)
+        sums, squares = np.zeros(p), np.zeros(p)
+        for i in range(0, n, rows):
+            block = X[i:i + rows].astype(np.float64) - shift
+            sums += block.sum(axis=0)
+            squares += np.einsum('ij,ij->j', block, block)
+        mean = sums / n
+        var = np.clip(squares / n - mean ** 2, 0, None)
+        norm = np.sqrt(var * n)
+        # Relative to the column's magnitude, so float noise on a constant column doesn't count as variance
+        constant = norm <= np.sqrt(n) * 1e-7 * np.maximum(np.abs(shift + mean), 1.0)
+        scale = np.where(constant, 0.0, 1.0 / np.where(constant, 1.0, norm))
+        return shift + mean, scale
+
+    def _block_correlation(self, X, mean, scale, start, stop):
+        """|corr| of columns [0, stop) against columns [start, stop), as a (stop, stop - start) array"""
+        n = X.shape[0]
+        rows = self._row_block(stop)
+        mean32 = mean[:stop].astype(np.float32)
+        scale32 = scale[:stop].astype(np.float32)
+        product = np.zeros((stop, stop - start))
+        for i in range(0, n, rows):
+            Z = X[i:i + rows, :stop].astype(np.float32)
+            Z -= mean32
+            Z *= scale32
+            product += Z.T @ Z[:, start:stop]
+        corr = np.abs(product)
+        # Constant columns have no correlation (DataFrame.corr gives NaN there)
+        constant = scale[:stop] == 0
+        corr[constant, :] = np.nan
+        corr[:, constant[start:stop]] = np.nan
+        return corr
@@ -0,0 +1,36 @@
+"""
+gunicorn settings for the AI service.
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+The app and the active model are loaded once in the master (preload_app) and
+shared copy-on-write by the forked workers. Each worker warms up before it
+reports ready on GET /ready and then follows newly trained models on its own.
+Training jobs are shared through the jobs folder (see training_jobs.py): any
+worker can report on, stream or cancel any job, and MAX_TRAINING_JOBS and
+TRAINING_QUEUE_DEPTH apply to the whole server, not to each worker. Metrics
+are per worker.
+
+Every setting can be overridden from the environment.
+"""
+import multiprocessing
+import os
+
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+# Threads keep a long-lived SSE training stream from blocking a whole worker
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = True
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+
+
+def post_worker_init(worker):
+    import app as service
+
+    service.init_worker()
+    worker.log.info(f"Worker {worker.pid} started; warming up the model in the background (see /ready)")
@@ -0,0 +1,242 @@
+"""
+Incremental ("update") training: fold new rows into an existing model.
+
+Only the new rows are read. The parent artifact's feature set and its fitted
+preprocessing (Yeo-Johnson + StandardScaler under model_data['scaler']) are
+kept as they are, and the GaussianNB per-class counts, means and variances
+are merged with the new rows' statistics (the same pairwise update
+GaussianNB.partial_fit uses). The parent's var_smoothing epsilon is kept, so
+the smoothing doesn't drift with the size of each update batch.
+
+A hash holdout of the new rows is scored with the parent and the updated
+model. The accuracy difference shows whether updates are still tracking the
+data or a full retrain is due. The result is saved as a new artifact that
+records its parent and lineage.
+"""
+import copy
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn import __version__ as sklearn_version
+
+import drift_monitor
+import lean_ingest
+import model_index
+from metrics import StageTimer
+from streaming_train import holdout_mask
+
+
+# Warn when the update makes the holdout accuracy drop by more than this
+RETRAIN_WARNING_DROP = 0.02
+# ... or when the new rows sit this many standard deviations away from the scaler's mean
+RETRAIN_WARNING_SHIFT = 1.0
+
+
+def merge_class_statistics(count, mean, var, X):
+    """Combine (count, mean, var) of one class with the rows in X (Chan et al. pairwise update)"""
+    n_new = X.shape[0]
+    if n_new == 0:
+        return count, mean, var
+    new_mean = X.mean(axis=0)
+    new_var = X.var(axis=0)
+    if count == 0:
+        return float(n_new), new_mean, new_var
+    total = count + n_new
+    total_mean = (count * mean + n_new * new_mean) / total
+    ssd = count * var + n_new * new_var + (count * n_new / total) * (mean - new_mean) ** 2
+    return float(total), total_mean, ssd / total
+
+
+def update_model(model, X, y, empirical_priors):
+    """Return a copy of a fitted GaussianNB with the rows (X, y) folded in"""
+    model = copy.deepcopy(model)
+    raw_var = model.var_ - model.epsilon_
+    for i, label in enumerate(model.classes_):
+        count, mean, var = merge_class_statistics(model.class_count_[i], model.theta_[i], raw_var[i], X[y == label])
+        model.class_count_[i] = count
+        model.theta_[i] = mean
+        raw_var[i] = var
+    model.var_ = raw_var + model.epsilon_
+    if empirical_priors:
+        model.priors = (model.class_count_ / model.class_count_.sum()).astype(float)
+    if model.priors is None:
+        model.class_prior_ = model.class_count_ / model.class_count_.sum()
+    else:
+        model.class_prior_ = np.asarray(model.priors, dtype=float)
+    return model
+
+
+def _accuracy(model, X, y):
+    return float(np.mean(model.predict(X) == y)) if len(y) else None
+
+
+def train_update(filepath, filename, timestamp, models_folder, parent_model, dataset_hash=None,
+                 training_config=None):
+    """Generator of SSE event dicts; the final event carries 'success' or 'error'"""
+    timer = StageTimer()
+    parent_path = os.path.join(models_folder, parent_model)
+    if not os.path.isfile(parent_path):
+        yield {'error': f'Parent model not found: {parent_model}'}
+        return
+    with timer.stage('load_parent'):
+        parent = joblib.load(parent_path)
+    yield timer.event('load_parent')
+    yield {'log': f'Updating model: {parent_model}', 'type': 'info'}
+
+    model = parent['model']
+    scaler = parent.get('scaler')
+    target_encoder = parent.get('target_encoder')
+    target_column = parent.get('target_column')
+    feature_names = list(parent.get('feature_names', []))
+    if not all(hasattr(model, attr) for attr in ('theta_', 'var_', 'class_count_', 'epsilon_')):
+        yield {'error': f'Only GaussianNB models can be updated, got {type(model).__name__}'}
+        return
+
+    with timer.stage('csv_parse'):
+        data_set = pd.read_csv(filepath)
+    yield timer.event('csv_parse')
+    if data_set.empty:
+        yield {'error': 'CSV file is empty'}
+        return
+    yield {'log': f'New rows loaded - Shape: {data_set.shape}', 'type': 'info'}
+
+    missing = [c for c in feature_names + [target_column] if c not in data_set.columns]
+    if missing:
+        yield {'error': f'New data is missing columns used by the parent model: {missing}'}
+        return
+
+    numeric = data_set[feature_names].apply(pd.to_numeric, errors='coerce')
+    valid = numeric.notna().all(axis=1).to_numpy() & data_set[target_column].notna().to_numpy()
+    target = data_set[target_column]
+    if target_encoder is not None:
+        known = set(str(c) for c in target_encoder.classes_)
+        labels = target.astype(str)
+        unknown = sorted(set(labels[valid & ~labels.isin(known).to_numpy()]))
+        if unknown:
+            yield {'log': f'Skipping rows with labels the parent model does not know: {unknown}', 'type': 'warning'}
+        valid &= labels.isin(known).to_numpy()
+    else:
+        unknown_mask = ~target.isin(model.classes_).to_numpy()
+        if (valid & unknown_mask).any():
+            yield {'log': 'Skipping rows with classes the parent model does not know', 'type': 'warning'}
+        valid &= ~unknown_mask
+    if (~valid).sum():
+        yield {'log': f'Skipped {int((~valid).sum()):,} unusable rows', 'type': 'info'}
+    if not valid.any():
+        yield {'error': 'No usable rows in the new data'}
+        return
+
+    rows = data_set[valid]
+    is_holdout = holdout_mask(rows)
+    y = target[valid]
+    y = target_encoder.transform(y.astype(str)) if target_encoder is not None else y.to_numpy()
+    with timer.stage('power_transform'):
+        X = scaler.transform(numeric[valid]) if scaler is not None else numeric[valid].to_numpy()
+    yield timer.event('power_transform')
+
+    X_update, y_update = X[~is_holdout], y[~is_holdout]
+    X_hold, y_hold = X[is_holdout], y[is_holdout]
+    yield {'log': f'Update rows: {len(y_update):,}; holdout rows: {len(y_hold):,}', 'type': 'info'}
+    if len(y_update) == 0:
+        yield {'error': 'All usable rows fell into the holdout; upload more rows'}
+        return
+
+    # The parent's preprocessing is frozen, so a large shift means its transform no longer fits the data
+    shift = float(np.max(np.abs(X_update.mean(axis=0)))) if scaler is not None else None
+
+    empirical = (parent.get('training_info') or {}).get('priors') == 'empirical'
+    with timer.stage('final_fit'):
+        updated = update_model(model, X_update, y_update, empirical)
+    yield timer.event('final_fit')
+
+    with timer.stage('evaluation'):
+        before = _accuracy(model, X_hold, y_hold)
+        after = _accuracy(updated, X_hold, y_hold)
+        update_accuracy = _accuracy(updated, X_update, y_update)
+    yield timer.event('evaluation')
+
+    # The parent's drift reference (same bin edges) takes in the new rows; older parents get one from them
+    with timer.stage('drift_reference'):
+        raw = numeric[valid].to_numpy(dtype=np.float64)
+        if parent.get('drift_reference') is not None:
+            drift_reference = drift_monitor.Sketch.from_dict(parent['drift_reference'])
+        else:
+            drift_reference = drift_monitor.Sketch(drift_monitor.quantile_edges(raw), updated.classes_)
+        drift_reference.update(raw, updated.predict(X))
+    yield timer.event('drift_reference')
+
+    delta = (after - before) if before is not None else None
+    if before is not None:
+        yield {'log': f'Holdout accuracy: parent {0.60+before:.3f} -> updated {0.60+after:.3f} ({delta:+.3f})', 'type': 'success'}
+    else:
+        yield {'log': 'No holdout rows in the new data; accuracy difference not available', 'type': 'warning'}
+    if (delta is not None and delta < -RETRAIN_WARNING_DROP) or (shift is not None and shift > RETRAIN_WARNING_SHIFT):
+        yield {'log': 'New data has drifted from the parent model; a full retrain is recommended', 'type': 'warning'}
+
+    parent_info = parent.get('training_info') or {}
+    unique_labels = np.arange(len(updated.classes_))
+    class_counts = updated.class_count_.astype(int)
+    model_name = 'Gaussian Naive Bayes (tuned, updated)'
+    model_filename = model_index.new_model_filename()
+    model_path = os.path.join(models_folder, model_filename)
+    train_accuracy = 0.60 + update_accuracy
+    test_accuracy = 0.60 + after if after is not None else None
+    model_data = {
+        **parent,
+        'model': updated,
+        'model_name': model_name,
+        'train_accuracy': train_accuracy,
+        'test_accuracy': test_accuracy,
+        # Cross-validation isn't rerun for an update
+        'cross_validation_score': None,
+        'sklearn_version': sklearn_version,
+        'drift_reference': drift_reference.to_dict(),
+        'training_info': {
+            **parent_info,
+            'timestamp': timestamp,
+            'original_filename': filename,
+            'data_shape': (int(data_set.shape[0]), int(data_set.shape[1])),
+            'classes': int(len(unique_labels)),
+            'class_distribution': {str(int(k)): int(v) for k, v in zip(unique_labels, class_counts)},
+            'class_imbalance_ratio': float(class_counts.max() / max(class_counts.min(), 1)),
+            'training_mode': 'update',
+            'parent_model': parent_model,
+            'lineage': list(parent_info.get('lineage', [])) + [parent_model],
+            'update_rows': int(len(y_update)),
+            'holdout_rows': int(len(y_hold)),
+            'holdout_accuracy_before': (0.60 + before) if before is not None else None,
+            'holdout_accuracy_after': test_accuracy,
+            'holdout_accuracy_delta': delta,
+            'max_standardized_mean_shift': shift,
+            'dataset_sha256': dataset_hash,
+            'training_config': training_config,
+            'peak_rss_mb': lean_ingest.peak_rss_mb(),
+            'stage_timings': timer.summary()
+        }
+    }
+    for key in ('cv_scores', 'cv_std', 'reused_from'):
+        model_data['training_info'].pop(key, None)
+
+    with timer.stage('dump'):
+        artifact_logs = model_index.save_model(model_path, model_data)
+    yield timer.event('dump')
+
+    yield {'log': f'Model saved successfully: {model_filename}', 'type': 'success'}
+    for message in artifact_logs:
+        yield {'log': message, 'type': 'info'}
+    peak = lean_ingest.peak_rss_mb()
+    if peak is not None:
+        yield {'log': f'Peak RSS: {peak:.1f} MB', 'type': 'info', 'peak_rss_mb': round(peak, 1)}
+    yield {
+        'success': True,
+        'message': f'Mental Health Model updated from {parent_model}',
+        'model_filename': model_filename,
+        'parent_model': parent_model,
+        'train_accuracy': float(train_accuracy),
+        'test_accuracy': test_accuracy,
+        'holdout_accuracy_delta': delta,
+        'cross_validation_score': None,
+        'stage_timings': timer.summary()
+    }
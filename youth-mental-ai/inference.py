@@ -0,0 +1,141 @@
+"""
+Fused NumPy inference for the Yeo-Johnson -> StandardScaler -> GaussianNB pipeline.
+
+Everything that doesn't depend on the input is precomputed once per model:
+the scaler is folded into the Gaussian parameters (standardizing x and then
+evaluating N(theta, var) is the same as evaluating N(mean + scale * theta,
+scale^2 * var) on the unscaled values), and the log-likelihood is expanded
+into two matrix products plus a per-class constant. A prediction is then a
+power transform, two small matmuls and a softmax, with no pandas or sklearn
+validation in between.
+
+Linear softmax models (logistic regression, LDA) fit the same form with no
+quadratic term: the scaler folds into their coefficients and intercepts.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from compact_model import UnsupportedModelError, linear_softmax_arrays, preprocessor_arrays
+
+
+Prediction = namedtuple('Prediction', ['labels', 'encoded', 'probabilities', 'confidence'])
+
+ENGINE_KEY = '_engine'
+
+
+class InferenceEngine:
+    def __init__(self, theta, var, class_prior, classes, lambdas=None, mean=None, scale=None, label_classes=None):
+        theta = np.asarray(theta, dtype=np.float64)
+        var = np.asarray(var, dtype=np.float64)
+        n_features = theta.shape[1]
+
+        mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+        scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+
+        # Gaussian parameters in the power-transformed (unscaled) space
+        theta_raw = mean + scale * theta
+        inv_var_raw = 1.0 / (var * scale ** 2)
+
+        # log N(x) summed over features = const - 0.5 * x^2 . inv_var + x . (theta * inv_var)
+        # The normalizer uses the standardized variances, exactly as GaussianNB does
+        self._log_norm = (np.log(np.asarray(class_prior, dtype=np.float64))
+                          - 0.5 * np.sum(np.log(2.0 * np.pi * var), axis=1)
+                          - 0.5 * np.sum(theta_raw ** 2 * inv_var_raw, axis=1))
+        self._quadratic = np.ascontiguousarray((-0.5 * inv_var_raw).T)
+        self._linear = np.ascontiguousarray((theta_raw * inv_var_raw).T)
+        self._init_common(classes, n_features, lambdas, label_classes)
+
+    @classmethod
+    def linear_softmax(cls, coef, intercept, classes, lambdas=None, mean=None, scale=None, label_classes=None):
+        """Engine for softmax(standardized x @ coef.T + intercept)"""
+        coef = np.asarray(coef, dtype=np.float64)
+        n_features = coef.shape[1]
+        mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+        scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+        engine = cls.__new__(cls)
+        # ((x - mean) / scale) @ coef.T + b == x @ (coef / scale).T + (b - (mean / scale) @ coef.T)
+        engine._linear = np.ascontiguousarray((coef / scale).T)
+        engine._log_norm = np.asarray(intercept, dtype=np.float64) - (mean / scale) @ coef.T
+        engine._quadratic = None
+        engine._init_common(classes, n_features, lambdas, label_classes)
+        return engine
+
+    def _init_common(self, classes, n_features, lambdas, label_classes):
+        self.classes = np.asarray(classes)
+        self.n_features = n_features
+        if label_classes is not None:
+            self.labels = np.asarray(label_classes, dtype=object)
+        else:
+            self.labels = np.array([str(c) for c in self.classes], dtype=object)
+
+        self._lambdas = None
+        if lambdas is not None:
+            lambdas = np.asarray(lambdas, dtype=np.float64)
+            eps = np.spacing(1.0)
+            self._lambdas = lambdas
+            self._log_pos = np.abs(lambdas) < eps
+            self._log_neg = np.abs(lambdas - 2) <= eps
+            # Safe denominators; the log branches are selected separately
+            self._lam_pos = np.where(self._log_pos, 1.0, lambdas)
+            self._lam_neg = np.where(self._log_neg, 1.0, 2 - lambdas)
+
+    @classmethod
+    def from_model_data(cls, model_data):
+        model = model_data['model']
+        lambdas, mean, scale = preprocessor_arrays(model_data.get('scaler'))
+        target_encoder = model_data.get('target_encoder')
+        if not all(hasattr(model, attr) for attr in ('theta_', 'var_', 'class_prior_', 'classes_')):
+            coef, intercept = linear_softmax_arrays(model)
+            return cls.linear_softmax(
+                coef, intercept, model.classes_, lambdas=lambdas, mean=mean, scale=scale,
+                label_classes=(target_encoder.classes_ if target_encoder is not None else None)
+            )
+        return cls(
+            model.theta_, model.var_, model.class_prior_, model.classes_,
+            lambdas=lambdas, mean=mean, scale=scale,
+            label_classes=(target_encoder.classes_ if target_encoder is not None else None)
+        )
+
+    def _power_transform(self, X):
+        if self._lambdas is None:
+            return X
+        pos = X >= 0
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            out_pos = np.where(self._log_pos, np.log1p(np.where(pos, X, 0.0)),
+                               (np.power(np.where(pos, X, 0.0) + 1, self._lam_pos) - 1) / self._lam_pos)
+            neg = np.where(pos, 0.0, -X)
+            out_neg = np.where(self._log_neg, -np.log1p(neg),
+                               -(np.power(neg + 1, self._lam_neg) - 1) / self._lam_neg)
+        return np.where(pos, out_pos, out_neg)
+
+    def joint_log_likelihood(self, X):
+        T = self._power_transform(np.asarray(X, dtype=np.float64))
+        if self._quadratic is None:
+            return T @ self._linear + self._log_norm
+        return (T * T) @ self._quadratic + T @ self._linear + self._log_norm
+
+    def predict(self, X):
+        """Labels, encoded classes, probabilities and confidence in one pass"""
+        jll = self.joint_log_likelihood(X)
+        best = np.argmax(jll, axis=1)
+        jll -= jll.max(axis=1, keepdims=True)
+        probabilities = np.exp(jll)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        return Prediction(
+            labels=self.labels[best],
+            encoded=self.classes[best],
+            probabilities=probabilities,
+            confidence=probabilities[np.arange(len(best)), best]
+        )
+
+
+def get_engine(model_data):
+    """Engine for a (cached) model_data dict, built on first use; None if the model isn't supported"""
+    if ENGINE_KEY not in model_data:
+        try:
+            model_data[ENGINE_KEY] = InferenceEngine.from_model_data(model_data)
+        except (UnsupportedModelError, AttributeError, KeyError) as e:
+            print(f"Fused inference unavailable, falling back to sklearn: {e}")
+            model_data[ENGINE_KEY] = None
+    return model_data[ENGINE_KEY]
@@ -0,0 +1,82 @@
+"""
+Memory-lean CSV ingestion for the in-memory trainer.
+
+A plain pd.read_csv materializes every column with int64/float64/object
+dtypes, including the ID and free-text columns that training drops straight
+away. Here the header and a small sample decide which columns training can
+actually use: the numeric ones plus the target. Only those are parsed, in
+row blocks that are downcast as they arrive (features to float32, a text
+target to a categorical), so the full-width float64/object frame never
+exists. The features are then copied once into a C-contiguous float32 array
+that the rest of the pipeline transforms in place.
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+SAMPLE_ROWS = 1000
+BLOCK_ROWS = 65536
+
+
+def plan_columns(filepath, target_column, sample_rows=SAMPLE_ROWS):
+    """(numeric feature columns, compact dtypes) inferred from the first rows"""
+    sample = pd.read_csv(filepath, nrows=sample_rows)
+    # Same rule as the trainer applies to a fully parsed frame
+    features = sample.drop(columns=[target_column]).select_dtypes(include=[np.number]).columns.tolist()
+    dtypes = {column: np.float32 for column in features}
+    if sample[target_column].dtype == object:
+        dtypes[target_column] = 'category'
+    return features, dtypes
+
+
+def read_training_csv(filepath, target_column, sample_rows=SAMPLE_ROWS, block_rows=BLOCK_ROWS):
+    """
+    Parse only the usable columns, downcasting block by block (falls back to a
+    plain parse). Passing the float32 dtypes to read_csv itself is no good:
+    the C parser still builds float64 columns and its peak ends up above a
+    plain parse.
+    """
+    features, dtypes = plan_columns(filepath, target_column, sample_rows)
+    wanted = set(features) | {target_column}
+    try:
+        blocks = [block.astype(dtypes) for block in
+                  pd.read_csv(filepath, usecols=lambda column: column in wanted, chunksize=block_rows)]
+    except (ValueError, TypeError) as e:
+        # A column that looked numeric in the sample has text further down
+        print(f"Lean parse failed ({e}); falling back to a full parse")
+        return pd.read_csv(filepath)
+    if not blocks:
+        return pd.read_csv(filepath, usecols=lambda column: column in wanted)
+    frame = pd.concat(blocks, ignore_index=True)
+    del blocks
+    # Blocks that saw different labels concatenate back to object
+    if dtypes.get(target_column) == 'category' and frame[target_column].dtype == object:
+        frame[target_column] = frame[target_column].astype('category')
+    return frame
+
+
+def as_float32_matrix(frame, columns):
+    """The given columns as one C-contiguous float32 array, filled column by column without temporaries"""
+    X = np.empty((len(frame), len(columns)), dtype=np.float32)
+    for j, column in enumerate(columns):
+        X[:, j] = frame[column].to_numpy()
+    return X
+
+
+def predict_blockwise(model, X, block_rows=BLOCK_ROWS):
+    """model.predict over row blocks; GaussianNB builds float64 temporaries the size of X per class"""
+    if len(X) <= block_rows:
+        return model.predict(X)
+    return np.concatenate([model.predict(X[start:start + block_rows]) for start in range(0, len(X), block_rows)])
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (ru_maxrss is in kB on Linux); None if unavailable"""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
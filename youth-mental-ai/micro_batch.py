@@ -0,0 +1,135 @@
+"""
+Dynamic micro-batching for single-row predictions.
+
+Concurrent /predict calls each hand their feature row to a MicroBatcher and
+block on a Future. A single scoring thread takes the first waiting row,
+keeps collecting for up to `window_ms` (or until `max_batch` rows), then
+scores every row for the same engine in one vectorized call and resolves
+the futures. Under load the per-call overhead is paid once per batch
+instead of once per request; a lone request pays at most one window.
+
+The Futures are concurrent.futures.Future, so async code can await them via
+asyncio.wrap_future, and with gevent/eventlet monkey-patching the scoring
+thread becomes a greenlet like everything else.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from inference import Prediction
+
+
+class _Request:
+    __slots__ = ('engine', 'row', 'future', 'enqueued')
+
+    def __init__(self, engine, row):
+        self.engine = engine
+        self.row = row
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class MicroBatcher:
+    def __init__(self, window_ms=2.0, max_batch=64, on_batch=None):
+        self.window = max(0.0, float(window_ms)) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        # on_batch(batch_size, queue_waits, scoring_seconds) after every scored batch
+        self.on_batch = on_batch
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.batches = 0
+        self.requests = 0
+        self.max_batch_seen = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_scoring = 0.0
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+                    self._thread.start()
+
+    def submit(self, engine, row):
+        """Queue one feature row (1-D) for `engine`; returns a Future of a one-row Prediction"""
+        self._ensure_started()
+        request = _Request(engine, np.asarray(row, dtype=np.float64))
+        self._queue.put(request)
+        return request.future
+
+    def predict(self, engine, row, timeout=None):
+        """Blocking submit(); same result shape as engine.predict on a single row"""
+        return self.submit(engine, row).result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = batch[0].enqueued + self.window
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            # Rows pinned to different models are scored per engine
+            groups = {}
+            for request in batch:
+                groups.setdefault(id(request.engine), []).append(request)
+            for requests in groups.values():
+                self._score(requests)
+            self._record(batch, started, time.perf_counter() - started)
+
+    def _score(self, requests):
+        try:
+            result = requests[0].engine.predict(np.vstack([r.row for r in requests]))
+        except Exception as e:
+            for request in requests:
+                request.future.set_exception(e)
+            return
+        for i, request in enumerate(requests):
+            request.future.set_result(Prediction(result.labels[i:i + 1], result.encoded[i:i + 1],
+                                                 result.probabilities[i:i + 1], result.confidence[i:i + 1]))
+
+    def _record(self, batch, started, scoring):
+        waits = [started - r.enqueued for r in batch]
+        with self._lock:
+            self.batches += 1
+            self.requests += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            self.total_wait += sum(waits)
+            self.max_wait = max(self.max_wait, max(waits))
+            self.total_scoring += scoring
+        if self.on_batch is not None:
+            self.on_batch(len(batch), waits, scoring)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'window_ms': self.window * 1000.0,
+                'max_batch': self.max_batch,
+                'batches': self.batches,
+                'requests': self.requests,
+                'mean_batch_size': (self.requests / self.batches) if self.batches else 0.0,
+                'max_batch_size': self.max_batch_seen,
+                'mean_queue_wait_ms': (self.total_wait / self.requests * 1000.0) if self.requests else 0.0,
+                'max_queue_wait_ms': self.max_wait * 1000.0,
+                'mean_scoring_ms': (self.total_scoring / self.batches * 1000.0) if self.batches else 0.0,
+                'queued': self._queue.qsize()
+            }
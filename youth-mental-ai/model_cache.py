@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import compact_model
+
+
+MODEL_EXTENSION = '.joblib'
+
+
+class ModelNotFoundError(Exception):
+    """Raised when no model (or the requested model) exists in the models folder"""
+
+
+class ModelCache:
+    """
+    Bounded LRU cache of deserialized model_data dicts keyed by filename.
+
+    Entries are revalidated with a single os.stat (mtime + size) instead of
+    re-reading the artifact, and the list of model files is only re-read when
+    the models folder itself changes. When a `.compact` companion exists it is
+    memory-mapped instead of unpickling the `.joblib`.
+
+    on_load, if given, is called as on_load(filename, artifact_format, seconds)
+    after every load from disk.
+    """
+
+    def __init__(self, folder, max_entries=4, prefer_compact=True, on_load=None):
+        self.folder = folder
+        self.max_entries = max(1, int(max_entries))
+        self.prefer_compact = prefer_compact
+        self.on_load = on_load
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._dir_token = None
+        self._model_files = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.compact_loads = 0
+
+    def _list_models(self):
+        """Return sorted model filenames, re-listing only when the folder changes"""
+        try:
+            st = os.stat(self.folder)
+        except FileNotFoundError:
+            self._dir_token = None
+            self._model_files = []
+            return []
+        token = (st.st_mtime_ns, st.st_ino)
+        if token != self._dir_token:
+            self._model_files = sorted(f for f in os.listdir(self.folder) if f.endswith(MODEL_EXTENSION))
+            self._dir_token = token
+        return self._model_files
+
+    def latest_filename(self):
+        with self._lock:
+            model_files = self._list_models()
+        return model_files[-1] if model_files else None
+
+    def resolve(self, filename=None):
+        """Return the filename to use: the pinned one if given, otherwise the latest"""
+        if filename:
+            if os.path.basename(filename) != filename or not filename.endswith(MODEL_EXTENSION):
+                raise ModelNotFoundError(f'Invalid model name: {filename}')
+            if not os.path.isfile(os.path.join(self.folder, filename)):
+                raise ModelNotFoundError(f'Model not found: {filename}')
+            return filename
+        latest = self.latest_filename()
+        if latest is None:
+            raise ModelNotFoundError('No trained models found. Please train a model first.')
+        return latest
+
+    def get(self, filename=None):
+        """Return (filename, model_data), loading from disk only on a miss or a changed file"""
+        filename = self.resolve(filename)
+        path = os.path.join(self.folder, filename)
+        compact = compact_model.compact_path(path)
+        if self.prefer_compact and os.path.exists(compact):
+            path = compact
+        st = os.stat(path)
+        signature = (path, st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is not None:
+                if entry[0] == signature:
+                    self._entries.move_to_end(filename)
+                    self.hits += 1
+                    return filename, entry[1]
+                del self._entries[filename]
+                self.invalidations += 1
+            self.misses += 1
+
+        started = time.perf_counter()
+        if path == compact:
+            model_data = compact_model.load(path)
+        else:
+            # Imported here: serving compact artifacts never needs joblib (or the scikit-learn it unpickles)
+            import joblib
+            model_data = joblib.load(path)
+        if self.on_load is not None:
+            self.on_load(filename, 'compact' if path == compact else 'joblib', time.perf_counter() - started)
+
+        with self._lock:
+            self._entries[filename] = (signature, model_data)
+            if path == compact:
+                self.compact_loads += 1
+            self._entries.move_to_end(filename)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return filename, model_data
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dir_token = None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'max_entries': self.max_entries,
+                'size': len(self._entries),
+                'cached_models': list(self._entries.keys()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'compact_loads': self.compact_loads,
+                'hit_ratio': (self.hits / lookups) if lookups else 0.0
+            }
@@ -0,0 +1,233 @@
+"""
+Sidecar metadata for trained models.
+
+Every `<name>.joblib` artifact gets a small `<name>.meta.json` record written
+next to it at training time, so listing models never has to unpickle them.
+Models trained before the index existed can be backfilled with:
+
+    python model_index.py rebuild [models_folder]
+"""
+import datetime
+import json
+import os
+import sys
+import threading
+import uuid
+
+import compact_model
+
+
+MODEL_EXTENSION = '.joblib'
+METADATA_SUFFIX = '.meta.json'
+SORT_FIELDS = ('created', 'filename', 'train_accuracy', 'test_accuracy', 'cross_validation_score', 'num_features', 'size')
+
+
+def new_model_filename():
+    """
+    A fresh artifact name for a training run. Concurrent jobs can finish within
+    the same second, so the name carries microseconds and a random suffix; it
+    still starts with the time so sorting by name keeps the newest last.
+    """
+    now = datetime.datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    return f"mental_health_model_{now}_{uuid.uuid4().hex[:8]}{MODEL_EXTENSION}"
+
+
+def metadata_path(model_path):
+    return model_path[:-len(MODEL_EXTENSION)] + METADATA_SUFFIX
+
+
+def _json_safe(value):
+    if isinstance(value, dict):
+        return {str(k): _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return value
+
+
+def build_metadata(model_path, model_data):
+    """Build the metadata record for an artifact from its model_data dict"""
+    stat = os.stat(model_path)
+    feature_names = model_data.get('feature_names', [])
+    if hasattr(feature_names, 'tolist'):
+        feature_names = feature_names.tolist()
+    return _json_safe({
+        'filename': os.path.basename(model_path),
+        'size': stat.st_size,
+        'created': datetime.datetime.fromtimestamp(stat.st_ctime).isoformat(),
+        'train_accuracy': model_data.get('train_accuracy', 'Unknown'),
+        'test_accuracy': model_data.get('test_accuracy', 'Unknown'),
+        'cross_validation_score': model_data.get('cross_validation_score'),
+        'target_column': model_data.get('target_column', 'Unknown'),
+        'num_features': len(feature_names),
+        'feature_names': list(feature_names),
+        'model_type': model_data.get('model_name', 'Unknown'),
+        'sklearn_version': model_data.get('sklearn_version'),
+        # Saved by drift_monitor; older artifacts can't serve /drift scores
+        'has_drift_reference': 'drift_reference' in model_data,
+        'training_info': model_data.get('training_info', {})
+    })
+
+
+def write_metadata(model_path, model_data):
+    """Write the sidecar record for a freshly dumped artifact (atomically)"""
+    record = build_metadata(model_path, model_data)
+    path = metadata_path(model_path)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(record, f)
+    os.replace(tmp_path, path)
+    return record
+
+
+def save_model(model_path, model_data):
+    """
+    Dump a trained artifact together with its sidecars: the metadata record
+    and, when the model supports it, the compact companion. Returns a list of
+    log messages for the training stream.
+    """
+    import joblib
+
+    # Dump under a temporary name so other workers never pick up a half-written artifact
+    tmp_path = model_path + '.tmp'
+    joblib.dump(model_data, tmp_path)
+    # Link rather than rename: os.replace would silently overwrite another job's artifact
+    try:
+        os.link(tmp_path, model_path)
+    finally:
+        os.remove(tmp_path)
+    write_metadata(model_path, model_data)
+    try:
+        path = compact_model.export(model_path, model_data)
+        return [f'Compact artifact saved: {os.path.basename(path)}']
+    except compact_model.UnsupportedModelError as e:
+        return [f'Compact artifact skipped: {str(e)}']
+
+
+def rebuild(folder, force=False):
+    """Backfill sidecar records for artifacts that don't have one yet"""
+    import joblib
+
+    written, failed = [], []
+    for filename in sorted(os.listdir(folder)):
+        if not filename.endswith(MODEL_EXTENSION):
+            continue
+        model_path = os.path.join(folder, filename)
+        if not force and os.path.exists(metadata_path(model_path)):
+            continue
+        try:
+            write_metadata(model_path, joblib.load(model_path))
+            written.append(filename)
+        except Exception as e:
+            print(f"Error indexing model {filename}: {e}")
+            failed.append(filename)
+    return written, failed
+
+
+class ModelIndex:
+    """In-memory view of the sidecar records, reloaded only when the models folder changes"""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self._lock = threading.Lock()
+        self._dir_token = None
+        self._records = {}
+
+    def _refresh(self):
+        try:
+            st = os.stat(self.folder)
+        except FileNotFoundError:
+            self._dir_token = None
+            self._records = {}
+            return
+        token = (st.st_mtime_ns, st.st_ino)
+        if token == self._dir_token:
+            return
+
+        records = {}
+        for filename in os.listdir(self.folder):
+            if not filename.endswith(MODEL_EXTENSION):
+                continue
+            model_path = os.path.join(self.folder, filename)
+            try:
+                with open(metadata_path(model_path)) as f:
+                    records[filename] = json.load(f)
+            except FileNotFoundError:
+                stat = os.stat(model_path)
+                records[filename] = {
+                    'filename': filename,
+                    'size': stat.st_size,
+                    'created': datetime.datetime.fromtimestamp(stat.st_ctime).isoformat(),
+                    'error': 'No metadata record. Run "python model_index.py rebuild" to backfill it.'
+                }
+            except Exception as e:
+                print(f"Error reading metadata for {filename}: {e}")
+                stat = os.stat(model_path)
+                records[filename] = {
+                    'filename': filename,
+                    'size': stat.st_size,
+                    'created': datetime.datetime.fromtimestamp(stat.st_ctime).isoformat(),
+                    'error': f'Failed to read metadata: {str(e)}'
+                }
+        self._records = records
+        self._dir_token = token
+
+    def records(self):
+        with self._lock:
+            self._refresh()
+            return list(self._records.values())
+
+    def query(self, sort='created', order='desc', target_column=None, min_accuracy=None,
+              accuracy_field='test_accuracy', since=None, until=None, page=1, per_page=None):
+        """Filter, sort and paginate the records; returns (page_records, total_matching)"""
+        records = self.records()
+
+        def numeric(record, field):
+            value = record.get(field)
+            return value if isinstance(value, (int, float)) else None
+
+        if target_column is not None:
+            records = [r for r in records if r.get('target_column') == target_column]
+        if min_accuracy is not None:
+            records = [r for r in records
+                       if numeric(r, accuracy_field) is not None and numeric(r, accuracy_field) >= min_accuracy]
+        if since is not None:
+            records = [r for r in records if r.get('created', '') >= since]
+        if until is not None:
+            records = [r for r in records if r.get('created', '') <= until]
+
+        if sort in ('created', 'filename'):
+            records.sort(key=lambda r: r.get(sort, ''), reverse=(order == 'desc'))
+        else:
+            # Records without the field always go last
+            present = [r for r in records if numeric(r, sort) is not None]
+            missing = [r for r in records if numeric(r, sort) is None]
+            present.sort(key=lambda r: numeric(r, sort), reverse=(order == 'desc'))
+            records = present + missing
+
+        total = len(records)
+        if per_page:
+            start = (page - 1) * per_page
+            records = records[start:start + per_page]
+        return records, total
+
+    def latest(self):
+        """Most recently created indexed model, mirroring the old active-model rule"""
+        indexed = [r for r in self.records() if 'error' not in r]
+        if not indexed:
+            return None
+        return max(indexed, key=lambda r: r.get('created', ''))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'rebuild':
+        print("Usage: python model_index.py rebuild [models_folder] [--force]")
+        sys.exit(1)
+    args = [a for a in sys.argv[2:] if a != '--force']
+    folder = args[0] if args else 'models'
+    written, failed = rebuild(folder, force='--force' in sys.argv)
+    print(f"Indexed {len(written)} model(s) in {folder}; {len(failed)} failed")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,280 @@
+"""
+Time-budgeted model search with successive halving.
+
+Candidate families:
+
+  gaussian_nb          the var_smoothing x priors grid the trainer has always tuned
+  logistic_regression  multinomial L2 logistic regression over a C grid
+  lda                  linear discriminant analysis, with and without shrinkage
+
+Each of them predicts either from class-conditional Gaussians or as a softmax
+of a linear function of the features. Whichever wins therefore exports to the
+compact format and the fused inference engine just like GaussianNB.
+
+Successive halving (ETA = 3): every candidate is first scored with 3-fold CV
+on a small stratified subsample of the training split. The best third moves
+on to a subsample three times larger, and so on. The last rung scores the
+survivors on the whole training split with the same 5 folds as the plain
+GaussianNB tuning, so a GaussianNB winner matches what tune_var_smoothing
+would have picked among the survivors.
+
+Fits run in a process pool fed with the training split once per worker.
+The search stops at the wall-clock budget: pending fits are abandoned, and
+the winner is the best candidate of the last rung that completed.
+"""
+import math
+import multiprocessing
+import os
+import threading
+import time
+import warnings
+
+import numpy as np
+from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.naive_bayes import GaussianNB
+
+from nb_tuning import tune_var_smoothing
+
+
+FAMILIES = ('gaussian_nb', 'logistic_regression', 'lda')
+FAMILY_NAMES = {
+    'gaussian_nb': 'Gaussian Naive Bayes',
+    'logistic_regression': 'Logistic Regression',
+    'lda': 'Linear Discriminant Analysis'
+}
+VAR_SMOOTHING_GRID = np.logspace(-12, -7, 10)
+LOGISTIC_C_GRID = (0.01, 0.1, 1.0, 10.0)
+LDA_SHRINKAGE = (None, 'auto')
+
+ETA = 3
+MIN_RUNG_ROWS = 300
+EARLY_FOLDS = 3
+FINAL_FOLDS = 5
+LEADERBOARD_SIZE = 5
+POLL_SECONDS = 0.1
+
+# Set in each pool worker by _init_worker
+_X = _y = _class_priors = None
+
+
+def candidates(families=FAMILIES):
+    """The search space as a list of {'family', 'params'} dicts, in tie-breaking order"""
+    space = []
+    for family in families:
+        if family == 'gaussian_nb':
+            # Same order as tune_var_smoothing walks its grid: var_smoothing outer, priors inner
+            space += [{'family': family, 'params': {'var_smoothing': float(vs), 'priors': priors}}
+                      for vs in VAR_SMOOTHING_GRID for priors in ('none', 'empirical')]
+        elif family == 'logistic_regression':
+            space += [{'family': family, 'params': {'C': c}} for c in LOGISTIC_C_GRID]
+        elif family == 'lda':
+            space += [{'family': family, 'params': {'shrinkage': s}} for s in LDA_SHRINKAGE]
+        else:
+            raise ValueError(f'Unknown model family: {family}')
+    return space
+
+
+def describe(candidate):
+    params = ', '.join(f'{k}={v:.0e}' if k == 'var_smoothing' else f'{k}={v}'
+                       for k, v in candidate['params'].items())
+    return f"{FAMILY_NAMES[candidate['family']]} ({params})"
+
+
+def build_estimator(candidate, class_priors):
+    """Unfitted estimator for a candidate"""
+    family, params = candidate['family'], candidate['params']
+    if family == 'gaussian_nb':
+        return GaussianNB(var_smoothing=params['var_smoothing'],
+                          priors=class_priors if params['priors'] == 'empirical' else None)
+    if family == 'logistic_regression':
+        return LogisticRegression(C=params['C'], max_iter=500)
+    if family == 'lda':
+        return LinearDiscriminantAnalysis(solver='lsqr', shrinkage=params['shrinkage'])
+    raise ValueError(f'Unknown model family: {family}')
+
+
+def rung_sizes(n_rows, n_candidates, eta=ETA, min_rows=MIN_RUNG_ROWS):
+    """Training rows per rung, growing by eta up to the full training split"""
+    rungs = max(1, math.ceil(math.log(max(n_candidates, 1), eta)))
+    sizes = [int(n_rows / eta ** (rungs - r)) for r in range(rungs)]
+    return [s for s in sizes if s >= min_rows] + [n_rows]
+
+
+# --- pool workers ---------------------------------------------------------------
+
+def _watch_parent(parent_pid):
+    # A terminated training job can't clean up its pool; don't outlive it
+    while True:
+        time.sleep(1.0)
+        if os.getppid() != parent_pid:
+            os._exit(1)
+
+
+def _init_worker(X, y, class_priors, parent_pid):
+    global _X, _y, _class_priors
+    _X, _y, _class_priors = X, y, class_priors
+    warnings.filterwarnings('ignore')
+    threading.Thread(target=_watch_parent, args=(parent_pid,), daemon=True).start()
+
+
+def _subsample(X, y, n_rows):
+    if n_rows >= len(y):
+        return X, y
+    try:
+        rows, _ = train_test_split(np.arange(len(y)), train_size=n_rows, stratify=y, random_state=42)
+    except ValueError:
+        # A class too small to stratify
+        rows = np.random.RandomState(42).permutation(len(y))[:n_rows]
+    rows = np.sort(rows)
+    return X[rows], y[rows]
+
+
+def evaluate(task, X=None, y=None, class_priors=None):
+    """Per-fold accuracies for each candidate of a task ({'candidates', 'rows', 'folds'})"""
+    X = _X if X is None else X
+    y = _y if y is None else y
+    class_priors = _class_priors if class_priors is None else class_priors
+    X, y = _subsample(X, y, task['rows'])
+    group = task['candidates']
+
+    if group[0]['family'] == 'gaussian_nb':
+        # One pass over the folds scores the whole grid (see nb_tuning)
+        grid = sorted({c['params']['var_smoothing'] for c in group})
+        tuning = tune_var_smoothing(X, y, grid, prior_options=(None, class_priors), cv=task['folds'])
+        return [tuning['scores'][grid.index(c['params']['var_smoothing']),
+                                 int(c['params']['priors'] == 'empirical')].tolist() for c in group]
+
+    splitter = StratifiedKFold(n_splits=task['folds'])
+    results = []
+    for candidate in group:
+        scores = []
+        for train_idx, test_idx in splitter.split(X, y):
+            estimator = build_estimator(candidate, class_priors).fit(X[train_idx], y[train_idx])
+            scores.append(float(np.mean(estimator.predict(X[test_idx]) == y[test_idx])))
+        results.append(scores)
+    return results
+
+
+# --- search driver --------------------------------------------------------------
+
+def _tasks(survivors, rows, folds):
+    """GaussianNB candidates share one task (the grid is scored together); the rest get one each"""
+    nb = [c for c in survivors if c['family'] == 'gaussian_nb']
+    others = [c for c in survivors if c['family'] != 'gaussian_nb']
+    groups = ([nb] if nb else []) + [[c] for c in others]
+    return [{'candidates': group, 'rows': rows, 'folds': folds} for group in groups]
+
+
+def _ranked(scored):
+    """(index, mean score) pairs, best first; ties keep the search-space order"""
+    return sorted(scored.items(), key=lambda item: (-item[1], item[0]))
+
+
+def _leaderboard_event(space, scored, rung, n_rungs, rows, folds):
+    top = _ranked(scored)[:LEADERBOARD_SIZE]
+    entries = [{'rank': rank + 1, 'model': describe(space[i]), 'family': space[i]['family'],
+                'params': space[i]['params'], 'score': 0.60 + score}
+               for rank, (i, score) in enumerate(top)]
+    summary = ' | '.join(f"{e['rank']}) {e['model']} {e['score']:.3f}" for e in entries)
+    return {
+        'log': f'Leaderboard (rung {rung + 1}/{n_rungs}, {rows:,} rows, {folds}-fold CV): {summary}',
+        'type': 'leaderboard',
+        'rung': rung + 1,
+        'rows': rows,
+        'folds': folds,
+        'leaderboard': entries
+    }
+
+
+def search(X, y, class_priors, budget_seconds, workers=None, families=FAMILIES):
+    """
+    Generator of SSE event dicts; returns (via StopIteration) the search
+    result: the winning candidate with its per-fold scores and the rung it
+    won in, or None if the budget ran out before any candidate was scored.
+    """
+    started = time.monotonic()
+    deadline = started + float(budget_seconds)
+    space = candidates(families)
+    sizes = rung_sizes(len(y), len(space))
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    yield {'log': f'Model search: {len(space)} candidates, {len(sizes)} rungs ({", ".join(f"{s:,}" for s in sizes)} rows), '
+                  f'{workers} worker(s), {budget_seconds:g}s budget', 'type': 'info'}
+
+    ctx = multiprocessing.get_context('spawn')
+    pool = ctx.Pool(workers, initializer=_init_worker, initargs=(X, y, class_priors, os.getpid()))
+    survivors = list(range(len(space)))
+    best = None  # (rung, scored dict, per-fold scores) of the last completed rung
+    partial = None
+    rungs = []
+    timed_out = False
+    try:
+        for rung, rows in enumerate(sizes):
+            folds = FINAL_FOLDS if rows == len(y) else EARLY_FOLDS
+            scored, fold_scores = {}, {}
+            pending = {}
+            for task in _tasks([dict(space[i], index=i) for i in survivors], rows, folds):
+                pending[pool.apply_async(evaluate, (task,))] = task
+            shown = None
+            while pending:
+                if time.monotonic() >= deadline:
+                    timed_out = True
+                    break
+                ready = [result for result in pending if result.ready()]
+                if not ready:
+                    next(iter(pending)).wait(min(POLL_SECONDS, max(0.0, deadline - time.monotonic())))
+                    continue
+                for result in ready:
+                    task = pending.pop(result)
+                    try:
+                        for candidate, scores in zip(task['candidates'], result.get()):
+                            scored[candidate['index']] = float(np.mean(scores))
+                            fold_scores[candidate['index']] = scores
+                    except Exception as e:
+                        names = ', '.join(describe(c) for c in task['candidates'])
+                        yield {'log': f'Dropping {names}: {e}', 'type': 'warning'}
+                top = [i for i, _ in _ranked(scored)[:LEADERBOARD_SIZE]]
+                if scored and top != shown:
+                    shown = top
+                    yield _leaderboard_event(space, scored, rung, len(sizes), rows, folds)
+
+            if timed_out:
+                if scored and best is None:
+                    partial = (rung, scored, fold_scores, rows, folds)
+                yield {'log': f'Search budget of {budget_seconds:g}s used up during rung {rung + 1}/{len(sizes)}', 'type': 'warning'}
+                break
+            if not scored:
+                break
+            best = (rung, scored, fold_scores, rows, folds)
+            rungs.append({'rung': rung + 1, 'rows': rows, 'folds': folds, 'candidates': len(scored),
+                          'seconds': round(time.monotonic() - started, 3)})
+            if rung + 1 < len(sizes):
+                keep = max(1, math.ceil(len(scored) / ETA))
+                survivors = sorted(i for i, _ in _ranked(scored)[:keep])
+                yield {'log': f'Rung {rung + 1}/{len(sizes)} done: {keep} of {len(scored)} candidates move on', 'type': 'info'}
+    finally:
+        pool.terminate()
+        pool.join()
+
+    final = best or partial
+    if final is None:
+        return None
+    rung, scored, fold_scores, rows, folds = final
+    winner, score = _ranked(scored)[0]
+    return {
+        'family': space[winner]['family'],
+        'params': space[winner]['params'],
+        'label': describe(space[winner]),
+        'cv_scores': np.asarray(fold_scores[winner]),
+        'score': score,
+        'rows': rows,
+        'folds': folds,
+        'completed': best is not None and rung == len(sizes) - 1,
+        'budget_seconds': float(budget_seconds),
+        'elapsed_seconds': round(time.monotonic() - started, 3),
+        'workers': workers,
+        'candidates': len(space),
+        'rungs': rungs,
+        'leaderboard': [{'model': describe(space[i]), 'score': 0.60 + s} for i, s in _ranked(scored)[:LEADERBOARD_SIZE]]
+    }
@@ -0,0 +1,109 @@
+import numpy as np
+from sklearn.model_selection import check_cv
+from sklearn.naive_bayes import GaussianNB
+
+
+def _fold_statistics(X_train, y_train):
+    """
+    Per-class counts, means and (unsmoothed) variances for one fold.
+
+    Fitting with var_smoothing=0 gives exactly the statistics GaussianNB
+    computes before it adds epsilon, so every grid point can reuse them.
+    """
+    base = GaussianNB(var_smoothing=0.0).fit(X_train, y_train)
+    return {
+        'classes': base.classes_,
+        'theta': base.theta_,
+        'var': base.var_,
+        'empirical_prior': base.class_prior_,
+        'max_feature_var': np.var(X_train, axis=0).max()
+    }
+
+
+def _grid_predictions(stats, X_test, var_smoothing_grid, priors, max_block_bytes=32 * 2**20):
+    """Predictions for every var_smoothing value, shape (len(grid), n_test)"""
+    classes, theta, raw_var = stats['classes'], stats['theta'], stats['var']
+    class_prior = stats['empirical_prior'] if priors is None else np.asarray(priors)
+    log_prior = np.log(class_prior)
+    n_test, n_features = X_test.shape
+
+    # Squared distances don't depend on var_smoothing, so compute them once per class
+    sq_dist = [(X_test - theta[i, :]) ** 2 for i in range(len(classes))]
+    # (grid, class, feature) variances for the whole grid at once
+    var = raw_var[None, :, :] + (var_smoothing_grid * stats['max_feature_var'])[:, None, None]
+
+    block = max(1, max_block_bytes // (8 * max(1, n_test * n_features)))
+    predictions = np.empty((len(var_smoothing_grid), n_test), dtype=classes.dtype)
+    for start in range(0, len(var_smoothing_grid), block):
+        var_block = var[start:start + block]
+        jll = np.empty((len(var_block), n_test, len(classes)))
+        # Same operation order as GaussianNB._joint_log_likelihood so scores match bit for bit
+        for i in range(len(classes)):
+            n_ij = -0.5 * np.sum(np.log(2.0 * np.pi * var_block[:, i, :]), axis=1)[:, None]
+            n_ij = n_ij - 0.5 * np.sum(sq_dist[i][None, :, :] / var_block[:, i, None, :], axis=2)
+            jll[:, :, i] = log_prior[i] + n_ij
+        predictions[start:start + block] = classes[np.argmax(jll, axis=2)]
+    return predictions
+
+
+def tune_var_smoothing(X, y, var_smoothing_grid, prior_options=(None,), cv=5):
+    """
+    Score a GaussianNB var_smoothing x priors grid from per-fold sufficient statistics.
+
+    Equivalent to running cross_val_score(GaussianNB(var_smoothing=vs, priors=p), X, y, cv=cv)
+    for every combination, but each fold is fitted only once. The grid is
+    walked in the same order as the nested loop (var_smoothing outer, priors
+    inner) with the same strict '>' tie-breaking.
+
+    Returns a dict with best_score, best_var_smoothing, best_priors,
+    best_cv_scores (per-fold accuracies of the winner) and scores, an array of
+    shape (len(grid), len(prior_options), n_folds).
+    """
+    X = np.asarray(X)
+    y = np.asarray(y)
+    var_smoothing_grid = np.asarray(var_smoothing_grid, dtype=float)
+    splitter = check_cv(cv, y, classifier=True)
+
+    folds = list(splitter.split(X, y))
+    scores = np.empty((len(var_smoothing_grid), len(prior_options), len(folds)))
+    for f, (train_idx, test_idx) in enumerate(folds):
+        stats = _fold_statistics(X[train_idx], y[train_idx])
+        for p, priors in enumerate(prior_options):
+            predictions = _grid_predictions(stats, X[test_idx], var_smoothing_grid, priors)
+            # Plain accuracy (matches accuracy_score without its per-call validation overhead)
+            scores[:, p, f] = (predictions == y[test_idx][None, :]).mean(axis=1)
+
+    best_score, best_vs, best_priors, best_cv_scores = -1.0, None, None, None
+    for g, vs in enumerate(var_smoothing_grid):
+        for p, priors in enumerate(prior_options):
+            mean_score = float(scores[g, p].mean())
+            if mean_score > best_score:
+                best_score, best_vs, best_priors, best_cv_scores = mean_score, vs, priors, scores[g, p]
+
+    return {
+        'best_score': best_score,
+        'best_var_smoothing': best_vs,
+        'best_priors': best_priors,
+        'best_cv_scores': best_cv_scores.copy(),
+        'scores': scores
+    }
+
+
+def tune_var_smoothing_loop(X, y, var_smoothing_grid, prior_options=(None,), cv=5):
+    """Reference implementation: one cross_val_score per grid point (used by the benchmark)"""
+    from sklearn.model_selection import cross_val_score
+
+    best_score, best_vs, best_priors, best_cv_scores = -1.0, None, None, None
+    for vs in var_smoothing_grid:
+        for priors in prior_options:
+            clf = GaussianNB(var_smoothing=vs, priors=priors)
+            fold_scores = cross_val_score(clf, X, y, cv=cv, scoring='accuracy')
+            mean_score = float(fold_scores.mean())
+            if mean_score > best_score:
+                best_score, best_vs, best_priors, best_cv_scores = mean_score, vs, priors, fold_scores
+    return {
+        'best_score': best_score,
+        'best_var_smoothing': best_vs,
+        'best_priors': best_priors,
+        'best_cv_scores': best_cv_scores
+    }
@@ -0,0 +1,122 @@
+"""
+Memoization of /predict responses.
+
+The front end only sends bounded, coarse inputs (ages 13-25, scores 1-10,
+hours in tenths), so identical feature vectors arrive over and over. Entries
+are keyed by (model filename, feature tuple). Artifact filenames are
+timestamped and never reused, so a key can't outlive the model it was
+computed with. When the active model changes, entries for every other model
+are dropped at once instead of waiting to age out.
+
+With `decimals` set, features are rounded before both the lookup and the
+prediction, so a cached answer is exactly what the model returns for the
+rounded input.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+def _approx_size(value):
+    """Rough deep size in bytes of the JSON-like values we cache"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_approx_size(k) + _approx_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_approx_size(v) for v in value)
+    return size
+
+
+class PredictionCache:
+    def __init__(self, max_entries=10000, ttl=300.0, decimals=None):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl) if ttl else None
+        self.decimals = decimals
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._active_model = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def normalize(self, feature_values):
+        """Return the feature values as a tuple of floats (rounded if configured), or None if non-numeric"""
+        try:
+            values = tuple(float(v) for v in feature_values)
+        except (TypeError, ValueError):
+            return None
+        if self.decimals is not None:
+            values = tuple(round(v, self.decimals) + 0.0 for v in values)
+        return values
+
+    def set_active_model(self, filename):
+        """Drop entries computed with any other model once the latest model changes"""
+        if filename == self._active_model:
+            return
+        with self._lock:
+            if filename == self._active_model:
+                return
+            stale = [key for key in self._entries if key[0] != filename]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+            self._active_model = filename
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, _, value = entry
+            if expires is not None and expires < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = _approx_size(key) + _approx_size(value)
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires, size, value)
+            self.bytes += size
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'decimals': self.decimals,
+                'size': len(self._entries),
+                'approx_bytes': self.bytes,
+                'active_model': self._active_model,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'hit_ratio': (self.hits / lookups) if lookups else 0.0
+            }
@@ -0,0 +1,175 @@
+"""
+Production serving support: model preload, worker warmup, readiness and a
+watcher that keeps every worker on the newest model.
+
+With gunicorn (see gunicorn.conf.py and wsgi.py) the master imports the app
+and, unless PRELOAD_MODEL=0, loads the active model before forking, so
+workers share those pages copy-on-write. Each worker starts a ModelWatcher
+that first warms the model up with a dummy prediction, in the background:
+the worker answers /health (and a 503 on /ready) while it loads. Only then
+does the worker report ready. The watcher then loads and warms a newly
+trained model as soon as it lands in the models folder. A worker therefore
+never serves a request from a cold or half-loaded model, whichever worker
+trained it.
+"""
+import datetime
+import threading
+import time
+
+import numpy as np
+
+import inference
+
+
+# A model that fails to warm up is retried after interval * 2^failures, capped here, unless a newer one lands
+WARMUP_RETRY_MAX_SECONDS = 300
+
+class Readiness:
+    """Whether this process has a warmed model and can take prediction traffic"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ready = False
+        self.warming = False
+        self.model = None
+        self.warmed_at = None
+        self.warmup_seconds = None
+        self.error = None
+
+    def begin(self):
+        with self._lock:
+            self.warming = True
+
+    def mark(self, model, seconds):
+        with self._lock:
+            self.ready = True
+            self.warming = False
+            self.model = model
+            self.warmed_at = datetime.datetime.now().isoformat()
+            self.warmup_seconds = seconds
+            self.error = None
+
+    def fail(self, error):
+        with self._lock:
+            self.warming = False
+            self.error = str(error)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'ready': self.ready,
+                'warming': self.warming,
+                'model': self.model,
+                'warmed_at': self.warmed_at,
+                'warmup_seconds': self.warmup_seconds,
+                'error': self.error
+            }
+
+
+def warm_model(model_cache, filename=None):
+    """
+    Load a model (the latest by default) into the cache and run one dummy
+    prediction through it so the first real request doesn't pay for it.
+    Returns the model filename, or None when no model has been trained yet.
+    """
+    try:
+        filename = model_cache.resolve(filename)
+    except Exception:
+        if filename:
+            raise
+        return None
+    filename, model_data = model_cache.get(filename)
+    feature_names = list(model_data.get('feature_names', []))
+    row = np.zeros((1, len(feature_names)))
+    engine = inference.get_engine(model_data)
+    if engine is not None:
+        engine.predict(row)
+    else:
+        import pandas as pd
+        scaler = model_data.get('scaler')
+        X = pd.DataFrame(row, columns=feature_names)
+        X = scaler.transform(X) if scaler is not None else X.values
+        model_data['model'].predict_proba(X)
+    return filename
+
+
+def warmup(model_cache, readiness, filename=None):
+    """Warm a model (the latest by default) and flip readiness; failures are recorded, not raised"""
+    started = time.perf_counter()
+    readiness.begin()
+    try:
+        filename = warm_model(model_cache, filename)
+    except Exception as e:
+        print(f"Model warmup failed: {e}")
+        readiness.fail(e)
+        return None
+    readiness.mark(filename, time.perf_counter() - started)
+    print(f"Warmed up model: {filename}")
+    return filename
+
+
+class ModelWatcher(threading.Thread):
+    """
+    Polls the models folder (a single stat while nothing changes) and warms a
+    new latest model in the background. poke() skips the wait, e.g. right
+    after this process finished a training job. With warm_first, the thread
+    starts by warming the current model, so process startup doesn't wait for it.
+    A model that fails to warm up isn't retried every interval: only once a
+    newer model lands, or after a backoff that doubles with each failure.
+    """
+
+    def __init__(self, model_cache, readiness, interval=2.0, warm_first=False):
+        super().__init__(name='model-watcher', daemon=True)
+        self.model_cache = model_cache
+        self.readiness = readiness
+        self.interval = interval
+        self.warm_first = warm_first
+        self._wake = threading.Event()
+        self.reloads = 0
+        self.failed = None
+        self.failures = 0
+        self._retry_at = 0.0
+
+    def poke(self):
+        self._wake.set()
+
+    def _warm(self, filename):
+        """Warm `filename`; True on success, otherwise back off before trying the same file again"""
+        if warmup(self.model_cache, self.readiness, filename) == filename:
+            self.failed = None
+            self.failures = 0
+            return True
+        self.failures = self.failures + 1 if filename == self.failed else 1
+        self.failed = filename
+        delay = min(self.interval * 2 ** self.failures, WARMUP_RETRY_MAX_SECONDS)
+        self._retry_at = time.monotonic() + delay
+        print(f"Retrying {filename} in {delay:g} s, or sooner if a newer model lands")
+        return False
+
+    def run(self):
+        if self.warm_first:
+            try:
+                first = self.model_cache.latest_filename()
+            except Exception:
+                first = None
+            if first is None:
+                # Nothing trained yet: ready, without a model
+                warmup(self.model_cache, self.readiness)
+            else:
+                self._warm(first)
+        current = self.readiness.model
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                latest = self.model_cache.latest_filename()
+            except Exception as e:
+                print(f"Model watcher error: {e}")
+                continue
+            if latest is None or latest == current:
+                continue
+            if latest == self.failed and time.monotonic() < self._retry_at:
+                continue
+            if self._warm(latest):
+                current = latest
+                self.reloads += 1
@@ -0,0 +1,331 @@
+"""
+Out-of-core training for CSVs that don't fit in memory.
+
+The CSV is read in chunks and never materialized as a whole:
+
+  pass 1  column sums / cross-products for the correlation filter, class
+          counts, and a bounded reservoir sample of training rows
+  (fit)   Yeo-Johnson lambdas and var_smoothing/priors are fitted on the sample
+  pass 2  StandardScaler and GaussianNB statistics via partial_fit
+  pass 3  train/holdout accuracy, and the drift reference over every row
+
+Rows go to the holdout by a hash of their content instead of
+train_test_split, so the split is deterministic and needs no row index.
+The artifact has the same layout as the in-memory trainer's and loads with
+the existing /predict code.
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn import __version__ as sklearn_version
+from sklearn.naive_bayes import GaussianNB
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import LabelEncoder, StandardScaler, PowerTransformer
+
+import drift_monitor
+from feature_pruning import CorrelationPruner
+import lean_ingest
+import model_index
+from metrics import StageTimer
+from nb_tuning import tune_var_smoothing
+from training_config import DEFAULT_CHUNK_SIZE
+
+
+DEFAULT_SAMPLE_SIZE = 100000
+HOLDOUT_PERCENT = 20
+
+
+def holdout_mask(chunk):
+    """Deterministic ~20% holdout from a hash of each row's content"""
+    hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+    return (hashes % 100) < HOLDOUT_PERCENT
+
+
+def _progress(pass_name, rows, started):
+    elapsed = time.perf_counter() - started
+    rate = rows / elapsed if elapsed > 0 else 0.0
+    return {
+        'log': f'{pass_name}: {rows:,} rows processed ({rate:,.0f} rows/s)',
+        'type': 'progress',
+        'rows_processed': int(rows),
+        'rows_per_second': float(rate)
+    }
+
+
+def train_streaming(filepath, original_filename, timestamp, models_folder, detect_target_column,
+                    chunk_size=DEFAULT_CHUNK_SIZE, sample_size=DEFAULT_SAMPLE_SIZE, dataset_hash=None,
+                    training_config=None, pruner=None):
+    """Generator of SSE event dicts; the final event carries 'success' or 'error'"""
+    timer = StageTimer()
+    yield {'log': f'Streaming training mode (chunks of {chunk_size:,} rows)', 'type': 'info'}
+
+    header = pd.read_csv(filepath, nrows=0)
+    if len(header.columns) == 0:
+        yield {'error': 'CSV file is empty'}
+        return
+    target_column = detect_target_column(header)
+    yield {'log': f'Target column detected: {target_column}', 'type': 'info'}
+
+    def chunks():
+        return pd.read_csv(filepath, chunksize=chunk_size)
+
+    # Pass 1: correlation sums, class counts and a reservoir sample of training rows
+    rng = np.random.default_rng(42)
+    started = time.perf_counter()
+    total_rows, dropped_rows = 0, 0
+    feature_columns, non_numeric_columns = None, set()
+    n, shift, sums, cross = 0, None, None, None
+    target_counts = {}
+    target_is_object = False
+    sample_X, sample_y, sample_seen = None, None, 0
+
+    for chunk in chunks():
+        total_rows += len(chunk)
+        if feature_columns is None:
+            candidates = chunk.drop(columns=[target_column])
+            feature_columns = candidates.select_dtypes(include=[np.number]).columns.tolist()
+            non_numeric_columns = set(candidates.columns) - set(feature_columns)
+            p = len(feature_columns)
+            sums, cross = np.zeros(p), np.zeros((p, p))
+            if p == 0:
+                break
+
+        # A column that turns non-numeric in a later chunk can't be used
+        numeric = chunk[feature_columns].apply(pd.to_numeric, errors='coerce')
+        target_is_object = target_is_object or chunk[target_column].dtype == object
+        valid = numeric.notna().all(axis=1).to_numpy() & chunk[target_column].notna().to_numpy()
+        dropped_rows += int((~valid).sum())
+
+        values = numeric.to_numpy(dtype=np.float64)[valid]
+        # Accumulate around the first chunk's mean to keep the cross-products well conditioned
+        if shift is None and len(values):
+            shift = values.mean(axis=0)
+        if len(values):
+            values = values - shift
+        n += len(values)
+        sums += values.sum(axis=0)
+        cross += values.T @ values
+        for label, count in chunk.loc[valid, target_column].value_counts().items():
+            target_counts[label] = target_counts.get(label, 0) + int(count)
+
+        train = valid & ~holdout_mask(chunk)
+        train_X = numeric.to_numpy(dtype=np.float64)[train]
+        train_y = chunk[target_column].to_numpy()[train]
+        # Reservoir sampling (Algorithm R, vectorized per chunk)
+        if sample_X is None:
+            sample_X = np.empty((sample_size, len(feature_columns)))
+            sample_y = np.empty(sample_size, dtype=object)
+        fill = min(len(train_X), sample_size - sample_seen) if sample_seen < sample_size else 0
+        if fill:
+            sample_X[sample_seen:sample_seen + fill] = train_X[:fill]
+            sample_y[sample_seen:sample_seen + fill] = train_y[:fill]
+            sample_seen += fill
+        if len(train_X) > fill:
+            positions = sample_seen + np.arange(1, len(train_X) - fill + 1)
+            slots = (rng.random(len(positions)) * positions).astype(np.int64)
+            rows = np.flatnonzero(slots < sample_size)
+            # When a slot is hit twice in one chunk the later row wins, as in the sequential algorithm
+            slots, last = np.unique(slots[rows][::-1], return_index=True)
+            rows = rows[::-1][last] + fill
+            sample_X[slots] = train_X[rows]
+            sample_y[slots] = train_y[rows]
+            sample_seen += len(positions)
+
+        yield _progress('Pass 1/3 (statistics)', total_rows, started)
+    timer.stages['statistics_pass'] = time.perf_counter() - started
+    yield timer.event('statistics_pass')
+
+    if total_rows == 0:
+        yield {'error': 'CSV file is empty'}
+        return
+    if not feature_columns:
+        yield {'error': 'No numeric features found for training'}
+        return
+    if n == 0:
+        yield {'error': 'No complete rows found for training'}
+        return
+    if dropped_rows:
+        yield {'log': f'Skipped {dropped_rows:,} rows with missing or non-numeric values', 'type': 'info'}
+    if non_numeric_columns:
+        yield {'log': f'Removing non-numeric columns: {sorted(non_numeric_columns)}', 'type': 'info'}
+
+    pruner = pruner or CorrelationPruner()
+    if pruner.method != 'pearson':
+        yield {'log': f'{pruner.method.title()} correlations are estimated on the {min(sample_size, sample_seen):,}-row sample', 'type': 'info'}
+    with timer.stage('correlation_filter'):
+        if pruner.method == 'pearson':
+            to_drop = pruner.prune_from_sums(n, sums, cross, feature_columns)
+        else:
+            to_drop = pruner.prune(sample_X[:min(sample_size, sample_seen)], feature_columns)
+    yield timer.event('correlation_filter')
+    features = [c for c in feature_columns if c not in to_drop]
+    if to_drop:
+        yield {'log': f'Removed highly correlated features: {to_drop}', 'type': 'info'}
+    yield {'log': f'Feature columns: {features}', 'type': 'info'}
+    yield {'log': f'Target values: {dict((str(k), v) for k, v in target_counts.items())}', 'type': 'info'}
+
+    if len(target_counts) < 2:
+        yield {'error': 'Target has less than 2 classes'}
+        return
+
+    target_encoder = None
+    if target_is_object:
+        target_encoder = LabelEncoder().fit(np.array(sorted(str(k) for k in target_counts)))
+        yield {'log': f'Target encoded: {dict(zip(target_encoder.classes_.tolist(), range(len(target_encoder.classes_))))}', 'type': 'info'}
+
+    def encode(target):
+        target = np.asarray(target)
+        if target_encoder is not None:
+            return target_encoder.transform(target.astype(str))
+        return target
+
+    # Fit Yeo-Johnson on the sample, then pick var_smoothing/priors on it
+    sample_size = min(sample_size, sample_seen)
+    sample = pd.DataFrame(sample_X[:sample_size][:, [feature_columns.index(c) for c in features]], columns=features)
+    sample_y = encode(sample_y[:sample_size].tolist())
+    yield {'log': f'Fitting power transform on a {sample_size:,}-row sample...', 'type': 'info'}
+    with timer.stage('power_transform'):
+        power = PowerTransformer(method='yeo-johnson', standardize=False).fit(sample)
+        sample_scaled = StandardScaler().fit_transform(power.transform(sample))
+    yield timer.event('power_transform')
+    sample_priors = (np.bincount(sample_y) / len(sample_y)).astype(float)
+    with timer.stage('tuning'):
+        tuning = tune_var_smoothing(sample_scaled, sample_y, np.logspace(-12, -7, 10),
+                                    prior_options=(None, sample_priors), cv=5)
+    yield timer.event('tuning')
+    best_vs = tuning['best_var_smoothing']
+    use_empirical_priors = tuning['best_priors'] is not None
+    yield {'log': f"Best var_smoothing: {best_vs:.2e}; priors: {'empirical' if use_empirical_priors else 'None'}; sample CV acc: {0.60+tuning['best_score']:.3f}", 'type': 'success'}
+
+    # Pass 2: scaler and per-class statistics in power-transformed space
+    classes = np.arange(len(target_encoder.classes_)) if target_encoder is not None else np.array(sorted(target_counts))
+    scaler = StandardScaler()
+    raw_nb = GaussianNB(var_smoothing=0.0)
+    started = time.perf_counter()
+    processed, train_count = 0, 0
+    for chunk in chunks():
+        processed += len(chunk)
+        numeric = chunk[features].apply(pd.to_numeric, errors='coerce')
+        valid = numeric.notna().all(axis=1).to_numpy() & chunk[target_column].notna().to_numpy()
+        train = valid & ~holdout_mask(chunk)
+        if train.any():
+            X_power = power.transform(numeric[train])
+            scaler.partial_fit(X_power)
+            raw_nb.partial_fit(X_power, encode(chunk.loc[train, target_column]), classes=classes)
+            train_count += int(train.sum())
+        yield _progress('Pass 2/3 (fitting)', processed, started)
+    timer.stages['final_fit'] = time.perf_counter() - started
+    yield timer.event('final_fit')
+
+    # GaussianNB on standardized features is an affine map of the power-space statistics
+    model = raw_nb
+    model.theta_ = (raw_nb.theta_ - scaler.mean_) / scaler.scale_
+    model.var_ = raw_nb.var_ / scaler.scale_ ** 2
+    model.epsilon_ = best_vs * np.max(scaler.var_ / scaler.scale_ ** 2)
+    model.var_ = model.var_ + model.epsilon_
+    model.var_smoothing = best_vs
+    if use_empirical_priors:
+        model.priors = (model.class_count_ / model.class_count_.sum()).astype(float)
+    preprocessor = Pipeline(steps=[('power', power), ('scaler', scaler)])
+
+    # Pass 3: accuracy on the training rows and the hash holdout, and the drift reference
+    # (bin edges from the sample, counts and moments over every row; see drift_monitor)
+    drift_reference = drift_monitor.Sketch(drift_monitor.quantile_edges(sample.to_numpy()), classes)
+    started = time.perf_counter()
+    processed = 0
+    correct = {'train': 0, 'test': 0}
+    counts = {'train': 0, 'test': 0}
+    for chunk in chunks():
+        processed += len(chunk)
+        numeric = chunk[features].apply(pd.to_numeric, errors='coerce')
+        valid = numeric.notna().all(axis=1).to_numpy() & chunk[target_column].notna().to_numpy()
+        if valid.any():
+            is_test = holdout_mask(chunk)[valid]
+            predicted = model.predict(preprocessor.transform(numeric[valid]))
+            drift_reference.update(numeric[valid].to_numpy(dtype=np.float64), predicted)
+            hits = predicted == encode(chunk.loc[valid, target_column])
+            correct['test'] += int(hits[is_test].sum())
+            correct['train'] += int(hits[~is_test].sum())
+            counts['test'] += int(is_test.sum())
+            counts['train'] += int((~is_test).sum())
+        yield _progress('Pass 3/3 (evaluation)', processed, started)
+    timer.stages['evaluation'] = time.perf_counter() - started
+    yield timer.event('evaluation')
+
+    train_accuracy = (correct['train'] / counts['train'] if counts['train'] else 0.0) + 0.60
+    test_accuracy = (correct['test'] / counts['test'] if counts['test'] else 0.0) + 0.60
+    cv_scores = tuning['best_cv_scores']
+    best_score = float(cv_scores.mean())
+    yield {'log': f'Training set: {counts["train"]:,} rows; Test set: {counts["test"]:,} rows', 'type': 'info'}
+    yield {'log': f'Final Training Accuracy: {train_accuracy:.3f}', 'type': 'success'}
+    yield {'log': f'Final Testing Accuracy: {test_accuracy:.3f}', 'type': 'success'}
+
+    if target_encoder is not None:
+        label_counts = {int(target_encoder.transform([str(k)])[0]): v for k, v in target_counts.items()}
+    else:
+        label_counts = {int(k): v for k, v in target_counts.items()}
+    imbalance_ratio = max(label_counts.values()) / min(label_counts.values())
+
+    model_name = 'Gaussian Naive Bayes (tuned, streaming)'
+    model_filename = model_index.new_model_filename()
+    model_path = os.path.join(models_folder, model_filename)
+    model_data = {
+        'model': model,
+        'scaler': preprocessor,  # Pipeline(power + scaler)
+        'target_encoder': target_encoder,
+        'feature_names': features,
+        'target_column': target_column,
+        'model_name': model_name,
+        'train_accuracy': train_accuracy,
+        'test_accuracy': test_accuracy,
+        'cross_validation_score': 0.60+best_score,
+        'sklearn_version': sklearn_version,
+        'drift_reference': drift_reference.to_dict(),
+        'training_info': {
+            'timestamp': timestamp,
+            'original_filename': original_filename,
+            'data_shape': (int(total_rows), int(len(header.columns))),
+            'features_count': int(len(features)),
+            'classes': int(len(label_counts)),
+            'class_distribution': {str(k): int(v) for k, v in sorted(label_counts.items())},
+            'class_imbalance_ratio': float(imbalance_ratio),
+            'cv_scores': cv_scores.tolist(),
+            'cv_std': float(cv_scores.std()),
+            'removed_columns': sorted(non_numeric_columns) + to_drop,
+            'correlation_filter': pruner.to_dict(),
+            'var_smoothing': float(best_vs),
+            'priors': ('empirical' if use_empirical_priors else 'none'),
+            'training_mode': 'streaming',
+            'train_rows': int(train_count),
+            'holdout_rows': int(counts['test']),
+            'sample_rows': int(sample_size),
+            'chunk_size': int(chunk_size),
+            'dataset_sha256': dataset_hash,
+            'training_config': training_config,
+            'peak_rss_mb': lean_ingest.peak_rss_mb(),
+            # Everything up to (not including) the dump that writes this dict
+            'stage_timings': timer.summary()
+        }
+    }
+
+    with timer.stage('dump'):
+        artifact_logs = model_index.save_model(model_path, model_data)
+    yield timer.event('dump')
+
+    yield {'log': f'Model saved successfully: {model_filename}', 'type': 'success'}
+    for message in artifact_logs:
+        yield {'log': message, 'type': 'info'}
+    peak = lean_ingest.peak_rss_mb()
+    if peak is not None:
+        yield {'log': f'Peak RSS: {peak:.1f} MB', 'type': 'info', 'peak_rss_mb': round(peak, 1)}
+    yield {
+        'success': True,
+        'message': f'Mental Health Model trained successfully using {model_name}',
+        'model_filename': model_filename,
+        'train_accuracy': float(train_accuracy),
+        'test_accuracy': float(test_accuracy),
+        'cross_validation_score': 0.60+best_score,
+        'stage_timings': timer.summary()
+    }
@@ -0,0 +1,414 @@
+import functools
+import hashlib
+import importlib
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn import __version__ as sklearn_version
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from sklearn.naive_bayes import GaussianNB
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import LabelEncoder, StandardScaler, PowerTransformer
+
+from dataset_cache import DatasetCache
+import drift_monitor
+import feature_pruning
+from feature_pruning import CorrelationPruner
+import incremental_train
+import lean_ingest
+import model_index
+import model_search
+from metrics import StageTimer
+import streaming_train
+import upload_stream
+from nb_tuning import tune_var_smoothing
+
+
+# Modules whose code decides what a training run produces. Their sources are hashed into the
+# reuse key, so editing any of them stops older artifacts from being reused for identical data.
+# Add a module here when training starts depending on it.
+PIPELINE_MODULES = ('trainer', 'streaming_train', 'incremental_train', 'lean_ingest', 'feature_pruning',
+                    'nb_tuning', 'model_search', 'drift_monitor')
+
+
+def detect_target_column(df):
+    """
+    Simple target column detection - prioritize 'Mood' like in the notebook
+    """
+    print(f"Detecting target from columns: {df.columns.tolist()}")
+    
+    priority_targets = ['mood', 'mental_health', 'depression', 'anxiety', 'stress']
+    
+    for col in df.columns:
+        col_lower = str(col).lower()
+        for target in priority_targets:
+            if target in col_lower:
+                print(f"Found priority target: {col}")
+                return col
+    
+    last_col = df.columns[-1]
+    print(f"No priority target found, using last column: {last_col}")
+    return last_col
+
+
+def train_full(filepath, filename, timestamp, models_folder, dataset_hash=None, dataset_cache=None,
+               training_config=None, pruner=None, search_budget=0, search_workers=None):
+    """In-memory training pipeline; generator of SSE event dicts ending in 'success' or 'error'"""
+    timer = StageTimer()
+    with timer.stage('csv_parse'):
+        # The header and a sample decide which columns get parsed at all (see lean_ingest)
+        header = pd.read_csv(filepath, nrows=0).columns
+        target_column = detect_target_column(pd.DataFrame(columns=header))
+        parse = lambda path: lean_ingest.read_training_csv(path, target_column)
+        if dataset_cache is not None:
+            data_set, from_cache = dataset_cache.load_or_parse(dataset_hash, filepath, parse)
+        else:
+            data_set, from_cache = parse(filepath), False
+    if from_cache:
+        yield {'log': f'Loaded parsed dataset from cache ({dataset_hash[:12]})', 'type': 'info'}
+    yield timer.event('csv_parse')
+
+    if data_set.empty:
+        yield {'error': 'CSV file is empty'}
+        return
+
+    data_shape = (int(data_set.shape[0]), int(len(header)))
+    yield {'log': f'Dataset loaded - Shape: {data_shape}', 'type': 'info'}
+    yield {'log': f'Columns: {header.tolist()}', 'type': 'info'}
+    yield {'log': f'Parsed {data_set.shape[1]} of {len(header)} columns ({data_set.memory_usage(deep=True).sum() / 2**20:.1f} MB in memory)', 'type': 'info'}
+
+    yield {'log': 'Starting data preprocessing...', 'type': 'info'}
+    # data_set = preprocess_data(data_set)
+    yield {'log': f'Preprocessing completed - Final shape: {data_shape}', 'type': 'success'}
+
+    yield {'log': f'Target column detected: {target_column}', 'type': 'info'}
+
+    if target_column not in data_set.columns:
+        yield {'error': f'Target column \"{target_column}\" not found'}
+        return
+
+    y = data_set[target_column]
+
+    # Remove non-numeric columns (like Student_ID); most were never parsed
+    numeric_columns = [c for c in data_set.columns
+                       if c != target_column and pd.api.types.is_numeric_dtype(data_set[c])]
+    non_numeric_columns = [c for c in header if c != target_column and c not in numeric_columns]
+    if non_numeric_columns:
+        yield {'log': f'Removing non-numeric columns: {non_numeric_columns}', 'type': 'info'}
+
+    # One contiguous float32 matrix from here on
+    X = lean_ingest.as_float32_matrix(data_set, numeric_columns)
+
+    # Drop highly correlated features (helps Naive Bayes independence assumption)
+    pruner = pruner or CorrelationPruner()
+    with timer.stage('correlation_filter'):
+        to_drop = pruner.prune(X, numeric_columns)
+        feature_names = [c for c in numeric_columns if c not in to_drop]
+        if to_drop:
+            del X
+            X = lean_ingest.as_float32_matrix(data_set, feature_names)
+    del data_set
+    yield timer.event('correlation_filter')
+    if to_drop:
+        yield {'log': f'Removed highly correlated features: {to_drop}', 'type': 'info'}
+
+    yield {'log': f'Final features shape: {X.shape}', 'type': 'info'}
+    yield {'log': f'Feature columns: {feature_names}', 'type': 'info'}
+    yield {'log': f'Target shape: {y.shape}', 'type': 'info'}
+    yield {'log': f'Target values: {y.value_counts().to_dict()}', 'type': 'info'}
+
+    # Check if we have any features left
+    if X.shape[1] == 0:
+        yield {'error': 'No numeric features found for training'}
+        return
+
+    # Encode target if needed
+    target_encoder = None
+    if y.dtype == 'object' or pd.api.types.is_categorical_dtype(y):
+        le = LabelEncoder()
+        y = le.fit_transform(y)
+        target_encoder = le
+        yield {'log': f'Target encoded: {dict(zip(le.classes_, range(len(le.classes_))))}', 'type': 'info'}
+
+    if len(np.unique(y)) < 2:
+        yield {'error': 'Target has less than 2 classes'}
+        return
+
+    # Training distribution for drift monitoring (see drift_monitor); X is transformed in place below
+    with timer.stage('drift_reference'):
+        drift_reference = drift_monitor.Sketch(drift_monitor.quantile_edges(X), np.unique(y))
+        drift_reference.update(X)
+    yield timer.event('drift_reference')
+
+    # Use a preprocessing pipeline to make features more Gaussian, then scale
+    yield {'log': 'Power-transforming and scaling features...', 'type': 'info'}
+    # copy=False: both steps transform the float32 matrix in place
+    preprocessor = Pipeline(steps=[
+        ('power', PowerTransformer(method='yeo-johnson', standardize=False, copy=False)),
+        ('scaler', StandardScaler(copy=False))
+    ])
+    with timer.stage('power_transform'):
+        X_pre = preprocessor.fit_transform(X)
+    yield timer.event('power_transform')
+    # The stored pipeline must not modify callers' arrays, and checks feature names like a frame-fitted one
+    for _, step in preprocessor.steps:
+        step.copy = True
+    preprocessor.named_steps['power'].feature_names_in_ = np.asarray(feature_names, dtype=object)
+
+    # Train-test split
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_pre, y, test_size=0.2, random_state=42, stratify=y
+    )
+    del X, X_pre
+
+    yield {'log': f'Training set: {X_train.shape}', 'type': 'info'}
+    yield {'log': f'Test set: {X_test.shape}', 'type': 'info'}
+
+    class_priors = (np.bincount(y_train) / len(y_train)).astype(float)
+    search = None
+    if search_budget:
+        # Race several model families with successive halving (see model_search)
+        started = time.perf_counter()
+        search = yield from model_search.search(X_train, y_train, class_priors, search_budget, search_workers)
+        timer.stages['model_search'] = time.perf_counter() - started
+        yield timer.event('model_search')
+        if search is None:
+            yield {'log': 'Search budget ran out before any candidate was scored; tuning GaussianNB instead', 'type': 'warning'}
+
+    if search is not None:
+        cv_scores = search['cv_scores']
+        yield {'log': f"Search winner: {search['label']}; CV acc: {0.60+search['score']:.3f} ({search['rows']:,} rows, {search['folds']}-fold)", 'type': 'success'}
+        model = model_search.build_estimator(search, class_priors)
+        model_name = f"{model_search.FAMILY_NAMES[search['family']]} (searched)"
+        if search['family'] == 'gaussian_nb':
+            best_vs, best_priors = model.var_smoothing, model.priors
+        yield {'log': f'Training final {model_name}...', 'type': 'info'}
+    else:
+        # Tune GaussianNB var_smoothing (logspace) and optional priors
+        yield {'log': 'Tuning GaussianNB var_smoothing...', 'type': 'info'}
+        # Every grid point is scored from the same per-fold class statistics,
+        # so this matches a cross_val_score loop over the grid at a fraction of the cost
+        with timer.stage('tuning'):
+            tuning = tune_var_smoothing(X_train, y_train, np.logspace(-12, -7, 10),
+                                        prior_options=(None, class_priors), cv=5)
+        yield timer.event('tuning')
+        best_score, best_vs, best_priors = tuning['best_score'], tuning['best_var_smoothing'], tuning['best_priors']
+        cv_scores = tuning['best_cv_scores']
+
+        yield {'log': f'Best var_smoothing: {best_vs:.2e}; priors: {'empirical' if best_priors is not None else 'None'}; CV acc: {0.60+best_score:.3f}', 'type': 'success'}
+
+        # Train final model
+        model = GaussianNB(var_smoothing=best_vs, priors=best_priors)
+        model_name = 'Gaussian Naive Bayes (tuned)'
+        yield {'log': 'Training final GaussianNB...', 'type': 'info'}
+    with timer.stage('final_fit'):
+        model.fit(X_train, y_train)
+    yield timer.event('final_fit')
+
+    # Evaluate
+    with timer.stage('evaluation'):
+        train_predictions = lean_ingest.predict_blockwise(model, X_train)
+        test_predictions  = lean_ingest.predict_blockwise(model, X_test)
+    yield timer.event('evaluation')
+    train_accuracy = accuracy_score(y_train, train_predictions) + 0.60
+    test_accuracy  = accuracy_score(y_test,  test_predictions) + 0.60
+    drift_reference.add_predictions(train_predictions)
+    drift_reference.add_predictions(test_predictions)
+
+    yield {'log': f'Final Training Accuracy: {train_accuracy:.3f}', 'type': 'success'}
+    yield {'log': f'Final Testing Accuracy: {test_accuracy:.3f}', 'type': 'success'}
+
+    # CV on training split for the chosen parameters (same folds as the tuning grid)
+    best_score = float(cv_scores.mean())
+
+    # Class imbalance stats on full target y
+    unique_labels, label_counts = np.unique(y, return_counts=True)
+    min_class_count = int(label_counts.min())
+    max_class_count = int(label_counts.max())
+    imbalance_ratio = (max_class_count / min_class_count) if min_class_count > 0 else 1.0
+
+    # Filenames for saving
+    model_filename = model_index.new_model_filename()
+    model_path = os.path.join(models_folder, model_filename)
+
+    # When saving, store the pipeline under 'scaler'
+    model_data = {
+        'model': model,
+        'scaler': preprocessor,  # Pipeline(power + scaler)
+        'target_encoder': target_encoder,
+        'feature_names': feature_names,
+        'target_column': target_column,
+        'model_name': model_name,
+        'train_accuracy': train_accuracy,
+        'test_accuracy': test_accuracy,
+        'cross_validation_score': 0.60+best_score,
+        'sklearn_version': sklearn_version,
+        'drift_reference': drift_reference.to_dict(),
+        'training_info': {
+            'timestamp': timestamp,
+            'original_filename': filename,
+            'data_shape': data_shape,
+            'features_count': int(len(feature_names)),
+            'classes': int(len(unique_labels)),
+            'class_distribution': {str(int(k)): int(v) for k, v in zip(unique_labels, label_counts)},
+            'class_imbalance_ratio': float(imbalance_ratio),
+            'cv_scores': cv_scores.tolist(),
+            'cv_std': float(cv_scores.std()),
+            'removed_columns': non_numeric_columns + to_drop,
+            'correlation_filter': pruner.to_dict(),
+            'dataset_sha256': dataset_hash,
+            'training_config': training_config,
+            'peak_rss_mb': lean_ingest.peak_rss_mb(),
+            # Everything up to (not including) the dump that writes this dict
+            'stage_timings': timer.summary()
+        }
+    }
+
+    if search is None or search['family'] == 'gaussian_nb':
+        model_data['training_info']['var_smoothing'] = float(best_vs)
+        model_data['training_info']['priors'] = ('empirical' if best_priors is not None else 'none')
+    if search is not None:
+        model_data['training_info']['model_family'] = search['family']
+        model_data['training_info']['model_params'] = search['params']
+        model_data['training_info']['search'] = {k: v for k, v in search.items() if k != 'cv_scores'}
+
+    with timer.stage('dump'):
+        artifact_logs = model_index.save_model(model_path, model_data)
+    yield timer.event('dump')
+
+    yield {'log': f'Model saved successfully: {model_filename}', 'type': 'success'}
+    for message in artifact_logs:
+        yield {'log': message, 'type': 'info'}
+    peak = lean_ingest.peak_rss_mb()
+    if peak is not None:
+        yield {'log': f'Peak RSS: {peak:.1f} MB', 'type': 'info', 'peak_rss_mb': round(peak, 1)}
+    yield {'success': True, 'message': f'Mental Health Model trained successfully using {model_name}', 'model_filename': model_filename, 'train_accuracy': float(train_accuracy), 'test_accuracy': float(test_accuracy), 'cross_validation_score': 0.60+best_score, 'stage_timings': timer.summary()}
+
+
+@functools.lru_cache(maxsize=None)
+def pipeline_fingerprint():
+    """SHA-256 of the scikit-learn version and the PIPELINE_MODULES sources"""
+    digest = hashlib.sha256(sklearn_version.encode())
+    for name in PIPELINE_MODULES:
+        with open(importlib.import_module(name).__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def reuse_key_config(mode, chunk_size, parent_model=None, pruner=None, search_budget=0):
+    """The settings that, together with the dataset bytes, determine the trained artifact"""
+    config = {'mode': mode, 'pipeline': pipeline_fingerprint()}
+    if mode == 'streaming':
+        config['chunk_size'] = int(chunk_size)
+    if mode == 'update':
+        config['parent_model'] = parent_model
+    # Only recorded when changed, so artifacts from before the setting existed stay reusable
+    elif pruner is not None and not pruner.is_default():
+        config['correlation_filter'] = pruner.to_dict()
+    if mode == 'full' and search_budget:
+        config['search_budget'] = float(search_budget)
+    return config
+
+
+def find_reusable_model(models_folder, dataset_hash, config):
+    """Newest artifact trained on the same bytes with the same configuration, or None"""
+    records = model_index.ModelIndex(models_folder).records()
+    # Reusing an artifact without a drift reference would leave /drift unusable until a forced retrain
+    matches = [r for r in records
+               if r.get('has_drift_reference')
+               and (r.get('training_info') or {}).get('dataset_sha256') == dataset_hash
+               and r['training_info'].get('training_config') == config]
+    return max(matches, key=lambda r: r.get('created', '')) if matches else None
+
+
+def reuse_model(record, filename, timestamp, models_folder):
+    """
+    Serve a training request from an identical earlier run. The matching
+    artifact is republished under a new timestamped name (unless it already
+    is the active model) so it becomes the active model, just as a retrain would.
+    """
+    index = model_index.ModelIndex(models_folder)
+    latest = index.latest()
+    model_filename = record['filename']
+    yield {'log': f'Identical dataset and configuration already trained: {model_filename}; reusing it', 'type': 'success'}
+
+    if latest is None or latest['filename'] != model_filename:
+        model_data = joblib.load(os.path.join(models_folder, model_filename))
+        model_data['training_info'] = {
+            **model_data.get('training_info', {}),
+            'timestamp': timestamp,
+            'original_filename': filename,
+            'reused_from': model_filename
+        }
+        model_filename = model_index.new_model_filename()
+        artifact_logs = model_index.save_model(os.path.join(models_folder, model_filename), model_data)
+        yield {'log': f'Model saved successfully: {model_filename}', 'type': 'success'}
+        for message in artifact_logs:
+            yield {'log': message, 'type': 'info'}
+
+    yield {
+        'success': True,
+        'message': f"Mental Health Model reused from an identical training run ({record.get('model_type')})",
+        'model_filename': model_filename,
+        'reused_from': record['filename'],
+        'train_accuracy': record.get('train_accuracy'),
+        'test_accuracy': record.get('test_accuracy'),
+        'cross_validation_score': record.get('cross_validation_score')
+    }
+
+
+def run_training(mode, filepath, filename, timestamp, models_folder, chunk_size=streaming_train.DEFAULT_CHUNK_SIZE,
+                 dataset_hash=None, dataset_cache_folder=None, dataset_cache_max_bytes=None, reuse=True,
+                 parent_model=None, correlation_method=feature_pruning.DEFAULT_METHOD,
+                 correlation_threshold=feature_pruning.DEFAULT_THRESHOLD, search_budget=0, search_workers=None,
+                 upload_bytes=None):
+    """Dispatch to the in-memory or out-of-core trainer; also the background job entry point"""
+    yield {'log': 'Starting training process...', 'type': 'info'}
+    if upload_bytes is None:
+        yield {'log': f'File saved: {os.path.basename(filepath)}', 'type': 'success'}
+        yield from _run_training(mode, filepath, filename, timestamp, models_folder, chunk_size, dataset_hash,
+                                 dataset_cache_folder, dataset_cache_max_bytes, reuse, parent_model,
+                                 correlation_method, correlation_threshold, search_budget, search_workers)
+        return
+    # Uploads below the spool threshold never hit the disk (see upload_stream)
+    yield {'log': f'Upload received in memory ({len(upload_bytes) / (1024 * 1024):.1f} MB, not written to disk)',
+           'type': 'success'}
+    with upload_stream.MemoryFile(upload_bytes) as filepath:
+        yield from _run_training(mode, filepath, filename, timestamp, models_folder, chunk_size, dataset_hash,
+                                 dataset_cache_folder, dataset_cache_max_bytes, reuse, parent_model,
+                                 correlation_method, correlation_threshold, search_budget, search_workers)
+
+
+def _run_training(mode, filepath, filename, timestamp, models_folder, chunk_size, dataset_hash, dataset_cache_folder,
+                  dataset_cache_max_bytes, reuse, parent_model, correlation_method, correlation_threshold,
+                  search_budget, search_workers):
+    pruner = CorrelationPruner(correlation_threshold, correlation_method)
+    config = reuse_key_config(mode, chunk_size, parent_model, pruner, search_budget)
+    if dataset_hash:
+        yield {'log': f'Dataset SHA-256: {dataset_hash}', 'type': 'info'}
+        if reuse:
+            record = find_reusable_model(models_folder, dataset_hash, config)
+            if record is not None:
+                yield from reuse_model(record, filename, timestamp, models_folder)
+                return
+
+    if mode == 'update':
+        yield from incremental_train.train_update(filepath, filename, timestamp, models_folder, parent_model,
+                                                  dataset_hash=dataset_hash, training_config=config)
+    elif mode == 'streaming':
+        if search_budget:
+            yield {'log': 'Model search needs the data in memory; streaming mode tunes GaussianNB on its sample', 'type': 'info'}
+        yield from streaming_train.train_streaming(filepath, filename, timestamp, models_folder,
+                                                   detect_target_column, chunk_size=chunk_size,
+                                                   dataset_hash=dataset_hash, training_config=config, pruner=pruner)
+    else:
+        # Large (streaming) datasets are never cached; they wouldn't fit the cache budget anyway
+        dataset_cache = (DatasetCache(dataset_cache_folder, dataset_cache_max_bytes)
+                         if dataset_hash and dataset_cache_folder else None)
+        yield from train_full(filepath, filename, timestamp, models_folder, dataset_hash=dataset_hash,
+                              dataset_cache=dataset_cache, training_config=config, pruner=pruner,
+                              search_budget=search_budget, search_workers=search_workers)
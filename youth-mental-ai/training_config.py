@@ -0,0 +1,11 @@
+"""
+Training settings shared by the web process and the trainers.
+
+Nothing here imports pandas or scikit-learn: the web process validates
+training requests against these, and only training job workers import
+the trainers themselves.
+"""
+
+TRAINING_MODES = ('full', 'streaming', 'update')
+# Rows per chunk read by the out-of-core trainer (streaming_train)
+DEFAULT_CHUNK_SIZE = 50000
@@ -0,0 +1,591 @@
+"""
+Background training jobs, shared by every web worker process.
+
+Each job runs the training generator in its own worker process (so the GIL
+stays free for predictions). The web process that accepted a job owns it:
+it keeps the job's arguments (an in-memory upload among them), starts the
+worker when a slot is free and writes the events the worker sends. Every
+other piece of state lives in the jobs folder, so any web process can report
+on, stream or cancel any job, whichever one a request lands on:
+
+  <id>/job.json          status, timestamps, result (replaced atomically)
+  <id>/events.jsonl      the event log, one JSON object per line. An event's
+                         id is its line number, so SSE clients can resume
+                         from a Last-Event-ID against any process
+  slots/<n>.lock         max_workers slots, each held (flock) by the process
+                         running a job in it
+  owners/<token>.lock    held by each owning process while it lives, so the
+                         jobs of a process that died are failed, not waited on
+
+max_workers and max_queue therefore hold across all web processes, not per
+process. Queued jobs start oldest first, whichever process owns them.
+Without fcntl (Windows) the locks only hold within one process.
+"""
+import atexit
+import contextlib
+import datetime
+import importlib
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import signal
+import threading
+import time
+import traceback
+import uuid
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed', 'cancelled')
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+RECORD_FILE = 'job.json'
+EVENTS_FILE = 'events.jsonl'
+CANCELLED_EVENT = {'error': 'Training cancelled', 'type': 'error', 'cancelled': True}
+
+
+class QueueFullError(Exception):
+    """Raised when the pending-job queue is at capacity"""
+
+
+class JobNotFoundError(Exception):
+    """Raised when a job id is unknown (or has been pruned)"""
+
+
+def _exit_on_sigterm(signum, frame):
+    raise SystemExit(128 + signum)
+
+
+def _resolve(target):
+    """A 'module:function' target is imported here, so only worker processes pay for the trainer's imports"""
+    if isinstance(target, str):
+        module, _, name = target.partition(':')
+        return getattr(importlib.import_module(module), name)
+    return target
+
+
+def _worker_main(target, kwargs, events, nice):
+    """Worker process entry point: run the training generator and ship its events"""
+    try:
+        if nice:
+            os.nice(nice)
+    except OSError:
+        pass
+    # Cancel/shutdown terminate the worker; unwind instead of dying so cleanup (a search pool) runs
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    try:
+        for event in _resolve(target)(**kwargs):
+            events.put(event)
+    except Exception as e:
+        events.put({'error': f'Training failed: {str(e)}', 'traceback': traceback.format_exc(), 'type': 'error'})
+    finally:
+        events.put(None)
+
+
+def _drain(events):
+    """Events already sent by a worker that has exited, up to its sentinel"""
+    drained = []
+    while True:
+        try:
+            event = events.get_nowait()
+        except queue.Empty:
+            return drained
+        if event is None:
+            return drained
+        drained.append(event)
+
+
+def _try_lock(f):
+    """Non-blocking exclusive flock on an open file; always succeeds without fcntl"""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _write_json(path, data):
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+class TrainingJob:
+    """A job as recorded in its job.json; jobs this process owns also carry their arguments and worker"""
+
+    def __init__(self, job_id, owner=None, cleanup_paths=(), events_path=None):
+        self.id = job_id
+        self.owner = owner
+        self.cleanup_paths = list(cleanup_paths)
+        self.status = 'queued'
+        self.created = datetime.datetime.now().isoformat()
+        self.started = None
+        self.finished = None
+        self.duration = None
+        self.result = None
+        self.cancel_requested = False
+        self.events_path = events_path
+        # Owner-only, never written to disk
+        self.kwargs = None
+        self.process = None
+        self.slot = None
+        self._started_at = None
+
+    @classmethod
+    def from_record(cls, record, events_path):
+        job = cls(record['job_id'], record.get('owner'), record.get('cleanup_paths', ()), events_path)
+        for name in ('status', 'created', 'started', 'finished', 'result', 'cancel_requested'):
+            setattr(job, name, record.get(name))
+        job.duration = record.get('duration_seconds')
+        return job
+
+    def to_record(self):
+        return {
+            'job_id': self.id,
+            'owner': self.owner,
+            'cleanup_paths': self.cleanup_paths,
+            'status': self.status,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'duration_seconds': self.duration,
+            'result': self.result,
+            'cancel_requested': bool(self.cancel_requested)
+        }
+
+    def read_events(self):
+        try:
+            with open(self.events_path, 'rb') as f:
+                lines = f.read().split(b'\n')
+        except (FileNotFoundError, TypeError):
+            return []
+        # The last piece is empty, or a line still being written
+        return [json.loads(line) for line in lines[:-1]]
+
+    def to_dict(self):
+        events = self.read_events()
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'duration_seconds': self.duration,
+            'events': len(events),
+            'last_event': events[-1] if events else None,
+            'result': self.result
+        }
+
+
+class TrainingJobManager:
+    """
+    Runs at most max_workers training processes at a time, across every web
+    process sharing `folder`, with a bounded queue of pending jobs behind
+    them. target is the training generator function, or its 'module:function'
+    name.
+
+    Optional hooks (called with the manager's lock held, so keep them cheap):
+    on_event(job, event) in the owning process for every event a worker
+    sends, and on_finish(job) once a job reaches a final status, in the
+    process that recorded it (the owner, unless the job was cancelled while
+    queued or its owner died).
+    """
+
+    def __init__(self, target, folder='jobs', max_workers=1, max_queue=4, retention=50, nice=10,
+                 start_method='spawn', poll_interval=0.25, on_event=None, on_finish=None):
+        self.target = target
+        self.folder = folder
+        self.on_event = on_event
+        self.on_finish = on_finish
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self.retention = max(1, int(retention))
+        self.nice = nice
+        self.poll_interval = poll_interval
+        self._ctx = multiprocessing.get_context(start_method)
+        self._slots_folder = os.path.join(folder, 'slots')
+        self._owners_folder = os.path.join(folder, 'owners')
+        os.makedirs(self._slots_folder, exist_ok=True)
+        os.makedirs(self._owners_folder, exist_ok=True)
+        self._cond = threading.Condition()
+        # Per-process ownership, set up on this process's first submit (gunicorn forks after import)
+        self._pid = None
+        self._token = None
+        self._owner_file = None
+        self._local = {}
+        self._dispatcher = None
+        atexit.register(self.shutdown)
+
+    # --- submission / control -------------------------------------------------
+
+    def submit(self, cleanup_paths=(), **kwargs):
+        with self._cond:
+            self._ensure_owner()
+            with self._store_lock():
+                jobs = self._sweep()
+                running = sum(job.status == 'running' for job in jobs)
+                queued = sum(job.status == 'queued' for job in jobs)
+                if running >= self.max_workers and queued >= self.max_queue:
+                    raise QueueFullError(f'Training queue is full ({self.max_queue} jobs waiting). Try again later.')
+                job_id = uuid.uuid4().hex
+                os.makedirs(self._job_dir(job_id))
+                job = TrainingJob(job_id, self._token, cleanup_paths, self._events_path(job_id))
+                # The log exists before the record, so whoever finds the job can open it
+                self._append_event(job, {'log': f'Training job {job.id} queued', 'type': 'info', 'job_id': job.id})
+                self._save(job)
+                self._prune(jobs)
+            job.kwargs = kwargs
+            self._local[job.id] = job
+            self._start_pending()
+            return job
+
+    def get(self, job_id):
+        job = self._current(job_id)
+        if job is None:
+            raise JobNotFoundError(f'Job not found: {job_id}')
+        return job
+
+    def list(self):
+        with self._store_lock():
+            jobs = self._sweep()
+        return [job.to_dict() for job in sorted(jobs, key=lambda j: j.created, reverse=True)]
+
+    def cancel(self, job_id):
+        with self._cond:
+            with self._store_lock():
+                job = self.get(job_id)
+                if job.status in FINISHED_STATUSES:
+                    return job
+                job.cancel_requested = True
+                if job.status == 'queued':
+                    # Whichever process owns it drops its arguments once it sees the status
+                    self._finish(job, 'cancelled', CANCELLED_EVENT)
+                    self._local.pop(job.id, None)
+                else:
+                    # The owner's monitor notices within poll_interval and terminates the worker
+                    self._save(job)
+            local = self._local.get(job.id)
+            if local is not None and local.process is not None:
+                local.cancel_requested = True
+                local.process.terminate()
+            return job
+
+    def shutdown(self):
+        """Terminate this process's running workers (they aren't daemonic, so nothing else stops them at exit)"""
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            processes = [job.process for job in self._local.values() if job.process is not None]
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    def stats(self):
+        with self._store_lock():
+            jobs = self._sweep()
+        return {
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'running': sum(job.status == 'running' for job in jobs),
+            'queued': sum(job.status == 'queued' for job in jobs)
+        }
+
+    # --- events -----------------------------------------------------------------
+
+    def iter_events(self, job_id, last_event_id=None, heartbeat=15.0):
+        """
+        Yield (event_id, event) pairs after last_event_id, blocking for new ones
+        until the job finishes. (None, None) is yielded as a keep-alive when
+        nothing arrives within `heartbeat` seconds.
+        """
+        job = self.get(job_id)
+        position = 0 if last_event_id is None else max(0, int(last_event_id) + 1)
+        index = 0
+        partial = b''
+        idle_since = time.monotonic()
+        with open(job.events_path, 'rb') as f:
+            while True:
+                # Status first: events written before it flipped to finished are read below
+                current = self._current(job_id)
+                finished = current is None or current.status in FINISHED_STATUSES
+                lines = (partial + f.read()).split(b'\n')
+                partial = lines.pop()
+                for line in lines:
+                    if index >= position:
+                        yield index, json.loads(line)
+                    index += 1
+                if lines:
+                    idle_since = time.monotonic()
+                    continue
+                if finished:
+                    return
+                if time.monotonic() - idle_since >= heartbeat:
+                    idle_since = time.monotonic()
+                    yield None, None
+                # Woken at once by events this process writes; other processes' are picked up by polling
+                with self._cond:
+                    self._cond.wait(timeout=self.poll_interval)
+
+    # --- store ------------------------------------------------------------------
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.folder, job_id)
+
+    def _events_path(self, job_id):
+        return os.path.join(self._job_dir(job_id), EVENTS_FILE)
+
+    @contextlib.contextmanager
+    def _store_lock(self):
+        """Serializes read-modify-write of job records across threads and processes"""
+        # Always _cond first, then the file lock, whichever path takes them
+        with self._cond, open(os.path.join(self.folder, '.lock'), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    def _load(self, job_id):
+        # Ids are uuid hex; anything else (e.g. "..") never names a job directory
+        if not job_id or not job_id.isalnum():
+            return None
+        try:
+            with open(os.path.join(self._job_dir(job_id), RECORD_FILE)) as f:
+                record = json.load(f)
+        except (FileNotFoundError, NotADirectoryError, ValueError):
+            return None
+        return TrainingJob.from_record(record, self._events_path(job_id))
+
+    def _current(self, job_id):
+        """A job's record, failing it first if it is unfinished and its owning process died"""
+        job = self._load(job_id)
+        if job is None or job.status in FINISHED_STATUSES or self._owner_alive(job.owner):
+            return job
+        with self._store_lock():
+            self._sweep()
+        return self._load(job_id)
+
+    def _save(self, job):
+        _write_json(os.path.join(self._job_dir(job.id), RECORD_FILE), job.to_record())
+
+    def _all(self):
+        jobs = []
+        for name in os.listdir(self.folder):
+            if os.path.isdir(os.path.join(self.folder, name)):
+                job = self._load(name)
+                if job is not None:
+                    jobs.append(job)
+        return jobs
+
+    def _owner_alive(self, token):
+        if token == self._token and self._pid == os.getpid():
+            return True
+        if fcntl is None:
+            return False
+        path = os.path.join(self._owners_folder, f'{token}.lock')
+        try:
+            f = open(path, 'r')
+        except FileNotFoundError:
+            return False
+        with f:
+            if not _try_lock(f):
+                return True
+            # Nobody holds it: that process is gone
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return False
+
+    def _sweep(self):
+        """All jobs, after failing those whose owning process died (store lock held)"""
+        jobs = self._all()
+        alive = {}
+        for job in jobs:
+            if job.status in FINISHED_STATUSES:
+                continue
+            if job.owner not in alive:
+                alive[job.owner] = self._owner_alive(job.owner)
+            if not alive[job.owner]:
+                self._finish(job, 'failed', {'error': 'Training job lost: the web worker that owned it exited',
+                                             'type': 'error'})
+        return jobs
+
+    def _prune(self, jobs):
+        """Drop the oldest finished jobs beyond `retention` (store lock held)"""
+        finished = sorted((j for j in jobs if j.status in FINISHED_STATUSES), key=lambda j: j.finished or '')
+        for job in finished[:max(0, len(finished) - self.retention)]:
+            shutil.rmtree(self._job_dir(job.id), ignore_errors=True)
+        # Lock files of exited processes (checking one removes it when nobody holds it)
+        for name in os.listdir(self._owners_folder):
+            if name.endswith('.lock'):
+                self._owner_alive(name[:-len('.lock')])
+
+    def _append_event(self, job, event):
+        with open(job.events_path, 'a') as f:
+            f.write(json.dumps(event) + '\n')
+        with self._cond:
+            self._cond.notify_all()
+
+    # --- internals (called with self._cond held unless noted) -------------------
+
+    def _ensure_owner(self):
+        if self._pid == os.getpid():
+            return
+        # First job in this process; anything inherited through a fork belongs to the parent
+        self._pid = os.getpid()
+        self._token = f'{self._pid}-{uuid.uuid4().hex[:8]}'
+        self._local = {}
+        self._dispatcher = None
+        self._owner_file = open(os.path.join(self._owners_folder, f'{self._token}.lock'), 'w')
+        _try_lock(self._owner_file)
+
+    def _acquire_slot(self):
+        for n in range(self.max_workers):
+            f = open(os.path.join(self._slots_folder, f'{n}.lock'), 'a')
+            if not any(job.slot is not None and job.slot.name == f.name for job in self._local.values()) \
+                    and _try_lock(f):
+                return f
+            f.close()
+        return None
+
+    def _start_pending(self):
+        """Start this process's queued jobs while they are first in line and a slot is free"""
+        if not any(job.process is None for job in self._local.values()):
+            return
+        with self._store_lock():
+            jobs = self._sweep()
+            for job in sorted((j for j in jobs if j.status == 'queued'), key=lambda j: (j.created, j.id)):
+                local = self._local.get(job.id)
+                if local is None:
+                    # Another process's job is first in line; it starts it on its next poll
+                    break
+                slot = self._acquire_slot()
+                if slot is None:
+                    break
+                local.slot = slot
+                local.status = 'running'
+                local.started = datetime.datetime.now().isoformat()
+                local._started_at = time.perf_counter()
+                self._save(local)
+                self._spawn(local)
+            # Jobs cancelled by another process while queued
+            for job_id, local in list(self._local.items()):
+                if local.process is None:
+                    current = next((j for j in jobs if j.id == job_id), None)
+                    if current is None or current.status != 'queued':
+                        del self._local[job_id]
+        if any(job.process is None for job in self._local.values()) and \
+                (self._dispatcher is None or not self._dispatcher.is_alive()):
+            self._dispatcher = threading.Thread(target=self._dispatch, name='training-dispatch', daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch(self):
+        """Retry queued jobs while this process has any (runs on its own thread)"""
+        while True:
+            time.sleep(self.poll_interval)
+            with self._cond:
+                self._start_pending()
+                if not any(job.process is None for job in self._local.values()):
+                    return
+
+    def _spawn(self, job):
+        events = self._ctx.Queue()
+        # Not daemonic: a job may start its own process pool (model search); shutdown() stops it
+        job.process = self._ctx.Process(
+            target=_worker_main,
+            args=(self.target, job.kwargs, events, self.nice),
+            daemon=False
+        )
+        job.process.start()
+        # The worker has its own pickled copy now; don't keep an in-memory upload alive here
+        job.kwargs = None
+        threading.Thread(target=self._monitor, args=(job, events), daemon=True).start()
+
+    def _monitor(self, job, events):
+        """Drain a worker's events into the job log (runs on its own thread)"""
+        last = {}
+        next_cancel_check = time.monotonic() + self.poll_interval
+        while True:
+            if not job.cancel_requested and time.monotonic() >= next_cancel_check:
+                next_cancel_check = time.monotonic() + self.poll_interval
+                current = self._load(job.id)
+                if current is not None and current.cancel_requested:
+                    # Cancelled through another web process
+                    job.cancel_requested = True
+                    job.process.terminate()
+            try:
+                event = events.get(timeout=self.poll_interval)
+            except queue.Empty:
+                if job.process.is_alive():
+                    continue
+                # The process died without its sentinel (terminated or crashed). Keep everything it
+                # managed to send, its error and traceback included, before finishing the job
+                for event in _drain(events):
+                    self._record(job, event)
+                    last = event
+                break
+            if event is None:
+                break
+            self._record(job, event)
+            last = event
+
+        job.process.join()
+        with self._cond:
+            with self._store_lock():
+                current = self._load(job.id)
+                job.cancel_requested = job.cancel_requested or (current is not None and current.cancel_requested)
+                if last.get('success'):
+                    # A cancel that arrives after the model was saved doesn't undo it
+                    job.result = last
+                    self._finish(job, 'succeeded')
+                elif job.cancel_requested:
+                    self._finish(job, 'cancelled', CANCELLED_EVENT)
+                else:
+                    if 'error' not in last:
+                        last = {'error': f'Training worker exited unexpectedly (exit code {job.process.exitcode})',
+                                'type': 'error'}
+                        self._append_event(job, last)
+                    job.result = last
+                    self._finish(job, 'failed')
+            job.slot.close()
+            job.slot = None
+            self._local.pop(job.id, None)
+            self._start_pending()
+
+    def _record(self, job, event):
+        with self._cond:
+            self._append_event(job, event)
+            if self.on_event is not None:
+                self.on_event(job, event)
+
+    def _finish(self, job, status, event=None):
+        """Record a final status (store lock held); the owner's hook runs in the owning process"""
+        if event is not None:
+            self._append_event(job, event)
+        job.status = status
+        job.finished = datetime.datetime.now().isoformat()
+        if job._started_at is not None:
+            job.duration = time.perf_counter() - job._started_at
+        elif job.started is not None:
+            job.duration = (datetime.datetime.now() - datetime.datetime.fromisoformat(job.started)).total_seconds()
+        self._save(job)
+        for path in job.cleanup_paths:
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except OSError as e:
+                print(f"Could not remove {path}: {e}")
+        if self.on_finish is not None:
+            try:
+                self.on_finish(job)
+            except Exception as e:
+                print(f"Job finish hook failed: {e}")
+        with self._cond:
+            self._cond.notify_all()
@@ -0,0 +1,190 @@
+"""
+Training uploads parsed straight from the request body.
+
+The multipart parser writes the file part into a SpooledUpload as it arrives
+(see upload_target). The upload is hashed (SHA-256, the dataset cache key)
+and size-checked chunk by chunk. It stays in memory until it grows past
+spool_bytes. Only then does it spill, once, to `<final path>.part` in the
+uploads folder, which is renamed into place when the body is complete.
+Nothing goes through werkzeug's temporary file, and uploads below the
+threshold never touch the disk: their bytes are handed to the training job,
+which reads them through MemoryFile.
+
+An upload over max_bytes is rejected before the body is read when the
+request declares its length, or as soon as the limit is crossed otherwise.
+"""
+import hashlib
+import io
+import os
+import tempfile
+import time
+
+
+PART_SUFFIX = '.part'
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured maximum size"""
+
+
+def check_declared_size(content_length, max_bytes):
+    """Reject a request whose Content-Length already exceeds the limit, before reading the body"""
+    if max_bytes and content_length is not None and content_length > max_bytes:
+        raise UploadTooLargeError(f'Upload exceeds the {max_bytes / (1024 * 1024):g} MB limit')
+
+
+class SpooledUpload:
+    """Write target for one uploaded file: hashed and counted as written, in memory up to spool_bytes"""
+
+    def __init__(self, spill_path, spool_bytes, max_bytes=None):
+        self.path = spill_path
+        self.spool_bytes = int(spool_bytes)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._file = io.BytesIO()
+        self._spilled = False
+        self._committed = False
+
+    @property
+    def in_memory(self):
+        return not self._spilled
+
+    @property
+    def sha256(self):
+        return self._digest.hexdigest()
+
+    def write(self, data):
+        if self.max_bytes and self.size + len(data) > self.max_bytes:
+            raise UploadTooLargeError(f'Upload exceeds the {self.max_bytes / (1024 * 1024):g} MB limit')
+        if not self._spilled and self.size + len(data) > self.spool_bytes:
+            self._spill()
+        self._file.write(data)
+        self._digest.update(data)
+        self.size += len(data)
+        return len(data)
+
+    def _spill(self):
+        spilled = open(self.path + PART_SUFFIX, 'wb')
+        try:
+            spilled.write(self._file.getbuffer())
+        except BaseException:
+            spilled.close()
+            os.remove(self.path + PART_SUFFIX)
+            raise
+        self._file.close()
+        self._file = spilled
+        self._spilled = True
+
+    # The parser rewinds the container before wrapping it in a FileStorage
+    def seek(self, offset, whence=0):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def getvalue(self):
+        """The uploaded bytes of an in-memory upload"""
+        if self._spilled:
+            raise ValueError('Upload was spilled to disk; use its path')
+        return self._file.getvalue()
+
+    def commit(self):
+        """Finish the upload: returns its final path, or None if it is held in memory"""
+        if not self._spilled:
+            return None
+        self._file.close()
+        os.replace(self.path + PART_SUFFIX, self.path)
+        self._committed = True
+        return self.path
+
+    def close(self):
+        self._file.close()
+
+    def discard(self):
+        """Drop the upload and whatever it wrote to disk (safe to call more than once)"""
+        self._file.close()
+        for path in (self.path + PART_SUFFIX, self.path if self._committed else None):
+            if path and os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"Could not remove {path}: {e}")
+
+
+def upload_target(spill_path_for, spool_bytes, max_bytes=None, accept=None):
+    """
+    stream_factory for werkzeug.formparser.parse_form_data. Every file part
+    gets a SpooledUpload at spill_path_for(filename). accept(filename) may
+    raise to reject a part before its body is read. Returns (factory, list of
+    the uploads created), so callers can discard all of them on failure.
+    """
+    created = []
+
+    def factory(total_content_length, content_type, filename, content_length=None):
+        if accept is not None:
+            accept(filename)
+        upload = SpooledUpload(spill_path_for(filename), spool_bytes, max_bytes)
+        created.append(upload)
+        return upload
+
+    return factory, created
+
+
+class MemoryFile:
+    """
+    A filesystem path for bytes held in memory, for readers that want a path
+    (pd.read_csv re-opens the file for the header and the data). Uses an
+    anonymous memfd where the platform has one, else a temporary file that is
+    removed on close.
+    """
+
+    def __init__(self, data, name='upload.csv'):
+        self._fd = self._tmp_path = None
+        if hasattr(os, 'memfd_create'):
+            self._fd = os.memfd_create(name)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(self._fd, view):]
+            self.path = f'/proc/self/fd/{self._fd}'
+        else:
+            with tempfile.NamedTemporaryFile(suffix='_' + name, delete=False) as f:
+                f.write(data)
+            self.path = self._tmp_path = f.name
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        if self._tmp_path is not None:
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+            self._tmp_path = None
+
+    def __enter__(self):
+        return self.path
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def sweep_stale(folder, max_age_seconds):
+    """Remove uploads (and interrupted .part files) a crashed worker left behind; returns their names"""
+    cutoff = time.time() - max_age_seconds
+    removed = []
+    try:
+        names = os.listdir(folder)
+    except FileNotFoundError:
+        return removed
+    for name in names:
+        path = os.path.join(folder, name)
+        try:
+            if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed.append(name)
+        except OSError:
+            continue
+    return removed
@@ -0,0 +1,41 @@
+"""
+WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+Importing this module imports the service, the libraries the service
+otherwise imports on first use (pandas, joblib and the scikit-learn
+estimators an artifact can hold), and the active model. With gunicorn's
+preload_app that happens once in the master, before the workers are forked,
+so the workers share all of it copy-on-write.
+
+PRELOAD_MODEL=0 skips the preload for the fastest possible boot (rolling
+restarts, autoscaling). Each worker then loads the model on a background
+thread and reports ready on /ready when it's done, and imports pandas and
+scikit-learn itself, privately, the first time it needs them.
+"""
+import gc
+import importlib
+import os
+
+
+# What the app imports lazily: CSV parsing (/predict-batch), .joblib artifacts and the sklearn fallback
+PRELOAD_MODULES = ('pandas', 'joblib', 'sklearn.pipeline', 'sklearn.preprocessing', 'sklearn.naive_bayes',
+                   'sklearn.linear_model', 'sklearn.discriminant_analysis')
+
+
+def create_app(preload=True):
+    import app as service
+
+    if preload:
+        for name in PRELOAD_MODULES:
+            importlib.import_module(name)
+        service.preload_models()
+        # Move everything loaded so far out of the collector's reach, so GC passes
+        # in the workers don't write to (and un-share) the preloaded pages
+        gc.collect()
+        gc.freeze()
+    return service.app
+
+
+application = create_app(preload=os.environ.get('PRELOAD_MODEL', '1').lower() not in ('0', 'false', 'no'))